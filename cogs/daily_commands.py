@@ -1,17 +1,59 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import io
+import time
+import asyncio
 import logging
-from datetime import datetime
+from datetime import timedelta
+from typing import Optional
 import pytz
-from utils.config import config, dailies_storage
-from cogs.daily_scheduler import DailyModal
+from utils.config import guild_settings, member_prefs, dailies_storage
+from utils.clock import clock
+from utils import tracing
+from utils.archive import daily_archive
+from utils.ratelimit import dm_pacer
+from utils.inflight import inflight, daily_key, SUBMITTED
+from utils.status import status_snapshots, mentions, page_count, PAGE_SIZE
+from utils.roster import team_roster
+from cogs.daily_scheduler import DailyModal, team_members
 
 logger = logging.getLogger('DailiesBot.Commands')
 
+
+def _preload_report():
+    # El import de utils.report también corre en el thread: numpy tarda en importarse
+    from utils import report
+    report.preload()
+
+
 class DailyCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self._preload: Optional[asyncio.Task] = None
+    
+    async def cog_load(self):
+        self._preload = asyncio.create_task(self._preload_report())
+    
+    def cog_unload(self):
+        if self._preload:
+            self._preload.cancel()
+    
+    async def _preload_report(self):
+        """Precarga numpy y matplotlib en un thread apenas el bot se conecta.
+
+        El primer `/daily_report` no paga los imports ni la carga de fuentes, y el
+        arranque no compite con ellos por el CPU.
+        """
+        try:
+            await self.bot.wait_until_ready()
+            started = time.perf_counter()
+            await asyncio.to_thread(_preload_report)
+            logger.info(f"Report libraries preloaded in {time.perf_counter() - started:.2f}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not preload the participation report: {e}")
     
     @app_commands.command(name="daily", description="Completar tu daily manualmente")
     async def daily(self, interaction: discord.Interaction):
@@ -22,8 +64,9 @@ class DailyCommands(commands.Cog):
             )
             return
         
+        settings = guild_settings.get(interaction.guild.id)
         has_role = any(
-            role.id in config.PRODUCT_TEAM_ROLES 
+            role.id in settings.team_roles 
             for role in interaction.user.roles
         )
         
@@ -34,12 +77,22 @@ class DailyCommands(commands.Cog):
             )
             return
         
+        state = inflight.state(daily_key(interaction.guild.id, interaction.user.id))
+        if state is not None:
+            inflight.absorbed('command')
+            await interaction.response.send_message(
+                "✅ Ya completaste tu daily de hoy. ¡Vuelve mañana!" if state == SUBMITTED else "⏳ Tu daily se está enviando.",
+                ephemeral=True
+            )
+            return
+        
         already_submitted = await dailies_storage.has_submitted_today(
             interaction.user.id, 
             interaction.guild.id
         )
         
         if already_submitted:
+            inflight.mark(daily_key(interaction.guild.id, interaction.user.id), SUBMITTED)
             await interaction.response.send_message(
                 "✅ Ya completaste tu daily de hoy. ¡Vuelve mañana!",
                 ephemeral=True
@@ -60,59 +113,71 @@ class DailyCommands(commands.Cog):
         
         await interaction.response.defer()
         
-        today_dailies = await dailies_storage.get_today_dailies(interaction.guild.id)
-        
-        completed_users = []
-        pending_users = []
-        
-        for role_id in config.PRODUCT_TEAM_ROLES:
-            role = interaction.guild.get_role(role_id)
-            if not role:
-                continue
-            
-            for member in role.members:
-                if member.bot:
-                    continue
-                
-                if str(member.id) in today_dailies:
-                    completed_users.append(member.mention)
-                else:
-                    pending_users.append(member.mention)
-        
-        tz = pytz.timezone(config.TIMEZONE)
-        now = datetime.now(tz)
+        snapshot = await status_snapshots.get(interaction.guild)
+        pages = status_snapshots.pages(interaction.guild, snapshot, build_status_pages)
+        view = DailyStatusView(interaction.guild.id) if len(pages) > 1 else discord.utils.MISSING
+        await interaction.followup.send(embed=pages[0], view=view)
+    
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.roles != after.roles:
+            status_snapshots.member_changed(after)
+    
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        status_snapshots.member_changed(member)
+    
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        status_snapshots.member_removed(member.guild.id, member.id)
+    
+    @app_commands.command(name="daily_timezone", description="Configurar tu zona horaria para recibir la daily a tu hora local")
+    @app_commands.describe(zona="Zona horaria IANA (ej: Europe/Madrid). Usá 'servidor' para volver a la del servidor")
+    async def daily_timezone(self, interaction: discord.Interaction, zona: Optional[str] = None):
+        guild_id = interaction.guild.id if interaction.guild else 0
         
-        embed = discord.Embed(
-            title=f"📊 Estado de Dailies - {now.strftime('%d/%m/%Y')}",
-            color=discord.Color.blue(),
-            timestamp=now
-        )
+        if zona is None:
+            current = member_prefs.get_timezone(interaction.user.id)
+            description = f"Tu zona horaria es **{current}**." if current else "Usás la zona horaria del servidor."
+            if guild_id:
+                now = clock.now(member_prefs.timezone_for(guild_id, interaction.user.id))
+                description += f"\nHora local: {now.strftime('%H:%M')}"
+            await interaction.response.send_message(description, ephemeral=True)
+            return
         
-        if completed_users:
-            embed.add_field(
-                name=f"✅ Completadas ({len(completed_users)})",
-                value="\n".join(completed_users[:10]) + (f"\n... y {len(completed_users)-10} más" if len(completed_users) > 10 else ""),
-                inline=False
+        zona = zona.strip()
+        if zona.lower() == 'servidor':
+            zona = None
+        elif zona not in pytz.all_timezones_set:
+            await interaction.response.send_message(
+                f"❌ Zona horaria desconocida `{zona}`. Ejemplo: America/Buenos_Aires",
+                ephemeral=True
             )
+            return
         
-        if pending_users:
-            embed.add_field(
-                name=f"⏳ Pendientes ({len(pending_users)})",
-                value="\n".join(pending_users[:10]) + (f"\n... y {len(pending_users)-10} más" if len(pending_users) > 10 else ""),
-                inline=False
+        saved = await member_prefs.set_timezone(interaction.user.id, zona)
+        if not saved:
+            await interaction.response.send_message(
+                "❌ No se pudo guardar tu zona horaria. Por favor, intenta de nuevo.",
+                ephemeral=True
             )
+            return
         
-        completion_rate = len(completed_users) / (len(completed_users) + len(pending_users)) * 100 if (completed_users or pending_users) else 0
-        
-        embed.add_field(
-            name="📈 Tasa de completación",
-            value=f"{completion_rate:.1f}%",
-            inline=False
-        )
-        
-        embed.set_footer(text="Daily Tracker")
+        scheduler = self.bot.get_cog('DailyScheduler')
+        if scheduler is not None:
+            scheduler.refresh_user(interaction.user.id)
         
-        await interaction.followup.send(embed=embed)
+        if zona:
+            message = f"✅ Vas a recibir la daily, el recordatorio y el cierre del día a tu hora local (**{zona}**)."
+        else:
+            message = "✅ Vas a usar la zona horaria del servidor."
+        await interaction.response.send_message(message, ephemeral=True)
+    
+    @daily_timezone.autocomplete('zona')
+    async def daily_timezone_autocomplete(self, interaction: discord.Interaction, current: str):
+        current = current.lower()
+        matches = [tz for tz in pytz.common_timezones if current in tz.lower()]
+        return [app_commands.Choice(name=tz, value=tz) for tz in matches[:25]]
     
     @app_commands.command(name="daily_reminder", description="Enviar recordatorio manual a quienes no completaron su daily")
     async def daily_reminder(self, interaction: discord.Interaction):
@@ -123,8 +188,8 @@ class DailyCommands(commands.Cog):
             )
             return
         
-        admin_role_id = config.ADMIN_ROLE_ID
-        if not any(role.id == admin_role_id for role in interaction.user.roles):
+        settings = guild_settings.get(interaction.guild.id)
+        if not settings.is_admin(interaction.user):
             await interaction.response.send_message(
                 "❌ Solo los administradores pueden enviar recordatorios manuales.",
                 ephemeral=True
@@ -136,13 +201,13 @@ class DailyCommands(commands.Cog):
         today_dailies = await dailies_storage.get_today_dailies(interaction.guild.id)
         reminded_count = 0
         
-        for role_id in config.PRODUCT_TEAM_ROLES:
+        for role_id in settings.team_roles:
             role = interaction.guild.get_role(role_id)
             if not role:
                 continue
             
-            for member in role.members:
-                if member.bot or str(member.id) in today_dailies:
+            for member in team_roster.role_members(interaction.guild, role):
+                if member.bot or member.id in today_dailies:
                     continue
                 
                 try:
@@ -160,6 +225,7 @@ class DailyCommands(commands.Cog):
                     
                     await member.send(embed=embed)
                     reminded_count += 1
+                    await dm_pacer.pace()
                     
                 except discord.Forbidden:
                     logger.warning(f"Cannot send reminder to {member.name}")
@@ -170,6 +236,143 @@ class DailyCommands(commands.Cog):
             f"✅ Se enviaron {reminded_count} recordatorios.",
             ephemeral=True
         )
+    
+    @app_commands.command(name="daily_report", description="Reporte de participación: horarios de envío y completación por miembro")
+    @app_commands.describe(dias="Días hacia atrás que cubre el reporte (por defecto 90, un trimestre)")
+    async def daily_report(self, interaction: discord.Interaction, dias: app_commands.Range[int, 7, 366] = 90):
+        if not interaction.guild:
+            await interaction.response.send_message(
+                "❌ Este comando solo puede ser usado en un servidor.",
+                ephemeral=True
+            )
+            return
+        
+        settings = guild_settings.get(interaction.guild.id)
+        if not settings.is_admin(interaction.user):
+            await interaction.response.send_message(
+                "❌ Solo los administradores pueden ver el reporte de participación.",
+                ephemeral=True
+            )
+            return
+        
+        # numpy y matplotlib no se importan al arrancar: los precarga `_preload_report`
+        from utils import report
+        if not report.available():
+            await interaction.response.send_message(
+                "❌ El reporte necesita numpy y matplotlib (`pip install -r requirements-report.txt`).",
+                ephemeral=True
+            )
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        guild = interaction.guild
+        until = clock.now(settings.timezone).date()
+        since = until - timedelta(days=dias - 1)
+        names = {member.id: member.display_name for member in team_members(guild)}
+        title = f"Participación en dailies · {since.strftime('%d/%m/%Y')} - {until.strftime('%d/%m/%Y')}"
+        try:
+            with tracing.span('report.build', days=dias):
+                result, png = await asyncio.to_thread(
+                    report.build_report, daily_archive.path(guild.id), since, until, names, title
+                )
+        except Exception as e:
+            logger.error(f"Error building participation report for {guild.name}: {e}")
+            await interaction.followup.send("❌ No se pudo generar el reporte.", ephemeral=True)
+            return
+        
+        if png is None:
+            await interaction.followup.send(
+                "📭 Todavía no hay dailies archivadas en este período. El archivo se completa al cierre de cada día.",
+                ephemeral=True
+            )
+            return
+        
+        embed = discord.Embed(
+            title="📈 Reporte de participación",
+            description=f"Últimos {dias} días ({len(result.participation.dates)} con dailies pedidas)",
+            color=discord.Color.blue()
+        )
+        embed.add_field(
+            name="Completación",
+            value=f"{result.completion_rate:.1%} ({result.completed}/{result.prompts})",
+            inline=True
+        )
+        if result.after_median is not None:
+            embed.add_field(
+                name="Demora desde el pedido",
+                value=f"mediana {result.after_median / 60:.0f} min · p90 {result.after_p90 / 60:.0f} min",
+                inline=True
+            )
+        embed.add_field(name="Con bloqueos", value=f"{result.blockers_rate:.1%}", inline=True)
+        slot = result.busiest_slot
+        if slot is not None:
+            embed.add_field(
+                name="Franja con más envíos",
+                value=f"{report.format_hour(slot[0])} - {report.format_hour(slot[1])}",
+                inline=True
+            )
+        embed.set_image(url="attachment://daily_report.png")
+        await interaction.followup.send(
+            embed=embed,
+            file=discord.File(io.BytesIO(png), filename="daily_report.png"),
+            ephemeral=True
+        )
+
+def build_status_pages(guild, snapshot):
+    """Un embed por página con hasta PAGE_SIZE completadas y PAGE_SIZE pendientes"""
+    now = clock.now(guild_settings.get(guild.id).timezone)
+    completed = mentions(guild, snapshot.completed)
+    pending = mentions(guild, snapshot.pending)
+    total = page_count(snapshot)
+    
+    embeds = []
+    for page in range(total):
+        embed = discord.Embed(
+            title=f"📊 Estado de Dailies - {now.strftime('%d/%m/%Y')}",
+            color=discord.Color.blue(),
+            timestamp=now
+        )
+        
+        chunk = completed[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+        if chunk:
+            embed.add_field(name=f"✅ Completadas ({len(completed)})", value="\n".join(chunk), inline=False)
+        
+        chunk = pending[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+        if chunk:
+            embed.add_field(name=f"⏳ Pendientes ({len(pending)})", value="\n".join(chunk), inline=False)
+        
+        embed.add_field(
+            name="📈 Tasa de completación",
+            value=f"{snapshot.completion_rate:.1f}%",
+            inline=False
+        )
+        
+        embed.set_footer(text=f"Daily Tracker · Página {page + 1}/{total}" if total > 1 else "Daily Tracker")
+        embeds.append(embed)
+    return embeds
+
+class DailyStatusView(discord.ui.View):
+    """Paginación de `/daily_status` para equipos de más de PAGE_SIZE miembros"""
+    
+    def __init__(self, guild_id: int, page: int = 0):
+        super().__init__(timeout=600)
+        self.guild_id = guild_id
+        self.page = page
+    
+    async def show(self, interaction: discord.Interaction, step: int):
+        snapshot = await status_snapshots.get(interaction.guild)
+        pages = status_snapshots.pages(interaction.guild, snapshot, build_status_pages)
+        self.page = (self.page + step) % len(pages)
+        await interaction.response.edit_message(embed=pages[self.page], view=self)
+    
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, -1)
+    
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, 1)
 
 async def setup(bot):
     await bot.add_cog(DailyCommands(bot))
\ No newline at end of file
@@ -1,127 +1,255 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import logging
-from datetime import datetime, time
+from datetime import datetime, timedelta
+import heapq
+import itertools
 import pytz
 import asyncio
-from utils.config import config, schedule_manager, dailies_storage, messages_storage
+import os
+import time
+from utils.config import config, guild_settings, member_prefs, schedule_manager, dailies_storage, messages_storage
+from utils.clock import clock, get_zone
+from utils import metrics, tracing
+from utils.ratelimit import dm_pacer, edit_pacer
+from utils.lifecycle import lifecycle, tracked
+from utils.fileio import read_json, write_json
+from utils.status import status_snapshots
+from utils.roster import team_roster
+from utils.posting import daily_poster
+from utils.archive import daily_archive, archive_row
+from utils.records import NO_BLOCKERS
+from utils.inflight import inflight, daily_key, BUTTON_WINDOW, OPENING, SUBMITTED, SUBMITTING
 
 logger = logging.getLogger('DailiesBot.Scheduler')
 
-async def send_daily_reminders(bot, guild):
-    sent_count = 0
+# Presupuesto global de guilds procesados en paralelo, compartido por todas las tareas
+_guild_semaphore = asyncio.Semaphore(config.GUILD_CONCURRENCY)
 
-    # Enviar mensaje al canal de dailies con la fecha
-    channel = guild.get_channel(config.DAILIES_CHANNEL_ID)
-    if channel:
-        try:
-            tz = pytz.timezone(config.TIMEZONE)
-            now = datetime.now(tz)
-
-            # Días de la semana en español
-            dias_semana = {
-                'Monday': 'Lunes',
-                'Tuesday': 'Martes',
-                'Wednesday': 'Miércoles',
-                'Thursday': 'Jueves',
-                'Friday': 'Viernes',
-                'Saturday': 'Sábado',
-                'Sunday': 'Domingo'
-            }
-
-            dia_español = dias_semana[now.strftime('%A')]
-            fecha_formateada = now.strftime('%d/%m/%Y')
-
-            fecha_mensaje = f"# Dailies del día\n# {dia_español} - {fecha_formateada}"
-            await channel.send(fecha_mensaje)
-            logger.info(f"Sent daily date message to channel in {guild.name}")
-        except Exception as e:
-            logger.error(f"Error sending date message to channel: {e}")
+async def fan_out_guilds(guilds, label, func):
+    """Ejecuta `func(guild)` en paralelo para cada guild.
+
+    Cada guild queda aislado: un error o una demora en uno no frena al resto.
+    Devuelve un dict guild_id -> resultado (None si falló).
+    """
+    async def run(guild):
+        async with _guild_semaphore:
+            try:
+                return guild.id, await func(guild)
+            except Exception as e:
+                logger.error(f"Error in {label} for guild {guild.name}: {e}")
+                return guild.id, None
+
+    results = await asyncio.gather(*(run(guild) for guild in guilds))
+    return dict(results)
 
-    for role_id in config.PRODUCT_TEAM_ROLES:
+# Días de la semana en español
+DIAS_SEMANA = {
+    'Monday': 'Lunes',
+    'Tuesday': 'Martes',
+    'Wednesday': 'Miércoles',
+    'Thursday': 'Jueves',
+    'Friday': 'Viernes',
+    'Saturday': 'Sábado',
+    'Sunday': 'Domingo'
+}
+
+def team_members(guild, roles=None):
+    """Miembros (sin bots, sin repetir) con alguno de los roles indicados o del equipo"""
+    members = {}
+    for role_id in roles or guild_settings.get(guild.id).team_roles:
         role = guild.get_role(role_id)
         if not role:
             logger.warning(f"Role {role_id} not found in guild {guild.name}")
             continue
-        
-        for member in role.members:
-            if member.bot:
-                continue
-            
-            already_submitted = await dailies_storage.has_submitted_today(member.id, guild.id)
-            if already_submitted:
-                logger.info(f"User {member.name} already submitted daily today")
-                continue
-            
-            try:
-                tz = pytz.timezone(config.TIMEZONE)
-                now = datetime.now(tz)
-
-                # Días de la semana en español
-                dias_semana = {
-                    'Monday': 'Lunes',
-                    'Tuesday': 'Martes',
-                    'Wednesday': 'Miércoles',
-                    'Thursday': 'Jueves',
-                    'Friday': 'Viernes',
-                    'Saturday': 'Sábado',
-                    'Sunday': 'Domingo'
-                }
-
-                dia_español = dias_semana[now.strftime('%A')]
-                fecha_formateada = now.strftime('%d/%m/%Y')
-
-                # Mensaje con fecha y día
-                fecha_mensaje = f"# {dia_español} - {fecha_formateada}"
-                await member.send(fecha_mensaje)
-
-                embed = discord.Embed(
-                    title="✨ ¡Buenos días!",
-                    description="Completa tu daily clickeando en el botón de abajo.",
-                    color=discord.Color.blue(),
-                    timestamp=now
-                )
-                embed.set_footer(text="Daily")
+        for member in team_roster.role_members(guild, role):
+            if not member.bot:
+                members[member.id] = member
+    return list(members.values())
 
-                view = DailyReminderView()
+def local_now(guild_id, user_id=None):
+    """Hora actual en la zona del usuario (o del servidor si no configuró una)"""
+    return clock.now(member_prefs.timezone_for(guild_id, user_id))
 
-                msg = await member.send(embed=embed, view=view)
+def date_label(guild_id):
+    """Día y fecha de hoy en la zona del servidor, p. ej. `Lunes - 02/03/2026`"""
+    now = local_now(guild_id)
 
-                # Guardar referencia al mensaje para poder deshabilitar luego
-                try:
-                    date_str = now.strftime('%Y-%m-%d')
-                    await messages_storage.save_message(
-                        user_id=member.id,
-                        guild_id=guild.id,
-                        channel_id=msg.channel.id,
-                        message_id=msg.id,
-                        date_str=date_str
-                    )
-                except Exception as e:
-                    logger.error(f"Error saving message reference for {member.name}: {e}")
+    dia_español = DIAS_SEMANA[now.strftime('%A')]
+    fecha_formateada = now.strftime('%d/%m/%Y')
+
+    return f"{dia_español} - {fecha_formateada}"
+
+def date_header_text(guild_id):
+    """Encabezado con la fecha que abre las dailies del día en el canal"""
+    return f"# Dailies del día\n# {date_label(guild_id)}"
+
+async def open_daily_thread(guild, header):
+    """Con DAILY_THREADS abre el hilo del día desde el mensaje del encabezado"""
+    await daily_poster.open_thread(guild, header, f"Dailies {date_label(guild.id)}")
+
+async def send_date_header(guild):
+    # Enviar mensaje al canal de dailies con la fecha
+    settings = guild_settings.get(guild.id)
+    channel = guild.get_channel(settings.dailies_channel_id)
+    if not channel:
+        return
+    try:
+        with tracing.span('discord.channel_send', root=False):
+            header = await channel.send(date_header_text(guild.id))
+        logger.info(f"Sent daily date message to channel in {guild.name}")
+        await open_daily_thread(guild, header)
+    except Exception as e:
+        logger.error(f"Error sending date message to channel: {e}")
+
+async def post_date_header(bot, guild):
+    """Abre el tablero de estado del día; sin el cog `StatusBoard` envía el encabezado solo"""
+    board = bot.get_cog('StatusBoard')
+    if board is not None and await board.open(guild):
+        return
+    await send_date_header(guild)
+
+async def send_daily_prompt(guild, member) -> bool:
+    """Envía por DM el mensaje con el botón de daily; devuelve True si se envió"""
+    already_submitted = await dailies_storage.has_submitted_today(member.id, guild.id)
+    if already_submitted:
+        logger.info(f"User {member.name} already submitted daily today")
+        return False
+    
+    try:
+        now = local_now(guild.id, member.id)
+
+        dia_español = DIAS_SEMANA[now.strftime('%A')]
+        fecha_formateada = now.strftime('%d/%m/%Y')
+
+        # Mensaje con fecha y día
+        fecha_mensaje = f"# {dia_español} - {fecha_formateada}"
+        with tracing.span('discord.dm', root=False, user=member.id):
+            await member.send(fecha_mensaje)
+
+        embed = discord.Embed(
+            title="✨ ¡Buenos días!",
+            description="Completa tu daily clickeando en el botón de abajo.",
+            color=discord.Color.blue(),
+            timestamp=now
+        )
+        embed.set_footer(text="Daily")
+
+        view = DailyReminderView()
+
+        with tracing.span('discord.dm', root=False, user=member.id):
+            msg = await member.send(embed=embed, view=view)
+
+        # Guardar referencia al mensaje para poder deshabilitar luego
+        try:
+            date_str = dailies_storage.today_key(guild.id, member.id)
+            await messages_storage.save_message(
+                user_id=member.id,
+                guild_id=guild.id,
+                channel_id=msg.channel.id,
+                message_id=msg.id,
+                date_str=date_str
+            )
+        except Exception as e:
+            logger.error(f"Error saving message reference for {member.name}: {e}")
+        logger.info(f"Sent daily reminder to {member.name}")
+        metrics.dm_sent.inc('prompt')
+        return True
+        
+    except discord.Forbidden:
+        logger.warning(f"Cannot send DM to {member.name} - DMs disabled")
+        metrics.dm_failed.inc('prompt', 'forbidden')
+    except Exception as e:
+        logger.error(f"Error sending DM to {member.name}: {e}")
+        metrics.dm_failed.inc('prompt', 'error')
+    return False
+
+async def send_daily_reminders(bot, guild, roles=None):
+    sent_count = 0
+    with tracing.span('send_daily_reminders', guild=guild.id) as trace:
+        await post_date_header(bot, guild)
+
+        for member in team_members(guild, roles):
+            if await send_daily_prompt(guild, member):
                 sent_count += 1
-                logger.info(f"Sent daily reminder to {member.name}")
-                
-                await asyncio.sleep(0.5)
-                
-            except discord.Forbidden:
-                logger.warning(f"Cannot send DM to {member.name} - DMs disabled")
-            except Exception as e:
-                logger.error(f"Error sending DM to {member.name}: {e}")
+                await dm_pacer.pace()
+        trace.set(sent=sent_count)
     
     return sent_count
 
+async def send_member_reminder(guild, member) -> bool:
+    if await dailies_storage.has_submitted_today(member.id, guild.id):
+        return False
+    try:
+        embed = discord.Embed(
+            title="🔔 Recordatorio de Daily",
+            description="¡No te olvides de completar tu daily!",
+            color=discord.Color.orange(),
+            timestamp=local_now(guild.id, member.id)
+        )
+        
+        with tracing.span('discord.dm', root=False, user=member.id):
+            await member.send(embed=embed)
+        logger.info(f"Sent reminder to {member.name}")
+        metrics.dm_sent.inc('reminder')
+        return True
+        
+    except discord.Forbidden:
+        logger.warning(f"Cannot send reminder to {member.name} - DMs disabled")
+        metrics.dm_failed.inc('reminder', 'forbidden')
+    except Exception as e:
+        logger.error(f"Error sending reminder to {member.name}: {e}")
+        metrics.dm_failed.inc('reminder', 'error')
+    return False
+
+async def resolve_daily_guild_id(interaction: discord.Interaction) -> int:
+    """Obtiene el guild de una daily a partir del DM en el que se tocó el botón"""
+    if interaction.guild:
+        return interaction.guild.id
+    if interaction.message is not None:
+        guild_id = await messages_storage.find_guild_for_message(interaction.user.id, interaction.message.id)
+        if guild_id:
+            return guild_id
+    if config.GUILD_ID:
+        return config.GUILD_ID
+    # Sin referencia guardada: si compartimos un único servidor con el usuario, usar ese
+    mutual = interaction.user.mutual_guilds
+    return mutual[0].id if len(mutual) == 1 else 0
+
 class DailyReminderView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)  # Sin timeout para persistencia
 
     @discord.ui.button(label="Completar Daily", style=discord.ButtonStyle.primary, emoji="📝", custom_id="daily_complete_btn")
     async def complete_daily(self, interaction: discord.Interaction, button: discord.ui.Button):
-        guild_id = config.GUILD_ID
+        # Doble click: el primero ya está abriendo el formulario
+        message_id = interaction.message.id if interaction.message is not None else 0
+        if inflight.claim(('button', interaction.user.id, message_id), OPENING, ttl=BUTTON_WINDOW) is not None:
+            inflight.absorbed('button')
+            await interaction.response.defer()
+            return
+
+        guild_id = await resolve_daily_guild_id(interaction)
+        if not guild_id:
+            await interaction.response.send_message(
+                "❌ No se pudo determinar el servidor de esta daily.",
+                ephemeral=True
+            )
+            return
+
+        state = inflight.state(daily_key(guild_id, interaction.user.id))
+        if state is not None:
+            inflight.absorbed('button')
+            await interaction.response.send_message(
+                "✅ Ya completaste tu daily de hoy. ¡Vuelve mañana!" if state == SUBMITTED else "⏳ Tu daily se está enviando.",
+                ephemeral=True
+            )
+            return
 
         # Verificar si ya completó la daily
         already_submitted = await dailies_storage.has_submitted_today(interaction.user.id, guild_id)
         if already_submitted:
+            inflight.mark(daily_key(guild_id, interaction.user.id), SUBMITTED)
             await interaction.response.send_message(
                 "✅ Ya completaste tu daily de hoy. ¡Vuelve mañana!",
                 ephemeral=True
@@ -168,8 +296,31 @@ class DailyModal(discord.ui.Modal, title="Daily"):
         max_length=500
     )
     
+    @tracked
+    @tracing.traced('daily.submit')
     async def on_submit(self, interaction: discord.Interaction):
-        await interaction.response.defer()
+        started = time.perf_counter()
+        tracing.current().set(user=interaction.user.id, guild=self.guild_id)
+        
+        # Segundo envío del modal mientras el primero se guarda (o ya guardado)
+        key = daily_key(self.guild_id, interaction.user.id)
+        duplicate = inflight.claim(key, SUBMITTING)
+        if duplicate is not None:
+            inflight.absorbed('submit')
+            await interaction.response.send_message(
+                "✅ Ya completaste tu daily de hoy. ¡Vuelve mañana!" if duplicate == SUBMITTED else "⏳ Tu daily ya se está enviando.",
+                ephemeral=True
+            )
+            return
+        try:
+            await self._submit(interaction, key, started)
+        finally:
+            if inflight.state(key) == SUBMITTING:
+                inflight.release(key)
+    
+    async def _submit(self, interaction: discord.Interaction, key, started: float):
+        with tracing.span('discord.defer'):
+            await interaction.response.defer()
         
         bot = interaction.client
         guild = bot.get_guild(self.guild_id)
@@ -178,12 +329,19 @@ class DailyModal(discord.ui.Modal, title="Daily"):
             await interaction.followup.send("❌ No se pudo encontrar el servidor.", ephemeral=True)
             return
         
-        channel = guild.get_channel(config.DAILIES_CHANNEL_ID)
+        settings = guild_settings.get(self.guild_id)
+        channel = guild.get_channel(settings.dailies_channel_id)
         if not channel:
             await interaction.followup.send("❌ No se pudo encontrar el canal de dailies.", ephemeral=True)
             return
         
-        member = guild.get_member(interaction.user.id)
+        member = team_roster.get_member(guild, interaction.user.id)
+        if not member:
+            # En modo de bajo consumo de memoria el miembro puede no estar en caché
+            try:
+                member = await guild.fetch_member(interaction.user.id)
+            except discord.HTTPException:
+                member = None
         if not member:
             await interaction.followup.send("❌ No se pudo encontrar tu usuario en el servidor.", ephemeral=True)
             return
@@ -191,6 +349,7 @@ class DailyModal(discord.ui.Modal, title="Daily"):
         # Verificar primero si ya envió daily hoy
         already_submitted = await dailies_storage.has_submitted_today(interaction.user.id, self.guild_id)
         if already_submitted:
+            inflight.mark(key, SUBMITTED)
             await interaction.followup.send(
                 "✅ Ya completaste tu daily de hoy. ¡Vuelve mañana!",
                 ephemeral=True
@@ -201,25 +360,38 @@ class DailyModal(discord.ui.Modal, title="Daily"):
             'feeling': self.feeling.value,
             'yesterday': self.yesterday.value,
             'today': self.today.value,
-            'blockers': self.blockers.value or "Sin bloqueos"
+            'blockers': self.blockers.value or NO_BLOCKERS
         }
         
         # Intentar guardar la daily
         saved = await dailies_storage.save_daily(interaction.user.id, self.guild_id, daily_data)
 
         if not saved:
-            # Si no se pudo guardar, probablemente ya existe
-            await interaction.followup.send(
-                "✅ Ya completaste tu daily de hoy. ¡Vuelve mañana!",
-                ephemeral=True
-            )
+            # False es una daily que ya existía o un error al escribir: solo la primera queda como enviada
+            if await dailies_storage.has_submitted_today(interaction.user.id, self.guild_id):
+                inflight.mark(key, SUBMITTED)
+                await interaction.followup.send(
+                    "✅ Ya completaste tu daily de hoy. ¡Vuelve mañana!",
+                    ephemeral=True
+                )
+            else:
+                # Liberar la clave para que el reintento no se descarte como duplicado
+                inflight.release(key)
+                await interaction.followup.send(
+                    "❌ No se pudo guardar tu daily. Intentá enviarla de nuevo en unos minutos.",
+                    ephemeral=True
+                )
             return
-
+        inflight.mark(key, SUBMITTED)
+        status_snapshots.mark_submitted(self.guild_id, interaction.user.id)
+        scheduler = bot.get_cog('DailyScheduler')
+        if scheduler is not None:
+            await scheduler.archive_late_submission(guild, interaction.user.id)
         
         embed = discord.Embed(
             title=f"📋 Daily - {member.display_name}",
             color=discord.Color.green(),
-            timestamp=datetime.now(pytz.timezone(config.TIMEZONE))
+            timestamp=local_now(self.guild_id, interaction.user.id)
         )
         
         embed.set_author(
@@ -245,7 +417,7 @@ class DailyModal(discord.ui.Modal, title="Daily"):
             inline=False
         )
         
-        blockers_value = self.blockers.value or "Sin bloqueos"
+        blockers_value = self.blockers.value or NO_BLOCKERS
         has_blockers = bool(self.blockers.value and self.blockers.value.strip())
         
         embed.add_field(
@@ -260,40 +432,44 @@ class DailyModal(discord.ui.Modal, title="Daily"):
         embed.set_footer(text=f"Daily #{await self._get_daily_number(member.id)}")
         
         try:
-            await channel.send(embed=embed)
+            await daily_poster.post(guild, channel, embed, author=member)
             
             success_embed = discord.Embed(
                 title="✅ Daily enviada",
                 description="Tu daily ha sido enviada exitosamente al canal del equipo.",
                 color=discord.Color.green()
             )
-            await interaction.followup.send(embed=success_embed, ephemeral=True)
+            with tracing.span('discord.followup'):
+                await interaction.followup.send(embed=success_embed, ephemeral=True)
+            metrics.submit_ack_seconds.observe(time.perf_counter() - started)
             
             # Intentar deshabilitar el botón en el DM original del usuario
             try:
-                tz = pytz.timezone(config.TIMEZONE)
-                today_str = datetime.now(tz).strftime('%Y-%m-%d')
+                today_str = dailies_storage.today_key(self.guild_id, interaction.user.id)
                 data_today = await messages_storage.list_for_date(today_str)
-                user_entry = data_today.get(str(self.guild_id), {}).get(str(interaction.user.id))
+                user_entry = data_today.get(self.guild_id, {}).get(interaction.user.id)
                 if user_entry:
-                    channel_id = int(user_entry.get('channel_id'))
-                    message_id = int(user_entry.get('message_id'))
+                    channel_id = user_entry.channel_id
+                    message_id = user_entry.message_id
                     # Obtener canal y mensaje
                     dm_channel = interaction.client.get_channel(channel_id)
                     if dm_channel is None:
                         try:
-                            dm_channel = await interaction.client.fetch_channel(channel_id)
+                            with tracing.span('discord.fetch_channel'):
+                                dm_channel = await interaction.client.fetch_channel(channel_id)
                         except Exception:
                             dm_channel = None
                     if dm_channel is not None:
                         try:
-                            msg = await dm_channel.fetch_message(message_id)
+                            with tracing.span('discord.fetch_message'):
+                                msg = await dm_channel.fetch_message(message_id)
                             # Construir una view con el botón deshabilitado
                             disabled_view = DailyReminderView()
                             for item in disabled_view.children:
                                 if isinstance(item, discord.ui.Button) and item.custom_id == "daily_complete_btn":
                                     item.disabled = True
-                            await msg.edit(view=disabled_view)
+                            with tracing.span('discord.edit'):
+                                await msg.edit(view=disabled_view)
                             await messages_storage.mark_disabled(interaction.user.id, self.guild_id, today_str)
                         except Exception:
                             pass
@@ -310,261 +486,616 @@ class DailyModal(discord.ui.Modal, title="Daily"):
     async def _get_daily_number(self, user_id: int) -> int:
         return 1
 
+def join_limited(items, separator="\n", limit=1024):
+    """Une `items` sin pasarse del límite de un campo de embed"""
+    text = ""
+    for index, item in enumerate(items):
+        candidate = f"{text}{separator}{item}" if text else item
+        remaining = len(items) - index - 1
+        # Siempre tiene que entrar el "... y N más" de lo que quede afuera
+        suffix = f"{separator}... y {remaining} más" if remaining else ""
+        if len(candidate) + len(suffix) > limit:
+            return f"{text}{separator}... y {len(items) - index} más"
+        text = candidate
+    return text
+
+def summary_embed(guild, missing_members, completed=None, total=None):
+    """Embed del resumen del día; con `completed`/`total` agrega la tasa de completación"""
+    if missing_members:
+        embed = discord.Embed(
+            title="📊 Resumen del día",
+            description="Los siguientes miembros del equipo no completaron su daily hoy:",
+            color=discord.Color.red(),
+            timestamp=local_now(guild.id)
+        )
+        embed.add_field(
+            name="❌ Dailies faltantes",
+            value=join_limited([member.mention for member in missing_members], separator=" "),
+            inline=False
+        )
+        embed.set_footer(text="Recordá completar tu daily mañana por favor!")
+    else:
+        embed = discord.Embed(
+            title="📊 Resumen del día",
+            description="Todo el equipo completó su daily hoy 🎉",
+            color=discord.Color.green(),
+            timestamp=local_now(guild.id)
+        )
+        embed.set_footer(text="Daily Tracker")
+    if total:
+        embed.add_field(
+            name="📈 Tasa de completación",
+            value=f"{completed}/{total} ({completed / total * 100:.1f}%)",
+            inline=False
+        )
+    return embed
+
+DAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Margen para disparar un horario cuyo minuto ya empezó (p. ej. al reiniciar el bot a las 10:00:30)
+FIRE_GRACE = timedelta(seconds=59)
+
+def next_fire_time(tz_name, days, hour, minute, after):
+    """Próximo instante (UTC) >= `after` en que son hour:minute locales en un día activo"""
+    tz = get_zone(tz_name)
+    local = after.astimezone(tz)
+    for offset in range(8):
+        day = (local + timedelta(days=offset)).date()
+        if DAY_NAMES[day.weekday()] not in days:
+            continue
+        candidate = tz.localize(datetime(day.year, day.month, day.day, hour, minute))
+        if candidate >= after:
+            return candidate.astimezone(pytz.utc)
+    return None
+
+def last_fire_time(tz_name, days, hour, minute, before):
+    """Último instante (UTC) <= `before` en que fueron hour:minute locales en un día activo"""
+    tz = get_zone(tz_name)
+    local = before.astimezone(tz)
+    for offset in range(8):
+        day = (local - timedelta(days=offset)).date()
+        if DAY_NAMES[day.weekday()] not in days:
+            continue
+        candidate = tz.localize(datetime(day.year, day.month, day.day, hour, minute))
+        if candidate <= before:
+            return candidate.astimezone(pytz.utc)
+    return None
+
+def last_prompt(guild_id, user_id, schedule, now):
+    """(fecha local, instante UTC) del último pedido de la daily al miembro, o None si fue hace más de un día"""
+    tz_name = member_prefs.timezone_for(guild_id, user_id)
+    prompted_at = last_fire_time(tz_name, schedule['days'], schedule['hour'], schedule['minute'], now)
+    if prompted_at is None or now - prompted_at > timedelta(days=1):
+        return None
+    return prompted_at.astimezone(get_zone(tz_name)).strftime('%Y-%m-%d'), prompted_at
+
 class DailyScheduler(commands.Cog):
+    """Dispara los horarios con una única cola de prioridad (min-heap) de próximos disparos.
+
+    Cada entrada es (instante UTC, seq, (horario, tipo, guild_id, user_id), generación).
+    Los tipos por servidor (`header`, `summary`) usan la zona horaria del servidor;
+    los tipos por miembro (`prompt`, `reminder`, `cutoff`) usan la del miembro, así
+    que cada persona recibe su daily, su recordatorio y su cierre a su hora local.
+    La tarea duerme hasta el próximo disparo en lugar de recorrer a todos cada
+    minuto. La cola se reconstruye cuando cambian los horarios o la configuración;
+    cuando cambia un solo miembro (roles, zona horaria o se fue) solo se encolan de
+    nuevo sus timers y los viejos se descartan al salir, porque su generación ya
+    no es la vigente.
+    """
+
+    GUILD_KINDS = ('header', 'summary')
+    MEMBER_KINDS = ('prompt', 'reminder', 'cutoff')
+
     def __init__(self, bot):
         self.bot = bot
-        self.daily_task.start()
-        self.reminder_task.start()
-        self.end_of_day_task.start()
-        self.last_run = None
-        self.last_reminder = None
-        self.last_end_of_day = None
-    
+        self._queue = []
+        self._schedules = {}
+        # (horario, guild_id) -> miembros que reciben la daily de ese horario
+        self._members = {}
+        # (horario, guild_id) con los timers del servidor en la cola
+        self._guild_timers = set()
+        # (guild_id, user_id) -> generación vigente de los timers del miembro
+        self._generations = {}
+        # Entradas de la cola con una generación vieja, pendientes de descartar
+        self._stale = 0
+        self._seq = itertools.count()
+        self._signature = None
+        self._wake = asyncio.Event()
+        self._task = None
+        self._jobs = set()
+        # Último disparo por timer: '%Y-%m-%d %H:%M' en la hora local del timer
+        self.last_fired = {}
+        # Timers de miembros que quedaron sin enviar al apagar: (horario, tipo, guild_id, user_id)
+        self._pending = []
+
+    async def cog_load(self):
+        self._task = asyncio.create_task(self._run())
+        lifecycle.on_stop(self.stop)
+        lifecycle.on_flush(self.save_state)
+        lifecycle.on_flush(daily_poster.flush)
+
     def cog_unload(self):
-        self.daily_task.cancel()
-        self.reminder_task.cancel()
-        self.end_of_day_task.cancel()
-    
-    @tasks.loop(minutes=1)
-    async def daily_task(self):
+        if self._task:
+            self._task.cancel()
+
+    def reschedule(self):
+        """Pide reconstruir la cola (p. ej. después de editar un horario)"""
+        self._wake.set()
+
+    async def stop(self):
+        """Deja de disparar timers; los envíos en curso los espera el apagado"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"Error stopping scheduler: {e}")
+
+    async def save_state(self):
+        """Guarda los últimos disparos y los envíos pendientes para el próximo arranque"""
+        state = {
+            'last_fired': [[*timer, run_key] for timer, run_key in self.last_fired.items()],
+            'pending': [list(timer) for timer in self._pending]
+        }
+        await write_json(config.SCHEDULER_STATE_FILE, state)
+        if self._pending:
+            logger.info(f"Saved {len(self._pending)} pending scheduler message(s) for the next start")
+
+    async def _load_state(self):
+        """Restaura el estado guardado al apagar y devuelve los envíos pendientes de hoy"""
         try:
-            schedule = await schedule_manager.load_schedule()
-            
-            if not schedule['enabled']:
-                return
-            
-            tz = pytz.timezone(config.TIMEZONE)
-            now = datetime.now(tz)
-            
-            current_day = now.strftime('%A').lower()
-            if current_day not in schedule['days']:
-                return
-            
-            scheduled_time = time(schedule['hour'], schedule['minute'])
-            current_time = now.time()
-            
-            if (current_time.hour == scheduled_time.hour and 
-                current_time.minute == scheduled_time.minute):
-                
-                today_str = now.strftime('%Y-%m-%d %H:%M')
-                if self.last_run == today_str:
-                    return
-                
-                self.last_run = today_str
-                
-                logger.info(f"Running daily task at {today_str}")
-                
-                for guild in self.bot.guilds:
-                    sent_count = await send_daily_reminders(self.bot, guild)
-                    logger.info(f"Sent {sent_count} daily reminders in {guild.name}")
-                
+            state = await read_json(config.SCHEDULER_STATE_FILE) or {}
+        except FileNotFoundError:
+            return []
         except Exception as e:
-            logger.error(f"Error in daily task: {e}")
-    
-    @daily_task.before_loop
-    async def before_daily_task(self):
-        await self.bot.wait_until_ready()
-        logger.info("Daily scheduler started")
-    
-    @tasks.loop(minutes=1)
-    async def reminder_task(self):
+            logger.error(f"Error loading scheduler state: {e}")
+            return []
         try:
-            schedule = await schedule_manager.load_schedule()
-            
+            os.remove(config.SCHEDULER_STATE_FILE)
+        except OSError:
+            pass
+        for name, kind, guild_id, user_id, run_key in state.get('last_fired', []):
+            self.last_fired.setdefault((name, kind, guild_id, user_id), run_key)
+        pending = []
+        for name, kind, guild_id, user_id in state.get('pending', []):
+            run_key = self.last_fired.get((name, kind, guild_id, user_id), '')
+            # Solo se retoman los envíos del mismo día local del miembro
+            if run_key[:10] == dailies_storage.today_key(guild_id, user_id):
+                pending.append((name, kind, guild_id, user_id))
+        return pending
+
+    def status(self):
+        """Estado para los health checks: si corre y cuándo es el próximo disparo"""
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'next_fire': self._queue[0][0].isoformat() if self._queue else None,
+            'timers': len(self._queue),
+            'jobs': len(self._jobs)
+        }
+
+    def _current_signature(self):
+        # members.json no está: un cambio de zona horaria solo vuelve a encolar a ese miembro
+        return (
+            schedule_manager.signature(),
+            guild_settings.signature(),
+            tuple(sorted(g.id for g in self.bot.guilds))
+        )
+
+    def _timer_times(self, schedule, kind):
+        if kind in ('header', 'prompt'):
+            return schedule['hour'], schedule['minute']
+        if kind == 'reminder':
             if not schedule.get('reminder_enabled', False):
-                return
-            
-            tz = pytz.timezone(config.TIMEZONE)
-            now = datetime.now(tz)
-            
-            current_day = now.strftime('%A').lower()
-            if current_day not in schedule['days']:
-                return
-            
-            reminder_hour = schedule.get('reminder_hour', 14)
-            reminder_minute = schedule.get('reminder_minute', 0)
-            
-            scheduled_time = time(reminder_hour, reminder_minute)
-            current_time = now.time()
-            
-            if (current_time.hour == scheduled_time.hour and 
-                current_time.minute == scheduled_time.minute):
-                
-                today_str = now.strftime('%Y-%m-%d %H:%M')
-                if self.last_reminder == today_str:
-                    return
-                
-                self.last_reminder = today_str
-                
-                logger.info(f"Running reminder task at {today_str}")
-                
-                for guild in self.bot.guilds:
-                    sent_count = await self.send_reminders(guild)
-                    logger.info(f"Sent {sent_count} reminder messages in {guild.name}")
-                
-        except Exception as e:
-            logger.error(f"Error in reminder task: {e}")
-    
-    async def send_reminders(self, guild):
-        sent_count = 0
-        today_dailies = await dailies_storage.get_today_dailies(guild.id)
-        
-        for role_id in config.PRODUCT_TEAM_ROLES:
-            role = guild.get_role(role_id)
-            if not role:
-                continue
-            
-            for member in role.members:
-                if member.bot or str(member.id) in today_dailies:
+                return None
+            return schedule['reminder_hour'], schedule['reminder_minute']
+        return schedule['end_of_day_hour'], schedule['end_of_day_minute']
+
+    def _push(self, timer, after):
+        name, kind, guild_id, user_id = timer
+        schedule = self._schedules.get(name)
+        if not schedule or not schedule['enabled']:
+            return
+        times = self._timer_times(schedule, kind)
+        if times is None:
+            return
+        tz_name = member_prefs.timezone_for(guild_id, user_id or None)
+        fire_at = next_fire_time(tz_name, schedule['days'], times[0], times[1], after)
+        if fire_at is not None:
+            generation = self._generations.get((guild_id, user_id), 0) if user_id else 0
+            heapq.heappush(self._queue, (fire_at, next(self._seq), timer, generation))
+
+    def _is_stale(self, timer, generation) -> bool:
+        name, kind, guild_id, user_id = timer
+        if user_id:
+            return generation != self._generations.get((guild_id, user_id), 0)
+        # Los timers del servidor de un horario que se quedó sin miembros se descartan
+        return not self._members.get((name, guild_id))
+
+    def _push_guild_timers(self, name, guild_id, after):
+        if (name, guild_id) not in self._guild_timers:
+            self._guild_timers.add((name, guild_id))
+            for kind in self.GUILD_KINDS:
+                self._push((name, kind, guild_id, 0), after)
+
+    async def _rebuild(self):
+        await guild_settings.reload_if_changed()
+        await member_prefs.reload_if_changed()
+        self._schedules = await schedule_manager.load_all()
+        self._signature = self._current_signature()
+        self._queue = []
+        self._members = {}
+        self._guild_timers = set()
+        self._stale = 0
+        after = clock.now_utc() - FIRE_GRACE
+        for guild in self.bot.guilds:
+            # Cada miembro queda en un solo horario: el primero que lo incluye
+            assigned = set()
+            for name, schedule in schedule_manager.for_guild(self._schedules, guild.id):
+                if not schedule['enabled']:
                     continue
-                
-                try:
-                    embed = discord.Embed(
-                        title="🔔 Recordatorio de Daily",
-                        description="¡No te olvides de completar tu daily!",
-                        color=discord.Color.orange(),
-                        timestamp=datetime.now(pytz.timezone(config.TIMEZONE))
-                    )
-                    
-                    await member.send(embed=embed)
-                    sent_count += 1
-                    logger.info(f"Sent reminder to {member.name}")
-                    
-                    await asyncio.sleep(0.5)
-                    
-                except discord.Forbidden:
-                    logger.warning(f"Cannot send reminder to {member.name} - DMs disabled")
-                except Exception as e:
-                    logger.error(f"Error sending reminder to {member.name}: {e}")
-        
-        return sent_count
-    
-    @reminder_task.before_loop
-    async def before_reminder_task(self):
-        await self.bot.wait_until_ready()
-        logger.info("Reminder scheduler started")
+                members = [member.id for member in team_members(guild, schedule['roles'] or None)
+                           if member.id not in assigned]
+                if not members:
+                    continue
+                assigned.update(members)
+                self._members[(name, guild.id)] = set(members)
+                self._push_guild_timers(name, guild.id, after)
+                for user_id in members:
+                    for kind in self.MEMBER_KINDS:
+                        self._push((name, kind, guild.id, user_id), after)
+        logger.info(f"Scheduler queue rebuilt: {len(self._queue)} timers for {len(self._schedules)} schedule(s)")
 
-    async def send_end_of_day_summary(self, guild):
-        today_dailies = await dailies_storage.get_today_dailies(guild.id)
-        missing_users = []
+    def _schedule_for(self, guild, member):
+        """Primer horario habilitado del servidor que incluye al miembro (como `_rebuild`)"""
+        if member is None or member.bot:
+            return None
+        roles = {role.id for role in member.roles}
+        team_roles = guild_settings.get(guild.id).team_roles
+        for name, schedule in schedule_manager.for_guild(self._schedules, guild.id):
+            if schedule['enabled'] and roles & set(schedule['roles'] or team_roles):
+                return name
+        return None
 
-        for role_id in config.PRODUCT_TEAM_ROLES:
-            role = guild.get_role(role_id)
-            if not role:
-                continue
+    def _drop_member(self, guild_id, user_id):
+        """Saca al miembro de su horario; sus entradas en la cola quedan viejas"""
+        key = (guild_id, user_id)
+        self._generations[key] = self._generations.get(key, 0) + 1
+        for (name, members_guild), members in self._members.items():
+            if members_guild == guild_id and user_id in members:
+                members.discard(user_id)
+                self._stale += len(self.MEMBER_KINDS)
+        if self._stale > max(64, len(self._queue) // 2):
+            self._compact()
+
+    def _compact(self):
+        """Quita de la cola las entradas viejas cuando son muchas"""
+        self._queue = [entry for entry in self._queue if not self._is_stale(entry[2], entry[3])]
+        heapq.heapify(self._queue)
+        self._guild_timers = {(name, guild_id) for _, _, (name, _, guild_id, user_id), _ in self._queue if not user_id}
+        self._stale = 0
+
+    def refresh_member(self, guild, member):
+        """Vuelve a asignar y encolar los timers de un miembro sin reconstruir la cola.
+
+        Para cambios de roles o de zona horaria: el miembro puede cambiar de
+        horario, entrar al equipo o salir de él.
+        """
+        self._drop_member(guild.id, member.id)
+        name = self._schedule_for(guild, member)
+        if name is None:
+            return
+        self._members.setdefault((name, guild.id), set()).add(member.id)
+        after = clock.now_utc() - FIRE_GRACE
+        self._push_guild_timers(name, guild.id, after)
+        for kind in self.MEMBER_KINDS:
+            self._push((name, kind, guild.id, member.id), after)
 
-            for member in role.members:
-                if member.bot:
+    def remove_member(self, guild_id, user_id):
+        """El miembro se fue del servidor: sus timers se descartan al salir de la cola"""
+        self._drop_member(guild_id, user_id)
+
+    def refresh_user(self, user_id):
+        """La zona horaria del usuario cambió: volver a encolarlo en cada servidor donde está"""
+        for guild_id in {guild_id for (_, guild_id), members in self._members.items() if user_id in members}:
+            guild = self.bot.get_guild(guild_id)
+            member = team_roster.get_member(guild, user_id) if guild is not None else None
+            if member is None:
+                self.remove_member(guild_id, user_id)
+            else:
+                self.refresh_member(guild, member)
+
+    def _start_job(self, name, kind, users_by_guild):
+        job = asyncio.create_task(self._fire(name, kind, users_by_guild))
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
+        lifecycle.add(job, resumable=True)
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        logger.info("Daily scheduler started")
+        pending = await self._load_state()
+        await self._rebuild()
+        if pending:
+            logger.info(f"Resuming {len(pending)} message(s) pending from the last shutdown")
+            resumed = {}
+            for name, kind, guild_id, user_id in pending:
+                resumed.setdefault((name, kind), {}).setdefault(guild_id, []).append(user_id)
+            for (name, kind), users_by_guild in resumed.items():
+                self._start_job(name, kind, users_by_guild)
+        while True:
+            try:
+                now = clock.now_utc()
+                if not self._queue or self._queue[0][0] > now:
+                    delay = (self._queue[0][0] - now).total_seconds() if self._queue else 60
+                    # Despertar al menos cada minuto para detectar cambios de otros procesos
+                    await clock.wait(self._wake, min(delay, 60))
+                    if self._wake.is_set() or self._current_signature() != self._signature:
+                        self._wake.clear()
+                        await self._rebuild()
+                    else:
+                        # Zonas horarias cambiadas por otro proceso: solo esos miembros
+                        for user_id in await member_prefs.reload_if_changed():
+                            self.refresh_user(user_id)
                     continue
 
-                if str(member.id) not in today_dailies:
-                    missing_users.append(member)
+                # Agrupar los timers que vencen juntos: (horario, tipo) -> guild_id -> [user_id]
+                due = {}
+                while self._queue and self._queue[0][0] <= now:
+                    fire_at, _, timer, generation = heapq.heappop(self._queue)
+                    name, kind, guild_id, user_id = timer
+                    if self._is_stale(timer, generation):
+                        if user_id:
+                            self._stale = max(0, self._stale - 1)
+                        else:
+                            self._guild_timers.discard((name, guild_id))
+                        continue
+                    metrics.fire_lag_seconds.observe((now - fire_at).total_seconds(), kind)
+                    self._push(timer, fire_at + timedelta(minutes=1))
+                    tz = get_zone(member_prefs.timezone_for(guild_id, user_id or None))
+                    run_key = fire_at.astimezone(tz).strftime('%Y-%m-%d %H:%M')
+                    if self.last_fired.get(timer) == run_key:
+                        continue
+                    self.last_fired[timer] = run_key
+                    due.setdefault((name, kind), {}).setdefault(guild_id, []).append(user_id)
 
-        if not missing_users:
+                for (name, kind), users_by_guild in due.items():
+                    self._start_job(name, kind, users_by_guild)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in scheduler loop: {e}")
+                await clock.sleep(5)
+
+    async def _fire(self, name, kind, users_by_guild):
+        with tracing.span(f'scheduler.{kind}', schedule=name, guilds=len(users_by_guild)):
+            await self._dispatch(name, kind, users_by_guild)
+
+    async def _dispatch(self, name, kind, users_by_guild):
+        schedule = self._schedules.get(name)
+        if not schedule:
             return
+        guilds = [guild for guild in map(self.bot.get_guild, users_by_guild) if guild is not None]
+        logger.info(f"Running {kind} of schedule '{name}' for {len(guilds)} guild(s)")
 
-        channel = guild.get_channel(config.DAILIES_CHANNEL_ID)
-        if not channel:
-            logger.error(f"Dailies channel not found in guild {guild.name}")
+        if kind == 'header':
+            async def run(guild):
+                return await post_date_header(self.bot, guild)
+            await fan_out_guilds(guilds, f"date header ({name})", run)
+            return
+        if kind == 'summary':
+            async def run(guild):
+                return await self.run_end_of_day(guild, schedule, name)
+            await fan_out_guilds(guilds, f"end of day ({name})", run)
             return
 
-        embed = discord.Embed(
-            title="📊 Resumen del día",
-            description="Los siguientes miembros del equipo no completaron su daily hoy:",
-            color=discord.Color.red(),
-            timestamp=datetime.now(pytz.timezone(config.TIMEZONE))
-        )
+        if kind == 'cutoff':
+            # El archivo se escribe al cierre de cada miembro, antes de deshabilitar los botones
+            async def archive(guild):
+                return await self.archive_members(guild, schedule, users_by_guild[guild.id])
+            await fan_out_guilds(guilds, f"archive ({name})", archive)
 
-        missing_mentions = " ".join([member.mention for member in missing_users])
-        embed.add_field(
-            name="❌ Dailies faltantes",
-            value=missing_mentions,
-            inline=False
-        )
+        async def send_one(guild, user_id) -> bool:
+            if kind == 'cutoff':
+                return await self.close_member_day(guild, user_id)
+            member = team_roster.get_member(guild, user_id)
+            if member is None:
+                return False
+            send = send_daily_prompt if kind == 'prompt' else send_member_reminder
+            return await send(guild, member)
 
-        embed.set_footer(text="Recordá completar tu daily mañana por favor!")
+        async def run_members(guild):
+            count = 0
+            user_ids = users_by_guild[guild.id]
+            done = 0
+            try:
+                for user_id in user_ids:
+                    sent = await send_one(guild, user_id)
+                    done += 1
+                    if sent:
+                        count += 1
+                        await (edit_pacer if kind == 'cutoff' else dm_pacer).pace()
+            except asyncio.CancelledError:
+                # Cancelado al apagar: lo que faltaba se retoma en el próximo arranque
+                self._pending.extend((name, kind, guild.id, user_id) for user_id in user_ids[done:])
+                raise
+            if kind != 'cutoff':
+                logger.info(f"Sent {count} {kind} messages in {guild.name}")
+            return count
 
-        try:
-            await channel.send(embed=embed)
-            logger.info(f"Sent end of day summary for {len(missing_users)} missing dailies")
-        except Exception as e:
-            logger.error(f"Error sending end of day summary: {e}")
+        await fan_out_guilds(guilds, f"{kind} ({name})", run_members)
 
-    @tasks.loop(minutes=1)
-    async def end_of_day_task(self):
-        try:
-            schedule = await schedule_manager.load_schedule()
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        # Solo volver a encolar al miembro si cambiaron roles que usan los horarios o el equipo
+        changed = {role.id for role in set(before.roles) ^ set(after.roles)}
+        if not changed:
+            return
+        watched = set(guild_settings.get(after.guild.id).team_roles)
+        for schedule in self._schedules.values():
+            watched.update(schedule.get('roles', []))
+        if changed & watched:
+            self.refresh_member(after.guild, after)
 
-            if not schedule['enabled']:
-                return
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.remove_member(member.guild.id, member.id)
 
-            tz = pytz.timezone(config.TIMEZONE)
-            now = datetime.now(tz)
+    async def send_reminders(self, guild, roles=None):
+        sent_count = 0
+        for member in team_members(guild, roles):
+            if await send_member_reminder(guild, member):
+                sent_count += 1
+                await dm_pacer.pace()
+        return sent_count
 
-            current_day = now.strftime('%A').lower()
-            if current_day not in schedule['days']:
-                return
+    async def evaluate_day(self, guild, schedule, name=None):
+        """(miembro, fecha, hora del pedido, daily o None) de cada miembro al que se le pidió la daily.
 
-            if now.hour == 23 and now.minute == 59:
-                today_str = now.strftime('%Y-%m-%d %H:%M')
-                if self.last_end_of_day == today_str:
+        Cada miembro se evalúa sobre el último día en que se le pidió (a su hora local).
+        Con `name`, solo los miembros que la cola asignó a ese horario.
+        """
+        guild_dailies = await dailies_storage.get_guild_dailies(guild.id)
+        now = clock.now_utc()
+        assigned = self._members.get((name, guild.id)) if name is not None else None
+        day = []
+        for member in team_members(guild, schedule['roles'] or None):
+            if assigned is not None and member.id not in assigned:
+                continue
+            prompt = last_prompt(guild.id, member.id, schedule, now)
+            if prompt is None:
+                continue
+            date_str, prompted_at = prompt
+            day.append((member, date_str, prompted_at, guild_dailies.get(date_str, {}).get(member.id)))
+        return day
+
+    def _closes_board(self, guild, name) -> bool:
+        """True si `name` tiene el último resumen de hoy entre los horarios del servidor con miembros"""
+        today = DAY_NAMES[local_now(guild.id).weekday()]
+        last = None
+        for other, schedule in schedule_manager.for_guild(self._schedules, guild.id):
+            if not (schedule['enabled'] and today in schedule['days'] and self._members.get((other, guild.id))):
+                continue
+            key = (schedule['end_of_day_hour'], schedule['end_of_day_minute'], other)
+            if last is None or key > last:
+                last = key
+        return last is None or last[2] == name
+
+    async def evaluate_guild_day(self, guild):
+        """`evaluate_day` de todos los horarios del servidor (cada miembro está en uno solo)"""
+        day = []
+        for name, schedule in schedule_manager.for_guild(self._schedules, guild.id):
+            if schedule['enabled'] and self._members.get((name, guild.id)):
+                day.extend(await self.evaluate_day(guild, schedule, name))
+        return day
+
+    async def send_end_of_day_summary(self, guild, schedule=None, day=None, name=None):
+        schedule = schedule or await schedule_manager.load_schedule(guild_id=guild.id)
+        settings = guild_settings.get(guild.id)
+        if day is None:
+            day = await self.evaluate_day(guild, schedule)
+
+        # El tablero fijado del día se convierte en el resumen en lugar de enviar otro mensaje.
+        # Es uno por servidor: con varios horarios lo cierra el último resumen, con todos los miembros
+        board = self.bot.get_cog('StatusBoard')
+        if board is not None and board.is_open(guild.id):
+            if name is not None:
+                if not self._closes_board(guild, name):
+                    logger.info(f"Status board in {guild.name} stays open until the last schedule ends the day")
                     return
+                day = await self.evaluate_guild_day(guild)
+            if await board.close(guild, day):
+                return
 
-                self.last_end_of_day = today_str
+        missing_users = [member for member, _, _, entry in day if entry is None]
+        if not missing_users:
+            return
 
-                logger.info(f"Running end of day task at {today_str}")
+        channel = guild.get_channel(settings.dailies_channel_id)
+        if not channel:
+            logger.error(f"Dailies channel not found in guild {guild.name}")
+            return
 
-                for guild in self.bot.guilds:
-                    await self.send_end_of_day_summary(guild)
+        embed = summary_embed(guild, missing_users)
 
-                # Deshabilitar botones activos del día y limpiar referencias
-                try:
-                    tz = pytz.timezone(config.TIMEZONE)
-                    today_str = datetime.now(tz).strftime('%Y-%m-%d')
-                    all_today = await messages_storage.list_for_date(today_str)
-                    for guild_id_str, users in all_today.items():
-                        for user_id_str, entry in users.items():
-                            channel_id = int(entry.get('channel_id', 0))
-                            message_id = int(entry.get('message_id', 0))
-                            if not channel_id or not message_id:
-                                continue
-                            try:
-                                ch = self.bot.get_channel(channel_id)
-                                if ch is None:
-                                    ch = await self.bot.fetch_channel(channel_id)
-                                if ch is not None:
-                                    try:
-                                        msg = await ch.fetch_message(message_id)
-                                        view = DailyReminderView()
-                                        for item in view.children:
-                                            if isinstance(item, discord.ui.Button) and item.custom_id == "daily_complete_btn":
-                                                item.disabled = True
-                                        await msg.edit(view=view)
-                                        await messages_storage.mark_disabled(int(user_id_str), int(guild_id_str), today_str)
-                                    except Exception:
-                                        pass
-                            except Exception:
-                                pass
-                    # Opcional: limpiar por fecha para no acumular
-                    await messages_storage.delete_date(today_str)
-                except Exception as e:
-                    logger.error(f"Error disabling end-of-day buttons: {e}")
-
-                # Limpiar el archivo de dailies al final del día
-                cleared = await dailies_storage.clear_all_dailies()
-                if cleared:
-                    logger.info("Dailies file cleared successfully at end of day")
-                else:
-                    logger.error("Failed to clear dailies file at end of day")
+        try:
+            await channel.send(embed=embed)
+            logger.info(f"Sent end of day summary for {len(missing_users)} missing dailies")
+        except Exception as e:
+            logger.error(f"Error sending end of day summary: {e}")
 
+    async def close_member_day(self, guild, user_id) -> bool:
+        """Cierre del día de un miembro: deshabilita su botón y limpia la referencia.
 
+        Devuelve True si hubo que editar el mensaje en Discord.
+        """
+        today_str = dailies_storage.today_key(guild.id, user_id)
+        edited = False
+        try:
+            all_today = await messages_storage.list_for_date(today_str)
+            entry = all_today.get(guild.id, {}).get(user_id)
+            if not entry:
+                return False
+            channel_id = entry.channel_id
+            message_id = entry.message_id
+            if channel_id and message_id and not entry.disabled:
+                try:
+                    edited = True
+                    ch = self.bot.get_channel(channel_id)
+                    if ch is None:
+                        ch = await self.bot.fetch_channel(channel_id)
+                    msg = await ch.fetch_message(message_id)
+                    view = DailyReminderView()
+                    for item in view.children:
+                        if isinstance(item, discord.ui.Button) and item.custom_id == "daily_complete_btn":
+                            item.disabled = True
+                    await msg.edit(view=view)
+                except Exception:
+                    pass
+            await messages_storage.delete_date(today_str, guild_id=guild.id, user_ids={user_id})
         except Exception as e:
-            logger.error(f"Error in end of day task: {e}")
+            logger.error(f"Error closing day for user {user_id} in {guild.name}: {e}")
+        return edited
 
-    @end_of_day_task.before_loop
-    async def before_end_of_day_task(self):
-        await self.bot.wait_until_ready()
-        logger.info("End of day scheduler started")
+    async def archive_members(self, guild, schedule, user_ids):
+        """Agrega al archivo la fila del último día pedido de cada miembro (su cierre)"""
+        guild_dailies = await dailies_storage.get_guild_dailies(guild.id)
+        now = clock.now_utc()
+        rows = []
+        for user_id in user_ids:
+            prompt = last_prompt(guild.id, user_id, schedule, now)
+            if prompt is None:
+                continue
+            date_str, prompted_at = prompt
+            rows.append(archive_row(date_str, user_id, prompted_at, guild_dailies.get(date_str, {}).get(user_id)))
+        return await daily_archive.append(guild.id, rows)
+
+    async def archive_late_submission(self, guild, user_id):
+        """Si la daily llegó después del cierre del miembro, reemplaza su fila del archivo"""
+        for (name, guild_id), members in self._members.items():
+            if guild_id != guild.id or user_id not in members:
+                continue
+            schedule = self._schedules.get(name)
+            prompt = last_prompt(guild.id, user_id, schedule, clock.now_utc()) if schedule else None
+            # La fila del cierre ya está escrita: se agrega otra y vale la última
+            if prompt is not None and self.last_fired.get((name, 'cutoff', guild.id, user_id), '')[:10] == prompt[0]:
+                await self.archive_members(guild, schedule, [user_id])
+            return
+
+    async def run_end_of_day(self, guild, schedule=None, name=None):
+        schedule = schedule or await schedule_manager.load_schedule(guild_id=guild.id)
+        day = await self.evaluate_day(guild, schedule, name)
+        await self.send_end_of_day_summary(guild, schedule, day, name)
+
+        # Conservar ayer y hoy: con zonas horarias por miembro, alguien puede seguir en "ayer"
+        keep_from = (local_now(guild.id) - timedelta(days=1)).strftime('%Y-%m-%d')
+        pruned = await dailies_storage.prune_guild_dailies(guild.id, keep_from)
+        await messages_storage.prune_guild(guild.id, keep_from)
+        if pruned:
+            logger.info(f"Old dailies pruned successfully at end of day in {guild.name}")
+        else:
+            logger.error(f"Failed to prune dailies at end of day in {guild.name}")
 
 async def setup(bot):
     await bot.add_cog(DailyScheduler(bot))
\ No newline at end of file
@@ -0,0 +1,132 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import io
+import logging
+from typing import List, Tuple
+from utils.config import guild_settings
+from utils import tracing
+from utils.profiler import profiler
+from utils.ratelimit import ratelimits
+from utils.clock import clock
+
+logger = logging.getLogger('DailiesBot.Debug')
+
+# Límite de caracteres de un mensaje de Discord
+MESSAGE_LIMIT = 2000
+# Límite de caracteres del valor de un campo de embed
+FIELD_LIMIT = 1024
+
+def format_rows(rows: List[Tuple[str, int]], total: int) -> str:
+    lines = []
+    for location, count in rows:
+        line = f"{count / max(total, 1) * 100:5.1f}% {location}"
+        if sum(len(l) + 1 for l in lines) + len(line) > FIELD_LIMIT - 10:
+            break
+        lines.append(line)
+    return "```\n" + ("\n".join(lines) or "sin muestras") + "\n```"
+
+class DebugCommands(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    def is_admin(interaction: discord.Interaction) -> bool:
+        if not interaction.guild:
+            return False
+        return guild_settings.get(interaction.guild.id).is_admin(interaction.user)
+
+    @app_commands.command(name="debug_traces", description="Ver los últimos traces de operaciones (solo admins)")
+    @app_commands.describe(cantidad="Cantidad de traces a mostrar", lentas="Mostrar solo las operaciones lentas")
+    @app_commands.check(is_admin)
+    async def debug_traces(self, interaction: discord.Interaction,
+                           cantidad: app_commands.Range[int, 1, 25] = 10, lentas: bool = False):
+        traces = tracing.recent_traces(cantidad, slow_only=lentas)
+        if not traces:
+            await interaction.response.send_message("No hay traces registrados todavía.", ephemeral=True)
+            return
+
+        content = ""
+        shown = 0
+        for trace in traces:
+            text = tracing.format_trace(trace)[:MESSAGE_LIMIT - 80]
+            block = f"```\n{text}\n```"
+            if len(content) + len(block) > MESSAGE_LIMIT - 40:
+                break
+            content += block
+            shown += 1
+        if shown < len(traces):
+            content += f"_{len(traces) - shown} trace(s) más no entran en el mensaje_"
+
+        await interaction.response.send_message(content, ephemeral=True)
+
+    @app_commands.command(name="debug_profile", description="Perfilar el bot durante N segundos (solo admins)")
+    @app_commands.describe(segundos="Duración de la captura en segundos")
+    @app_commands.check(is_admin)
+    async def debug_profile(self, interaction: discord.Interaction, segundos: app_commands.Range[int, 1, 120] = 15):
+        if profiler.running:
+            await interaction.response.send_message("❌ Ya hay una captura de perfil en curso.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        logger.info(f"Profiling for {segundos}s requested by {interaction.user}")
+        profile = await profiler.capture(segundos)
+        if profile is None:
+            await interaction.followup.send("❌ Ya hay una captura de perfil en curso.", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title=f"🔬 Perfil de {segundos} s",
+            description=(
+                f"{profile.samples} muestras, loop ocupado el "
+                f"{profile.busy / max(profile.samples, 1) * 100:.1f}% del tiempo"
+            ),
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Tiempo propio", value=format_rows(profile.top_self(8), profile.busy), inline=False)
+        embed.add_field(name="Tiempo total", value=format_rows(profile.top_total(8), profile.busy), inline=False)
+        embed.add_field(name="Corrutinas en espera", value=format_rows(profile.top_awaits(8), profile.task_samples), inline=False)
+        embed.set_footer(text="El .folded se abre con speedscope.app o flamegraph.pl")
+
+        stamp = f"{profile.started_at:%Y%m%d-%H%M%S}"
+        files = [
+            discord.File(io.BytesIO(profile.report().encode('utf-8')), filename=f"profile-{stamp}.txt"),
+            discord.File(io.BytesIO(profile.folded().encode('utf-8')), filename=f"profile-{stamp}.folded")
+        ]
+        await interaction.followup.send(embed=embed, files=files, ephemeral=True)
+
+    @app_commands.command(name="debug_ratelimits", description="Ver el estado de los rate limits de Discord (solo admins)")
+    @app_commands.check(is_admin)
+    async def debug_ratelimits(self, interaction: discord.Interaction):
+        now = clock.now_utc().timestamp()
+        embed = discord.Embed(title="🚦 Rate limits de Discord", color=discord.Color.blue())
+
+        pacers = [
+            f"{pacer.name}: {pacer.delay * 1000:.0f} ms entre envíos, {pacer.backoffs} backoff(s)"
+            for pacer in ratelimits.pacers
+        ]
+        embed.add_field(name="Ritmo de envíos", value="```\n" + "\n".join(pacers) + "\n```", inline=False)
+
+        budget = ratelimits.budget
+        used = budget.used if now - budget.window_start < 1 else 0
+        global_line = f"{used}/{budget.limit} requests en el último segundo"
+        if budget.until > now:
+            global_line += f"; 429 global, activo por {budget.until - now:.1f} s más"
+        embed.add_field(name="Límite global", value=global_line, inline=False)
+
+        lines = []
+        routes = sorted(ratelimits.routes.values(), key=lambda state: (state.ratelimited, state.requests), reverse=True)
+        for state in routes[:10]:
+            buckets = ratelimits.live_buckets(state.route)
+            exhausted = sum(1 for bucket in buckets if bucket.blocked_for(now))
+            bucket = f"{len(buckets)} bucket(s), {exhausted} sin cupo" if buckets else "-"
+            limited = f" 429x{state.ratelimited}" if state.ratelimited else ""
+            line = f"{state.route} {bucket} ({state.requests} req){limited}"
+            if sum(len(l) + 1 for l in lines) + len(line) > FIELD_LIMIT - 10:
+                break
+            lines.append(line)
+        embed.add_field(name="Rutas", value="```\n" + ("\n".join(lines) or "sin requests todavía") + "\n```", inline=False)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(DebugCommands(bot))
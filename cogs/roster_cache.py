@@ -0,0 +1,197 @@
+from discord.ext import commands, tasks
+import logging
+from utils.config import config, guild_settings, schedule_manager
+from utils.roster import team_roster
+from utils.status import status_snapshots
+
+logger = logging.getLogger('DailiesBot.Roster')
+
+# Máximo de IDs por consulta de `query_members`
+QUERY_LIMIT = 100
+
+# Cada cuánto se revisan los miembros que discord.py cacheó sin avisar
+SWEEP_SECONDS = 60
+
+
+def _role_ids(member):
+    return {role.id for role in member.roles}
+
+
+class RosterCache(commands.Cog):
+    """Roster del equipo para servidores grandes (LOW_MEMORY_MODE).
+
+    Con la caché de miembros de discord.py desactivada, los miembros con algún
+    rol del equipo o de un horario se guardan en `team_roster` (`utils/roster.py`).
+    La primera carga (y cada vez que cambian esos roles) recorre la lista del
+    servidor en páginas; los refrescos periódicos solo consultan por ID a los
+    miembros ya conocidos y a los que discord.py cacheó por eventos.
+
+    Quien gana o pierde un rol del equipo entra o sale del roster en
+    `on_member_update`. Pero discord.py agrega a su caché sin despachar ningún
+    evento al miembro no cacheado del que recibe un cambio, así que cada
+    `SWEEP_SECONDS` se revisan esos miembros nuevos en la caché (sin requests)
+    y los cambios se avisan al scheduler y al estado del día.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        # Roles con los que se hizo la última carga completa de cada servidor
+        self._scanned_roles = {}
+        # guild_id -> {user_id: miembro} ya revisados de la caché de discord.py
+        self._swept = {}
+
+    async def cog_load(self):
+        if not config.LOW_MEMORY_MODE:
+            return
+        self.refresh_task.change_interval(minutes=config.ROSTER_REFRESH_MINUTES)
+        self.refresh_task.start()
+        self.sweep_task.start()
+
+    def cog_unload(self):
+        self.refresh_task.cancel()
+        self.sweep_task.cancel()
+
+    async def watched_roles(self, guild):
+        roles = set(guild_settings.get(guild.id).team_roles)
+        for _, schedule in schedule_manager.for_guild(await schedule_manager.load_all(), guild.id):
+            roles.update(schedule.get('roles', []))
+        return roles
+
+    def _is_team_member(self, member, roles):
+        return not member.bot and any(role.id in roles for role in member.roles)
+
+    def _member_changed(self, guild, member):
+        """Entró al equipo o cambió de roles: volver a encolarlo y actualizar el estado"""
+        scheduler = self.bot.get_cog('DailyScheduler')
+        if scheduler is not None:
+            scheduler.refresh_member(guild, member)
+        status_snapshots.member_changed(member)
+
+    def _member_removed(self, guild, user_id):
+        scheduler = self.bot.get_cog('DailyScheduler')
+        if scheduler is not None:
+            scheduler.remove_member(guild.id, user_id)
+        status_snapshots.member_removed(guild.id, user_id)
+
+    async def _scan(self, guild, roles):
+        """Carga completa: recorre todos los miembros del servidor en páginas"""
+        keep = {}
+        async for member in guild.fetch_members(limit=None):
+            if self._is_team_member(member, roles):
+                keep[member.id] = member
+        return keep
+
+    async def _query_known(self, guild, roles):
+        """Refresco: consulta por ID a los conocidos y a los que llegaron a la caché por eventos"""
+        candidates = team_roster.ids(guild.id) | {member.id for member in guild.members}
+        candidates.discard(self.bot.user.id)
+        user_ids = sorted(candidates)
+        keep = {}
+        for start in range(0, len(user_ids), QUERY_LIMIT):
+            chunk = user_ids[start:start + QUERY_LIMIT]
+            # En la caché de discord.py: los cambios de roles del equipo llegan como eventos
+            for member in await guild.query_members(user_ids=chunk, limit=len(chunk), cache=True):
+                if self._is_team_member(member, roles):
+                    keep[member.id] = member
+        return keep
+
+    async def hydrate(self, guild):
+        """Recarga los miembros del equipo de un guild.
+
+        Devuelve (miembros que entraron o cambiaron de roles, IDs de los que salieron).
+        """
+        roles = await self.watched_roles(guild)
+        if self._scanned_roles.get(guild.id) != roles:
+            keep = await self._scan(guild, roles)
+            self._scanned_roles[guild.id] = roles
+        else:
+            keep = await self._query_known(guild, roles)
+
+        previous = team_roster.members(guild.id)
+        team_roster.replace(guild.id, keep)
+        changed = [member for user_id, member in keep.items()
+                   if user_id not in previous or _role_ids(previous[user_id]) != _role_ids(member)]
+        removed = [user_id for user_id in previous if user_id not in keep]
+        return changed, removed
+
+    @tasks.loop(minutes=15)
+    async def refresh_task(self):
+        rebuild = False
+        for guild in self.bot.guilds:
+            try:
+                loaded = guild.id in self._scanned_roles
+                changed, removed = await self.hydrate(guild)
+                logger.info(f"Roster for {guild.name}: {len(team_roster.members(guild.id))} team members")
+            except Exception as e:
+                logger.error(f"Error refreshing roster for {guild.name}: {e}")
+                continue
+            if not loaded:
+                # Primera carga: una sola reconstrucción de la cola en lugar de un timer por miembro
+                rebuild = rebuild or bool(changed)
+                for member in changed:
+                    status_snapshots.member_changed(member)
+                continue
+            for member in changed:
+                self._member_changed(guild, member)
+            for user_id in removed:
+                self._member_removed(guild, user_id)
+        scheduler = self.bot.get_cog('DailyScheduler')
+        if rebuild and scheduler is not None:
+            scheduler.reschedule()
+
+    @refresh_task.before_loop
+    async def before_refresh_task(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(seconds=SWEEP_SECONDS)
+    async def sweep_task(self):
+        for guild in self.bot.guilds:
+            if guild.id not in self._scanned_roles:
+                continue
+            swept = self._swept.setdefault(guild.id, {})
+            new = [member for member in guild.members if swept.get(member.id) is not member]
+            if not new:
+                continue
+            roles = await self.watched_roles(guild)
+            roster = team_roster.members(guild.id)
+            for member in new:
+                swept[member.id] = member
+                if member.id == self.bot.user.id:
+                    continue
+                current = roster.get(member.id)
+                if self._is_team_member(member, roles):
+                    team_roster.add(guild.id, member)
+                    if current is None or _role_ids(current) != _role_ids(member):
+                        self._member_changed(guild, member)
+                elif team_roster.discard(guild.id, member.id):
+                    self._member_removed(guild, member.id)
+
+    @sweep_task.before_loop
+    async def before_sweep_task(self):
+        await self.bot.wait_until_ready()
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        if config.LOW_MEMORY_MODE and self._is_team_member(member, await self.watched_roles(member.guild)):
+            team_roster.add(member.guild.id, member)
+            self._member_changed(member.guild, member)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if not config.LOW_MEMORY_MODE:
+            return
+        # El scheduler y el estado ya reaccionan al evento: acá solo se actualiza el roster
+        self._swept.setdefault(after.guild.id, {})[after.id] = after
+        if self._is_team_member(after, await self.watched_roles(after.guild)):
+            team_roster.add(after.guild.id, after)
+        else:
+            team_roster.discard(after.guild.id, after.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        if config.LOW_MEMORY_MODE:
+            team_roster.discard(member.guild.id, member.id)
+            self._swept.get(member.guild.id, {}).pop(member.id, None)
+
+async def setup(bot):
+    await bot.add_cog(RosterCache(bot))
@@ -3,7 +3,8 @@ from discord.ext import commands
 from discord import app_commands
 from typing import List, Optional
 import logging
-from utils.config import config, schedule_manager, format_days_spanish
+import pytz
+from utils.config import guild_settings, schedule_manager, format_days_spanish
 
 logger = logging.getLogger('DailiesBot.Setup')
 
@@ -14,48 +15,14 @@ class SetupCommands(commands.Cog):
     def is_admin(interaction: discord.Interaction) -> bool:
         if not interaction.guild:
             return False
-        admin_role_id = config.ADMIN_ROLE_ID
-        return any(role.id == admin_role_id for role in interaction.user.roles)
+        return guild_settings.get(interaction.guild.id).is_admin(interaction.user)
     
     @app_commands.command(name="setup", description="Configurar el bot de dailies")
     @app_commands.check(is_admin)
     async def setup(self, interaction: discord.Interaction):
-        embed = discord.Embed(
-            title="⚙️ Configuración de Dailies Bot",
-            description="Usa los botones para configurar el bot",
-            color=discord.Color.blue()
-        )
-        
-        schedule = await schedule_manager.load_schedule()
-        
-        days_str = format_days_spanish(schedule['days'])
-        status = "✅ Activado" if schedule['enabled'] else "❌ Desactivado"
-        
-        embed.add_field(
-            name="Estado actual",
-            value=status,
-            inline=False
-        )
-        embed.add_field(
-            name="Días activos",
-            value=days_str,
-            inline=False
-        )
-        embed.add_field(
-            name="Hora de envío",
-            value=f"{schedule['hour']:02d}:{schedule['minute']:02d} (Buenos Aires)",
-            inline=False
-        )
-        
-        reminder_status = "✅ Activado" if schedule.get('reminder_enabled', False) else "❌ Desactivado"
-        reminder_time = f"{schedule.get('reminder_hour', 14):02d}:{schedule.get('reminder_minute', 0):02d}"
-        embed.add_field(
-            name="Recordatorio",
-            value=f"{reminder_status} - {reminder_time}",
-            inline=False
-        )
-        
-        view = SetupView()
+        schedule_name = schedule_manager.DEFAULT_NAME
+        embed = await build_setup_embed(interaction.guild, schedule_name)
+        view = await SetupView.create(interaction.guild.id, schedule_name)
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
     
     @app_commands.command(name="test_daily", description="Enviar una daily de prueba (solo admins)")
@@ -91,16 +58,94 @@ class SetupCommands(commands.Cog):
                 ephemeral=True
             )
 
+def reschedule(interaction: discord.Interaction):
+    """Avisa al scheduler que reconstruya su cola de disparos"""
+    scheduler = interaction.client.get_cog('DailyScheduler')
+    if scheduler is not None:
+        scheduler.reschedule()
+
+async def build_setup_embed(guild: discord.Guild, schedule_name: str) -> discord.Embed:
+    embed = discord.Embed(
+        title="⚙️ Configuración de Dailies Bot",
+        description=f"Usa los botones para configurar el bot\nHorario seleccionado: **{schedule_name}**",
+        color=discord.Color.blue()
+    )
+    
+    schedule = await schedule_manager.load_schedule(schedule_name, guild.id)
+    settings = guild_settings.get(guild.id)
+    
+    days_str = format_days_spanish(schedule['days'])
+    status = "✅ Activado" if schedule['enabled'] else "❌ Desactivado"
+    
+    embed.add_field(
+        name="Estado actual",
+        value=status,
+        inline=False
+    )
+    embed.add_field(
+        name="Días activos",
+        value=days_str,
+        inline=False
+    )
+    embed.add_field(
+        name="Hora de envío",
+        value=f"{schedule['hour']:02d}:{schedule['minute']:02d} ({settings.timezone})",
+        inline=False
+    )
+    
+    reminder_status = "✅ Activado" if schedule.get('reminder_enabled', False) else "❌ Desactivado"
+    reminder_time = f"{schedule.get('reminder_hour', 14):02d}:{schedule.get('reminder_minute', 0):02d}"
+    embed.add_field(
+        name="Recordatorio",
+        value=f"{reminder_status} - {reminder_time}",
+        inline=False
+    )
+    embed.add_field(
+        name="Cierre del día",
+        value=f"{schedule['end_of_day_hour']:02d}:{schedule['end_of_day_minute']:02d}",
+        inline=False
+    )
+    
+    roles_str = ", ".join([f"<@&{role_id}>" for role_id in schedule['roles']])
+    embed.add_field(
+        name="Roles del horario",
+        value=roles_str or "Todos los roles del equipo",
+        inline=False
+    )
+    return embed
+
+class ScheduleSelect(discord.ui.Select):
+    def __init__(self, schedule_names: List[str], current: str):
+        # Discord admite hasta 25 opciones por select
+        options = [
+            discord.SelectOption(label=name, value=name, default=name == current)
+            for name in schedule_names[:25]
+        ]
+        super().__init__(placeholder="Horario a editar...", options=options, row=0)
+
+    async def callback(self, interaction: discord.Interaction):
+        schedule_name = self.values[0]
+        embed = await build_setup_embed(interaction.guild, schedule_name)
+        view = await SetupView.create(interaction.guild.id, schedule_name)
+        await interaction.response.edit_message(embed=embed, view=view)
+
 class SetupView(discord.ui.View):
-    def __init__(self):
+    def __init__(self, schedule_name: str = schedule_manager.DEFAULT_NAME, schedule_names: Optional[List[str]] = None):
         super().__init__(timeout=300)
+        self.schedule_name = schedule_name
+        self.add_item(ScheduleSelect(schedule_names or [schedule_name], schedule_name))
+        self.delete_schedule.disabled = schedule_name == schedule_manager.DEFAULT_NAME
+
+    @classmethod
+    async def create(cls, guild_id: int, schedule_name: str) -> 'SetupView':
+        return cls(schedule_name, await schedule_manager.list_schedules(guild_id))
     
-    @discord.ui.button(label="Configurar días", style=discord.ButtonStyle.primary, emoji="📅")
+    @discord.ui.button(label="Configurar días", style=discord.ButtonStyle.primary, emoji="📅", row=1)
     async def configure_days(self, interaction: discord.Interaction, button: discord.ui.Button):
-        view = DaysSelectView()
+        view = DaysSelectView(self.schedule_name)
 
         # Configurar las opciones del select
-        options = await view.create_options()
+        options = await view.create_options(interaction.guild.id)
         view.select_days.options = options
 
         embed = discord.Embed(
@@ -110,37 +155,69 @@ class SetupView(discord.ui.View):
         )
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
     
-    @discord.ui.button(label="Configurar hora", style=discord.ButtonStyle.primary, emoji="⏰")
+    @discord.ui.button(label="Configurar hora", style=discord.ButtonStyle.primary, emoji="⏰", row=1)
     async def configure_time(self, interaction: discord.Interaction, button: discord.ui.Button):
-        modal = TimeConfigModal()
+        modal = TimeConfigModal(self.schedule_name)
         await interaction.response.send_modal(modal)
     
-    @discord.ui.button(label="Horario recordatorio", style=discord.ButtonStyle.primary, emoji="🔔")
+    @discord.ui.button(label="Horario recordatorio", style=discord.ButtonStyle.primary, emoji="🔔", row=1)
     async def configure_reminder(self, interaction: discord.Interaction, button: discord.ui.Button):
-        modal = ReminderConfigModal()
+        modal = ReminderConfigModal(self.schedule_name)
+        await interaction.response.send_modal(modal)
+    
+    @discord.ui.button(label="Cierre del día", style=discord.ButtonStyle.primary, emoji="🌙", row=1)
+    async def configure_end_of_day(self, interaction: discord.Interaction, button: discord.ui.Button):
+        modal = EndOfDayConfigModal(self.schedule_name)
         await interaction.response.send_modal(modal)
     
-    @discord.ui.button(label="Activar/Desactivar", style=discord.ButtonStyle.secondary, emoji="🔄")
+    @discord.ui.button(label="Activar/Desactivar", style=discord.ButtonStyle.secondary, emoji="🔄", row=1)
     async def toggle_status(self, interaction: discord.Interaction, button: discord.ui.Button):
-        schedule = await schedule_manager.load_schedule()
+        schedule = await schedule_manager.load_schedule(self.schedule_name, interaction.guild.id)
         new_status = not schedule['enabled']
-        await schedule_manager.toggle_enabled(new_status)
+        await schedule_manager.toggle_enabled(new_status, name=self.schedule_name, guild_id=interaction.guild.id)
+        reschedule(interaction)
         
         status_text = "activado" if new_status else "desactivado"
         embed = discord.Embed(
             title="✅ Estado actualizado",
-            description=f"El bot de dailies ha sido {status_text}",
+            description=f"El horario **{self.schedule_name}** ha sido {status_text}",
             color=discord.Color.green() if new_status else discord.Color.red()
         )
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
-    @discord.ui.button(label="Ver configuración", style=discord.ButtonStyle.secondary, emoji="👁️")
+    @discord.ui.button(label="Roles del horario", style=discord.ButtonStyle.primary, emoji="🏷️", row=2)
+    async def configure_roles(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = discord.Embed(
+            title="🏷️ Roles del horario",
+            description=f"Seleccioná los roles a los que aplica el horario **{self.schedule_name}**.",
+            color=discord.Color.blue()
+        )
+        await interaction.response.send_message(embed=embed, view=ScheduleRolesView(self.schedule_name), ephemeral=True)
+    
+    @discord.ui.button(label="Nuevo horario", style=discord.ButtonStyle.success, emoji="➕", row=2)
+    async def new_schedule(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(NewScheduleModal())
+    
+    @discord.ui.button(label="Eliminar horario", style=discord.ButtonStyle.danger, emoji="🗑️", row=2)
+    async def delete_schedule(self, interaction: discord.Interaction, button: discord.ui.Button):
+        deleted = await schedule_manager.delete_schedule(self.schedule_name, interaction.guild.id)
+        if not deleted:
+            await interaction.response.send_message("❌ No se pudo eliminar el horario.", ephemeral=True)
+            return
+        reschedule(interaction)
+        schedule_name = schedule_manager.DEFAULT_NAME
+        embed = await build_setup_embed(interaction.guild, schedule_name)
+        view = await SetupView.create(interaction.guild.id, schedule_name)
+        await interaction.response.edit_message(embed=embed, view=view)
+    
+    @discord.ui.button(label="Ver configuración", style=discord.ButtonStyle.secondary, emoji="👁️", row=2)
     async def view_config(self, interaction: discord.Interaction, button: discord.ui.Button):
-        schedule = await schedule_manager.load_schedule()
+        schedule = await schedule_manager.load_schedule(self.schedule_name, interaction.guild.id)
+        settings = guild_settings.get(interaction.guild.id)
         
         embed = discord.Embed(
-            title="📋 Configuración actual",
+            title=f"📋 Configuración actual - {self.schedule_name}",
             color=discord.Color.blue()
         )
         
@@ -154,21 +231,154 @@ class SetupView(discord.ui.View):
         reminder_status = "✅ Activado" if schedule.get('reminder_enabled', False) else "❌ Desactivado"
         reminder_time = f"{schedule.get('reminder_hour', 14):02d}:{schedule.get('reminder_minute', 0):02d}"
         embed.add_field(name="Recordatorio", value=f"{reminder_status} - {reminder_time}", inline=False)
+        embed.add_field(name="Cierre del día", value=f"{schedule['end_of_day_hour']:02d}:{schedule['end_of_day_minute']:02d}", inline=False)
         
-        embed.add_field(name="Canal de dailies", value=f"<#{config.DAILIES_CHANNEL_ID}>", inline=False)
+        channel_str = f"<#{settings.dailies_channel_id}>" if settings.dailies_channel_id else "No configurado"
+        embed.add_field(name="Canal de dailies", value=channel_str, inline=False)
         
-        roles_str = ", ".join([f"<@&{role_id}>" for role_id in config.PRODUCT_TEAM_ROLES])
+        roles_str = ", ".join([f"<@&{role_id}>" for role_id in settings.team_roles])
         embed.add_field(name="Roles del equipo", value=roles_str or "No configurados", inline=False)
         
+        admin_str = f"<@&{settings.admin_role_id}>" if settings.admin_role_id else "Administradores del servidor"
+        embed.add_field(name="Rol de admin", value=admin_str, inline=False)
+        embed.add_field(name="Zona horaria", value=settings.timezone, inline=False)
+        
         await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @discord.ui.button(label="Canal y roles", style=discord.ButtonStyle.primary, emoji="👥", row=3)
+    async def configure_guild(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = discord.Embed(
+            title="👥 Canal y roles",
+            description="Seleccioná el canal donde se publican las dailies, los roles del equipo y el rol de admin.",
+            color=discord.Color.blue()
+        )
+        await interaction.response.send_message(embed=embed, view=GuildSettingsView(), ephemeral=True)
+    
+    @discord.ui.button(label="Zona horaria", style=discord.ButtonStyle.secondary, emoji="🌎", row=3)
+    async def configure_timezone(self, interaction: discord.Interaction, button: discord.ui.Button):
+        modal = TimezoneConfigModal(default=guild_settings.get(interaction.guild.id).timezone)
+        await interaction.response.send_modal(modal)
 
-class DaysSelectView(discord.ui.View):
+class ScheduleRolesView(discord.ui.View):
+    def __init__(self, schedule_name: str):
+        super().__init__(timeout=300)
+        self.schedule_name = schedule_name
+
+    @discord.ui.select(
+        cls=discord.ui.RoleSelect,
+        placeholder="Roles del horario...",
+        min_values=0,
+        max_values=25
+    )
+    async def select_roles(self, interaction: discord.Interaction, select: discord.ui.RoleSelect):
+        role_ids = [role.id for role in select.values]
+        await schedule_manager.update_roles(role_ids, name=self.schedule_name, guild_id=interaction.guild.id)
+        reschedule(interaction)
+        roles_str = ", ".join(role.mention for role in select.values) or "todos los roles del equipo"
+        await interaction.response.send_message(f"✅ Roles del horario **{self.schedule_name}**: {roles_str}", ephemeral=True)
+
+class NewScheduleModal(discord.ui.Modal, title="Nuevo horario"):
+    name_input = discord.ui.TextInput(
+        label="Nombre del horario",
+        placeholder="Ej: equipo-madrid",
+        style=discord.TextStyle.short,
+        required=True,
+        max_length=50
+    )
+
+    async def on_submit(self, interaction: discord.Interaction):
+        schedule_name = self.name_input.value.strip()
+        created = await schedule_manager.create_schedule(schedule_name, interaction.guild.id)
+        if not created:
+            await interaction.response.send_message(
+                f"❌ Error: ya existe un horario llamado `{schedule_name}`.",
+                ephemeral=True
+            )
+            return
+        reschedule(interaction)
+        embed = await build_setup_embed(interaction.guild, schedule_name)
+        view = await SetupView.create(interaction.guild.id, schedule_name)
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+class GuildSettingsView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=300)
 
-    async def create_options(self):
+    @discord.ui.select(
+        cls=discord.ui.ChannelSelect,
+        channel_types=[discord.ChannelType.text],
+        placeholder="Canal de dailies...",
+        min_values=1,
+        max_values=1
+    )
+    async def select_channel(self, interaction: discord.Interaction, select: discord.ui.ChannelSelect):
+        channel = select.values[0]
+        await guild_settings.update(interaction.guild.id, dailies_channel_id=channel.id)
+        await interaction.response.send_message(f"✅ Canal de dailies: {channel.mention}", ephemeral=True)
+
+    @discord.ui.select(
+        cls=discord.ui.RoleSelect,
+        placeholder="Roles del equipo...",
+        min_values=1,
+        max_values=25
+    )
+    async def select_team_roles(self, interaction: discord.Interaction, select: discord.ui.RoleSelect):
+        role_ids = [role.id for role in select.values]
+        await guild_settings.update(interaction.guild.id, team_roles=role_ids)
+        roles_str = ", ".join(role.mention for role in select.values)
+        await interaction.response.send_message(f"✅ Roles del equipo: {roles_str}", ephemeral=True)
+
+    @discord.ui.select(
+        cls=discord.ui.RoleSelect,
+        placeholder="Rol de admin...",
+        min_values=1,
+        max_values=1
+    )
+    async def select_admin_role(self, interaction: discord.Interaction, select: discord.ui.RoleSelect):
+        role = select.values[0]
+        await guild_settings.update(interaction.guild.id, admin_role_id=role.id)
+        await interaction.response.send_message(f"✅ Rol de admin: {role.mention}", ephemeral=True)
+
+class TimezoneConfigModal(discord.ui.Modal, title="Configurar zona horaria"):
+    timezone_input = discord.ui.TextInput(
+        label="Zona horaria (IANA)",
+        placeholder="America/Buenos_Aires",
+        style=discord.TextStyle.short,
+        required=True,
+        max_length=64
+    )
+
+    def __init__(self, default: str):
+        super().__init__()
+        self.timezone_input.default = default
+
+    async def on_submit(self, interaction: discord.Interaction):
+        timezone = self.timezone_input.value.strip()
+        if timezone not in pytz.all_timezones_set:
+            await interaction.response.send_message(
+                f"❌ Error: zona horaria desconocida `{timezone}`. Ejemplo: America/Buenos_Aires",
+                ephemeral=True
+            )
+            return
+
+        await guild_settings.update(interaction.guild.id, timezone=timezone)
+        reschedule(interaction)
+
+        embed = discord.Embed(
+            title="✅ Zona horaria configurada",
+            description=f"Los horarios de este servidor ahora usan: **{timezone}**",
+            color=discord.Color.green()
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+class DaysSelectView(discord.ui.View):
+    def __init__(self, schedule_name: str = schedule_manager.DEFAULT_NAME):
+        super().__init__(timeout=300)
+        self.schedule_name = schedule_name
+
+    async def create_options(self, guild_id: int):
         """Crea las opciones del select con los días actuales marcados"""
-        schedule = await schedule_manager.load_schedule()
+        schedule = await schedule_manager.load_schedule(self.schedule_name, guild_id)
         current_days = schedule.get('days', [])
 
         options = [
@@ -225,7 +435,8 @@ class DaysSelectView(discord.ui.View):
     async def select_days(self, interaction: discord.Interaction, select: discord.ui.Select):
         selected_days = select.values
 
-        await schedule_manager.update_days(selected_days)
+        await schedule_manager.update_days(selected_days, name=self.schedule_name, guild_id=interaction.guild.id)
+        reschedule(interaction)
 
         days_str = format_days_spanish(selected_days)
 
@@ -260,6 +471,10 @@ class TimeConfigModal(discord.ui.Modal, title="Configurar hora de dailies"):
         max_length=2
     )
     
+    def __init__(self, schedule_name: str = schedule_manager.DEFAULT_NAME):
+        super().__init__()
+        self.schedule_name = schedule_name
+    
     async def on_submit(self, interaction: discord.Interaction):
         try:
             hour = int(self.hour_input.value)
@@ -270,11 +485,12 @@ class TimeConfigModal(discord.ui.Modal, title="Configurar hora de dailies"):
             if not (0 <= minute <= 59):
                 raise ValueError("Minutos deben estar entre 0 y 59")
             
-            await schedule_manager.update_time(hour, minute)
+            await schedule_manager.update_time(hour, minute, name=self.schedule_name, guild_id=interaction.guild.id)
+            reschedule(interaction)
             
             embed = discord.Embed(
                 title="✅ Hora configurada",
-                description=f"La hora de envío ahora es: {hour:02d}:{minute:02d} (Buenos Aires)",
+                description=f"La hora de envío ahora es: {hour:02d}:{minute:02d} ({guild_settings.get(interaction.guild.id).timezone})",
                 color=discord.Color.green()
             )
             
@@ -311,6 +527,10 @@ class ReminderConfigModal(discord.ui.Modal, title="Configurar recordatorio"):
         max_length=2
     )
     
+    def __init__(self, schedule_name: str = schedule_manager.DEFAULT_NAME):
+        super().__init__()
+        self.schedule_name = schedule_name
+    
     async def on_submit(self, interaction: discord.Interaction):
         try:
             hour = int(self.hour_input.value)
@@ -323,19 +543,20 @@ class ReminderConfigModal(discord.ui.Modal, title="Configurar recordatorio"):
                 raise ValueError("Minutos deben estar entre 0 y 59")
             
             # Validar que el recordatorio sea posterior a la hora de envío
-            schedule = await schedule_manager.load_schedule()
+            schedule = await schedule_manager.load_schedule(self.schedule_name, interaction.guild.id)
             daily_time_minutes = schedule['hour'] * 60 + schedule['minute']
             reminder_time_minutes = hour * 60 + minute
             
             if reminder_time_minutes <= daily_time_minutes:
                 raise ValueError(f"El recordatorio debe ser posterior a la hora de envío ({schedule['hour']:02d}:{schedule['minute']:02d})")
             
-            await schedule_manager.update_reminder(enabled, hour, minute)
+            await schedule_manager.update_reminder(enabled, hour, minute, name=self.schedule_name, guild_id=interaction.guild.id)
+            reschedule(interaction)
             
             status_text = "activado" if enabled else "desactivado"
             embed = discord.Embed(
                 title="✅ Recordatorio configurado",
-                description=f"Recordatorio {status_text} para las {hour:02d}:{minute:02d} (Buenos Aires)",
+                description=f"Recordatorio {status_text} para las {hour:02d}:{minute:02d} ({guild_settings.get(interaction.guild.id).timezone})",
                 color=discord.Color.green()
             )
             
@@ -354,5 +575,61 @@ class ReminderConfigModal(discord.ui.Modal, title="Configurar recordatorio"):
                 ephemeral=True
             )
 
+class EndOfDayConfigModal(discord.ui.Modal, title="Configurar cierre del día"):
+    hour_input = discord.ui.TextInput(
+        label="Hora de cierre (0-23)",
+        placeholder="23",
+        style=discord.TextStyle.short,
+        required=True,
+        max_length=2
+    )
+    
+    minute_input = discord.ui.TextInput(
+        label="Minutos (0-59)",
+        placeholder="59",
+        style=discord.TextStyle.short,
+        required=True,
+        max_length=2
+    )
+    
+    def __init__(self, schedule_name: str = schedule_manager.DEFAULT_NAME):
+        super().__init__()
+        self.schedule_name = schedule_name
+    
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            hour = int(self.hour_input.value)
+            minute = int(self.minute_input.value)
+            
+            if not (0 <= hour <= 23):
+                raise ValueError("Hora debe estar entre 0 y 23")
+            if not (0 <= minute <= 59):
+                raise ValueError("Minutos deben estar entre 0 y 59")
+            
+            # El cierre tiene que ser posterior al envío y al recordatorio
+            schedule = await schedule_manager.load_schedule(self.schedule_name, interaction.guild.id)
+            latest = schedule['hour'] * 60 + schedule['minute']
+            if schedule.get('reminder_enabled', False):
+                latest = max(latest, schedule['reminder_hour'] * 60 + schedule['reminder_minute'])
+            if hour * 60 + minute <= latest:
+                raise ValueError(f"El cierre debe ser posterior a las {latest // 60:02d}:{latest % 60:02d}")
+            
+            await schedule_manager.update_end_of_day(hour, minute, name=self.schedule_name, guild_id=interaction.guild.id)
+            reschedule(interaction)
+            
+            embed = discord.Embed(
+                title="✅ Cierre del día configurado",
+                description=f"El resumen y cierre del día ahora es a las {hour:02d}:{minute:02d} ({guild_settings.get(interaction.guild.id).timezone})",
+                color=discord.Color.green()
+            )
+            
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        except ValueError as e:
+            await interaction.response.send_message(
+                f"❌ Error: {str(e)}",
+                ephemeral=True
+            )
+
 async def setup(bot):
     await bot.add_cog(SetupCommands(bot))
\ No newline at end of file
@@ -0,0 +1,240 @@
+import discord
+from discord.ext import commands
+import asyncio
+import logging
+from typing import Dict, Optional
+from utils.config import config, guild_settings
+from utils.clock import clock
+from utils import metrics, tracing
+from utils.fileio import FileLock, read_json, write_json
+from utils.lifecycle import lifecycle
+from utils.ratelimit import ratelimits
+from utils.status import status_snapshots, mentions
+from cogs.daily_scheduler import date_header_text, join_limited, local_now, open_daily_thread, summary_embed
+
+logger = logging.getLogger('DailiesBot.StatusBoard')
+
+EDIT_ROUTE = 'PATCH /channels/{id}/messages/{id}'
+
+def board_embed(guild, snapshot):
+    """Estado en vivo del día: completadas, pendientes y tasa de completación"""
+    embed = discord.Embed(
+        title="📊 Estado del día",
+        color=discord.Color.blue(),
+        timestamp=local_now(guild.id)
+    )
+    if snapshot.completed:
+        embed.add_field(
+            name=f"✅ Completadas ({len(snapshot.completed)})",
+            value=join_limited(mentions(guild, snapshot.completed)),
+            inline=False
+        )
+    if snapshot.pending:
+        embed.add_field(
+            name=f"⏳ Pendientes ({len(snapshot.pending)})",
+            value=join_limited(mentions(guild, snapshot.pending)),
+            inline=False
+        )
+    embed.add_field(
+        name="📈 Tasa de completación",
+        value=f"{snapshot.completion_rate:.1f}%",
+        inline=False
+    )
+    embed.set_footer(text="Se actualiza a medida que llegan las dailies")
+    return embed
+
+class StatusBoard(commands.Cog):
+    """Tablero de estado fijado en el canal de dailies.
+
+    El encabezado con la fecha se envía junto con el estado del día y se fija en
+    el canal. Cada daily enviada o cambio del equipo marca el tablero como sucio;
+    los cambios se agrupan durante `STATUS_BOARD_DEBOUNCE` segundos y se aplican
+    en una sola edición, así una ráfaga de envíos produce pocas ediciones y nunca
+    más de una por intervalo. Al cierre del día el tablero se convierte en el
+    resumen (con varios horarios, en el del último que cierra, con los miembros
+    de todos). El mensaje de cada servidor se guarda en `data/status_board.json`
+    para seguir editándolo después de un reinicio.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.debounce = config.STATUS_BOARD_DEBOUNCE
+        # guild_id -> {'channel_id', 'message_id', 'date', 'closed'}
+        self.boards: Dict[int, Dict] = {}
+        self._dirty = set()
+        self._tasks: Dict[int, asyncio.Task] = {}
+        # guild_id -> (snapshot, versión) de la última edición
+        self._shown = {}
+        self._lock = FileLock(config.STATUS_BOARD_FILE)
+
+    async def cog_load(self):
+        try:
+            data = await read_json(config.STATUS_BOARD_FILE) or {}
+        except FileNotFoundError:
+            data = {}
+        except Exception as e:
+            logger.error(f"Error loading status boards: {e}")
+            data = {}
+        self.boards = {int(guild_id): board for guild_id, board in data.items()}
+        status_snapshots.subscribe(self.touch)
+        lifecycle.on_flush(self.flush)
+
+    def cog_unload(self):
+        status_snapshots.unsubscribe(self.touch)
+        for task in self._tasks.values():
+            task.cancel()
+
+    async def _save(self):
+        async with self._lock:
+            await write_json(config.STATUS_BOARD_FILE, {str(guild_id): board for guild_id, board in self.boards.items()})
+
+    def _today(self, guild_id) -> str:
+        return local_now(guild_id).strftime('%Y-%m-%d')
+
+    def _active(self, guild_id) -> Optional[Dict]:
+        """Tablero de hoy del servidor, si existe y no se cerró"""
+        board = self.boards.get(guild_id)
+        if board is None or board.get('closed') or board['date'] != self._today(guild_id):
+            return None
+        return board
+
+    def is_open(self, guild_id) -> bool:
+        return self._active(guild_id) is not None
+
+    def _message(self, guild, board):
+        channel = guild.get_channel(board['channel_id'])
+        if channel is None:
+            return None
+        return channel.get_partial_message(board['message_id'])
+
+    async def open(self, guild) -> bool:
+        """Envía y fija el tablero del día; True si quedó abierto (o ya lo estaba)"""
+        if self._active(guild.id) is not None:
+            return True
+        channel = guild.get_channel(guild_settings.get(guild.id).dailies_channel_id)
+        if not channel:
+            return False
+        snapshot = await status_snapshots.get(guild)
+        try:
+            with tracing.span('discord.channel_send', root=False):
+                message = await channel.send(date_header_text(guild.id), embed=board_embed(guild, snapshot))
+        except Exception as e:
+            logger.error(f"Error sending status board in {guild.name}: {e}")
+            return False
+
+        previous = self.boards.get(guild.id)
+        self.boards[guild.id] = {
+            'channel_id': channel.id,
+            'message_id': message.id,
+            'date': self._today(guild.id),
+            'closed': False
+        }
+        self._shown[guild.id] = (snapshot, snapshot.version)
+        await self._save()
+        logger.info(f"Opened status board in {guild.name}")
+
+        try:
+            await message.pin(reason="Tablero de dailies del día")
+            if previous is not None:
+                old = self._message(guild, previous)
+                if old is not None:
+                    await old.unpin(reason="Tablero de dailies de otro día")
+        except discord.HTTPException as e:
+            logger.warning(f"Cannot pin status board in {guild.name}: {e}")
+        await open_daily_thread(guild, message)
+        return True
+
+    def touch(self, guild_id: int):
+        """Marca el tablero como sucio y programa la edición agrupada"""
+        if guild_id not in self.boards:
+            return
+        self._dirty.add(guild_id)
+        if guild_id not in self._tasks:
+            task = asyncio.create_task(self._flush_later(guild_id))
+            self._tasks[guild_id] = task
+            task.add_done_callback(self._task_done)
+
+    def _task_done(self, task):
+        for guild_id, current in list(self._tasks.items()):
+            if current is task:
+                del self._tasks[guild_id]
+
+    async def _flush_later(self, guild_id: int):
+        while guild_id in self._dirty:
+            await clock.sleep(self.debounce)
+            # El límite de ediciones es por canal: si el bucket del canal del tablero está agotado, esperar
+            board = self.boards.get(guild_id)
+            blocked = ratelimits.blocked_for(EDIT_ROUTE, board['channel_id'] if board else None)
+            if blocked:
+                await clock.sleep(blocked)
+            self._dirty.discard(guild_id)
+            try:
+                await self._edit(guild_id)
+            except Exception as e:
+                logger.error(f"Error updating status board for guild {guild_id}: {e}")
+
+    async def _edit(self, guild_id: int):
+        board = self._active(guild_id)
+        guild = self.bot.get_guild(guild_id)
+        if board is None or guild is None:
+            return
+        snapshot = await status_snapshots.get(guild)
+        shown = self._shown.get(guild_id)
+        if shown is not None and shown[0] is snapshot and shown[1] == snapshot.version:
+            return
+        message = self._message(guild, board)
+        if message is None:
+            return
+        try:
+            with tracing.span('discord.edit', root=False):
+                await message.edit(embed=board_embed(guild, snapshot))
+        except discord.NotFound:
+            # Alguien borró el tablero: se deja de editar hasta el día siguiente
+            board['closed'] = True
+            await self._save()
+            return
+        self._shown[guild_id] = (snapshot, snapshot.version)
+        metrics.board_edits.inc('update')
+
+    async def close(self, guild, day) -> bool:
+        """Convierte el tablero de hoy en el resumen del día; False si no hay tablero.
+
+        `day` son las filas (miembro, fecha, hora del pedido, daily o None) de
+        `DailyScheduler.evaluate_day`: faltantes y tasa salen de la misma evaluación.
+        """
+        board = self._active(guild.id)
+        if board is None:
+            return False
+        self._dirty.discard(guild.id)
+        task = self._tasks.pop(guild.id, None)
+        if task is not None:
+            task.cancel()
+        message = self._message(guild, board)
+        if message is None:
+            return False
+        missing_members = [member for member, _, _, entry in day if entry is None]
+        try:
+            with tracing.span('discord.edit', root=False):
+                await message.edit(embed=summary_embed(guild, missing_members, len(day) - len(missing_members), len(day)))
+        except discord.HTTPException as e:
+            logger.error(f"Error closing status board in {guild.name}: {e}")
+            return False
+        board['closed'] = True
+        await self._save()
+        metrics.board_edits.inc('summary')
+        logger.info(f"Closed status board for {len(missing_members)} missing dailies in {guild.name}")
+        return True
+
+    async def flush(self):
+        """Aplica las ediciones pendientes sin esperar el debounce (apagado)"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        for guild_id in list(self._dirty):
+            self._dirty.discard(guild_id)
+            try:
+                await self._edit(guild_id)
+            except Exception as e:
+                logger.error(f"Error flushing status board for guild {guild_id}: {e}")
+
+async def setup(bot):
+    await bot.add_cog(StatusBoard(bot))
@@ -1,12 +1,24 @@
+import time
+_STARTED = time.perf_counter()  # Antes de cualquier import pesado, para medir el arranque completo
+
 import discord
 from discord.ext import commands
 import os
 from dotenv import load_dotenv
 import logging
 import asyncio
-from datetime import datetime
-import pytz
-from utils.config import config, dailies_storage, messages_storage
+import argparse
+import signal
+import hashlib
+import json
+from typing import Optional
+from utils.config import config, guild_settings, member_prefs, dailies_storage, messages_storage
+from utils.fileio import read_json, write_json
+from utils.startup import StartupProfiler
+from utils import metrics, tracing
+from utils.ratelimit import ratelimits
+from utils.health import LoopMonitor, HealthChecks, HttpServer
+from utils.lifecycle import lifecycle
 
 load_dotenv()
 
@@ -16,128 +28,278 @@ logging.basicConfig(
 )
 logger = logging.getLogger('DailiesBot')
 
-class DailiesBot(commands.Bot):
-    def __init__(self):
+class DailiesBot(commands.AutoShardedBot):
+    def __init__(self, force_sync: bool = False, startup: Optional[StartupProfiler] = None):
+        self.force_sync = force_sync
+        self.startup = startup or StartupProfiler(_STARTED)
+        self._startup_reported = False
         intents = discord.Intents.default()
         intents.message_content = True
         intents.guilds = True
         intents.members = True
         intents.dm_messages = True
+
+        member_options = {}
+        if config.LOW_MEMORY_MODE:
+            # Sin chunking ni caché completa de miembros: cogs/roster_cache.py carga a
+            # los miembros del equipo en `team_roster`. Con `joined` discord.py cachea a
+            # quienes ve por eventos, así sus cambios de roles llegan a `on_member_update`
+            intents.message_content = False
+            member_cache_flags = discord.MemberCacheFlags.none()
+            member_cache_flags.joined = True
+            member_options['member_cache_flags'] = member_cache_flags
+            member_options['chunk_guilds_at_startup'] = False
         
+        shard_options = {}
+        if config.SHARD_COUNT:
+            shard_options['shard_count'] = config.SHARD_COUNT
+        if config.SHARD_IDS:
+            shard_options['shard_ids'] = config.SHARD_IDS
+
+        self.http_servers = []
+        # Tarea de `bot.close()` lanzada por SIGTERM/SIGINT (ver `request_shutdown`)
+        self._shutdown_task: Optional[asyncio.Task] = None
+        self.loop_monitor = LoopMonitor(stall_seconds=config.LOOP_STALL_SECONDS)
+
         super().__init__(
             command_prefix='!',
             intents=intents,
-            help_command=None
+            help_command=None,
+            # Headers de rate limit y 429 por ruta desde el cliente HTTP de discord.py
+            http_trace=ratelimits.trace_config(),
+            **member_options,
+            **shard_options
         )
         
     async def setup_hook(self):
+        self.startup.phase('client init')
+        tracing.configure(config.SLOW_OP_MS, config.TRACE_BUFFER_SIZE, config.SLOW_OPS_FILE)
+        await guild_settings.load()
+        await member_prefs.load()
+        self.startup.phase('settings load')
+
         logger.info("Loading cogs...")
-        for filename in os.listdir('./cogs'):
+        for filename in sorted(os.listdir('./cogs')):
             if filename.endswith('.py') and not filename.startswith('_'):
                 try:
                     await self.load_extension(f'cogs.{filename[:-3]}')
                     logger.info(f"Loaded cog: {filename[:-3]}")
                 except Exception as e:
                     logger.error(f"Failed to load cog {filename[:-3]}: {e}")
+                self.startup.phase(f'cog {filename[:-3]}')
+
+        await self.sync_command_tree()
+        self.startup.phase('tree sync')
+
+        self.loop_monitor.start()
+        await self.start_http()
+
+    async def start_http(self):
+        """Levanta /metrics y /healthz + /readyz (en el mismo puerto si coinciden)"""
+        endpoints = {}
+        if config.METRICS_PORT:
+            from cogs.daily_scheduler import team_members
+
+            def roster_sizes():
+                return {(guild.id,): len(team_members(guild)) for guild in self.guilds}
+
+            metrics.roster_size.set_function(roster_sizes)
+            endpoints.setdefault((config.METRICS_HOST, config.METRICS_PORT), []).append(metrics.add_routes)
+        if config.HEALTH_PORT:
+            checks = HealthChecks(self, self.loop_monitor, max_lag_ms=config.HEALTH_MAX_LAG_MS)
+            endpoints.setdefault((config.HEALTH_HOST, config.HEALTH_PORT), []).append(checks.add_routes)
+
+        for (host, port), routes in endpoints.items():
+            server = HttpServer(host, port, routes)
+            try:
+                await server.start()
+                self.http_servers.append(server)
+            except OSError as e:
+                logger.error(f"Could not start HTTP endpoints on port {port}: {e}")
+
+    async def close(self):
+        # Primero terminar (o guardar) el trabajo en curso, con el gateway todavía conectado
+        await lifecycle.shutdown(config.SHUTDOWN_TIMEOUT)
+        for server in self.http_servers:
+            await server.stop()
+        self.loop_monitor.stop()
+        await super().close()
+
+    async def sync_command_tree(self):
+        """Sincroniza los slash commands solo si cambiaron desde la última sincronización"""
+        guild = discord.Object(id=config.GUILD_ID) if config.SYNC_GUILD_ONLY and config.GUILD_ID else None
+        if guild is not None:
+            # Los comandos de guild se actualizan al instante, los globales pueden tardar
+            self.tree.copy_global_to(guild=guild)
+
+        payload = {
+            'application_id': self.application_id,
+            'scope': guild.id if guild is not None else 'global',
+            'commands': sorted(
+                (command.to_dict() for command in self.tree.get_commands(guild=guild)),
+                key=lambda command: command['name']
+            )
+        }
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
 
-        await self.tree.sync()
-        logger.info("Synced command tree")
+        try:
+            state = await read_json(config.COMMAND_TREE_FILE) or {}
+        except FileNotFoundError:
+            state = {}
+
+        if not self.force_sync and state.get('hash') == digest:
+            logger.info(f"Command tree unchanged, skipped sync (saved ~{state.get('sync_seconds', 0):.2f}s)")
+            return
+
+        started = time.perf_counter()
+        await self.tree.sync(guild=guild)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Synced command tree ({payload['scope']}) in {elapsed:.2f}s")
+
+        try:
+            await write_json(config.COMMAND_TREE_FILE, {'hash': digest, 'sync_seconds': elapsed})
+        except Exception as e:
+            logger.error(f"Error saving command tree hash: {e}")
     
     async def on_ready(self):
         logger.info(f'{self.user} has connected to Discord!')
-        logger.info(f'Connected to {len(self.guilds)} guilds')
+        logger.info(f'Connected to {len(self.guilds)} guilds across {self.shard_count} shard(s)')
+        # El tiempo de conexión y handshake con Discord no se atribuye a ninguna fase
+        self.startup.skip()
 
         # Registrar el view persistente
         try:
-            from cogs.daily_scheduler import DailyReminderView
-            view = DailyReminderView()
-            self.add_view(view)
-            logger.info("Registered persistent view")
+            self.register_persistent_views()
+            self.startup.phase('view registration')
+            await self.reconcile_persistent_views()
+            self.startup.phase('reconciliation')
+        except Exception as e:
+            logger.error(f"Error registering persistent view: {e}")
 
-            # Deshabilitar botones según regla al iniciar: pasado o ya completado
-            try:
-                tz = pytz.timezone(config.TIMEZONE)
-                today_str = datetime.now(tz).strftime('%Y-%m-%d')
-                all_data = await messages_storage.list_all()
-
-                # Procesar fechas anteriores: deshabilitar todo
-                for date_str, guilds_map in all_data.items():
-                    is_past = date_str < today_str
-                    for guild_id_str, users_map in guilds_map.items():
-                        for user_id_str, entry in users_map.items():
-                            should_disable = is_past
-                            if not should_disable and date_str == today_str:
-                                try:
-                                    if config.GUILD_ID and int(guild_id_str) != int(config.GUILD_ID):
-                                        pass
-                                    else:
-                                        already = await dailies_storage.has_submitted_today(int(user_id_str), int(guild_id_str))
-                                        should_disable = already
-                                except Exception:
-                                    should_disable = False
-                            if not should_disable:
-                                continue
-
-                            channel_id = int(entry.get('channel_id', 0))
-                            message_id = int(entry.get('message_id', 0))
-                            if not channel_id or not message_id:
-                                continue
-
-                            # Intentar obtener el canal por ID; fallback: abrir DM con el usuario
-                            dm_channel = self.get_channel(channel_id)
-                            if dm_channel is None:
-                                try:
-                                    dm_channel = await self.fetch_channel(channel_id)
-                                except Exception:
-                                    dm_channel = None
-                            if dm_channel is None:
-                                try:
-                                    user = self.get_user(int(user_id_str)) or await self.fetch_user(int(user_id_str))
-                                    dm_channel = user.dm_channel or await user.create_dm()
-                                except Exception:
-                                    dm_channel = None
-                            if dm_channel is None:
-                                continue
+        activity = discord.Activity(
+            type=discord.ActivityType.watching,
+            name="las dailies del equipo"
+        )
+        await self.change_presence(activity=activity)
+
+        if not self._startup_reported:
+            self._startup_reported = True
+            self.startup.report(os.path.join(config.DATA_DIR, 'startup.prof'))
+
+    def register_persistent_views(self):
+        from cogs.daily_scheduler import DailyReminderView
+        self.add_view(DailyReminderView())
+        logger.info("Registered persistent view")
+
+    @tracing.traced('startup.reconcile')
+    async def reconcile_persistent_views(self):
+        """Deshabilita los botones de dailies vencidas o ya completadas"""
+        from cogs.daily_scheduler import DailyReminderView
 
+        # Deshabilitar botones según regla al iniciar: pasado o ya completado
+        try:
+            all_data = await messages_storage.list_all()
+
+            # Procesar fechas anteriores: deshabilitar todo
+            for date_str, guilds_map in list(all_data.items()):
+                for guild_id, users_map in list(guilds_map.items()):
+                    for user_id, entry in list(users_map.items()):
+                        # "Hoy" depende de la zona horaria de cada usuario
+                        today_str = dailies_storage.today_key(guild_id, user_id)
+                        should_disable = date_str < today_str
+                        if not should_disable and date_str == today_str:
                             try:
-                                msg = await dm_channel.fetch_message(message_id)
+                                already = await dailies_storage.has_submitted_today(user_id, guild_id)
+                                should_disable = already
                             except Exception:
-                                continue
+                                should_disable = False
+                        if not should_disable:
+                            continue
+
+                        channel_id = entry.channel_id
+                        message_id = entry.message_id
+                        if not channel_id or not message_id:
+                            continue
 
+                        # Intentar obtener el canal por ID; fallback: abrir DM con el usuario
+                        dm_channel = self.get_channel(channel_id)
+                        if dm_channel is None:
                             try:
-                                disabled_view = DailyReminderView()
-                                for item in disabled_view.children:
-                                    if isinstance(item, discord.ui.Button) and item.custom_id == "daily_complete_btn":
-                                        item.disabled = True
-                                await msg.edit(view=disabled_view)
-                                await messages_storage.mark_disabled(int(user_id_str), int(guild_id_str), date_str)
+                                with tracing.span('discord.fetch_channel'):
+                                    dm_channel = await self.fetch_channel(channel_id)
                             except Exception:
-                                pass
+                                dm_channel = None
+                        if dm_channel is None:
+                            try:
+                                with tracing.span('discord.open_dm'):
+                                    user = self.get_user(user_id) or await self.fetch_user(user_id)
+                                    dm_channel = user.dm_channel or await user.create_dm()
+                            except Exception:
+                                dm_channel = None
+                        if dm_channel is None:
+                            continue
 
-                logger.info("Persistent views checked and outdated/used buttons disabled where applicable")
-            except Exception as e:
-                logger.error(f"Error disabling persistent buttons on startup: {e}")
-        except Exception as e:
-            logger.error(f"Error registering persistent view: {e}")
+                        try:
+                            with tracing.span('discord.fetch_message'):
+                                msg = await dm_channel.fetch_message(message_id)
+                        except Exception:
+                            continue
 
-        activity = discord.Activity(
-            type=discord.ActivityType.watching,
-            name="las dailies del equipo"
-        )
-        await self.change_presence(activity=activity)
+                        try:
+                            disabled_view = DailyReminderView()
+                            for item in disabled_view.children:
+                                if isinstance(item, discord.ui.Button) and item.custom_id == "daily_complete_btn":
+                                    item.disabled = True
+                            with tracing.span('discord.edit'):
+                                await msg.edit(view=disabled_view)
+                            await messages_storage.mark_disabled(user_id, guild_id, date_str)
+                        except Exception:
+                            pass
+
+            logger.info("Persistent views checked and outdated/used buttons disabled where applicable")
+        except Exception as e:
+            logger.error(f"Error disabling persistent buttons on startup: {e}")
 
 async def main():
-    bot = DailiesBot()
+    startup = StartupProfiler(_STARTED)
+    startup.phase('imports')
+
+    parser = argparse.ArgumentParser(description="Dailies Bot")
+    parser.add_argument('--force-sync', action='store_true', help="Sincronizar los slash commands aunque no hayan cambiado")
+    parser.add_argument('--profile-startup', action='store_true', help="Perfilar el arranque con cProfile y guardar data/startup.prof")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        startup.enable_profiler()
+    bot = DailiesBot(force_sync=args.force_sync, startup=startup)
     
     token = os.getenv('DISCORD_TOKEN')
     if not token:
         logger.error("No token found! Please set DISCORD_TOKEN in .env file")
         return
     
+    # SIGTERM (docker stop) y Ctrl+C cierran el bot ordenadamente
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, lambda name=sig.name: request_shutdown(bot, name))
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows
+
     try:
         await bot.start(token)
     except Exception as e:
         logger.error(f"Error starting bot: {e}")
+    finally:
+        if not bot.is_closed():
+            await bot.close()
+
+def request_shutdown(bot, signal_name):
+    if bot.is_closed() or lifecycle.stopping or bot._shutdown_task is not None:
+        return
+    logger.info(f"Received {signal_name}, shutting down")
+    # Referencia fuerte: el event loop solo guarda una débil y la tarea podría recolectarse a mitad del cierre
+    bot._shutdown_task = asyncio.create_task(bot.close())
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
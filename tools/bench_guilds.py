@@ -0,0 +1,190 @@
+"""Benchmark del envío de dailies a muchos servidores a la vez.
+
+Corre `DailyScheduler._dispatch` (el mismo camino que un disparo real del
+horario) sobre `--guilds` servidores falsos de `tools/simulate.py` con
+`--team-sizes` miembros cada uno, variando `GUILD_CONCURRENCY`
+(`--concurrency`). Cada DM tarda `--dm-latency-ms` de verdad, como una
+llamada a Discord. Por defecto un servidor es lento (`--slow-guilds`) y otro
+falla (`--failing-guilds`), para ver que no frenan al resto. La pausa entre
+DMs corre en el reloj virtual. Mide cuánto tarda cada servidor en recibir
+todos sus DMs desde el disparo. Los resultados tienen el formato de
+`tools/benchmark.py` y se comparan con su subcomando `compare`:
+
+    python tools/bench_guilds.py --guilds 50 --concurrency 1,5,10 --output guilds.json
+    python tools/bench_guilds.py compare base.json head.json
+
+Sale con código 1 si algún servidor sano no recibió todos sus DMs.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+from datetime import datetime, timezone
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TOOLS)
+import simulate  # noqa: E402
+import benchmark  # noqa: E402
+
+CASES = ('prompt', 'reminder')
+
+
+class LatencyMember(simulate.FakeMember):
+    """Miembro cuyo DM tarda `latency` segundos reales y anota cuándo terminó"""
+
+    def __init__(self, bench, guild, name, roles, latency):
+        super().__init__(benchmark.NullSim(), guild, name, roles)
+        self.bench = bench
+        self.latency = latency
+
+    async def send(self, content=None, embed=None, view=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        message = await super().send(content, embed=embed, view=view, **kwargs)
+        self.bench.sent[self.guild.id] = self.bench.sent.get(self.guild.id, 0) + 1
+        self.bench.finished[self.guild.id] = time.perf_counter()
+        return message
+
+
+class FailingGuild(simulate.FakeGuild):
+    """Servidor cuyo roster falla a mitad del envío"""
+
+    def get_member(self, user_id):
+        raise RuntimeError("guild roster unavailable")
+
+
+class GuildBench(benchmark.Bench):
+    def __init__(self, args, data_dir):
+        super().__init__(args, data_dir)
+        self.sent = {}
+        self.finished = {}
+
+    async def build(self, guild_count, team_size):
+        """Servidores con un rol de equipo y su canal; los primeros son los lentos y los que fallan"""
+        guilds = []
+        failing = set(range(self.args.slow_guilds, self.args.slow_guilds + self.args.failing_guilds))
+        for index in range(guild_count):
+            guild = (FailingGuild if index in failing else simulate.FakeGuild)(f'guild-{index}')
+            role = simulate.FakeRole('product')
+            guild.roles[role.id] = role
+            channel = simulate.FakeChannel('dailies', guild)
+            guild.channels[channel.id] = channel
+            latency = (self.args.slow_latency_ms if index < self.args.slow_guilds else self.args.dm_latency_ms) / 1000
+            for m in range(team_size):
+                member = LatencyMember(self, guild, f'member-{index}-{m}', [role], latency)
+                role.members.append(member)
+                guild.members[member.id] = member
+            await self.cfg.guild_settings.update(guild.id, dailies_channel_id=channel.id, team_roles=[role.id],
+                                                 timezone=simulate.TIMEZONE)
+            guilds.append(guild)
+        return guilds, failing
+
+    async def case(self, name, guild_count, team_size, concurrency):
+        from cogs import daily_scheduler
+
+        await self.reset()
+        guilds, failing = await self.build(guild_count, team_size)
+        self.sent, self.finished = {}, {}
+        scheduler = daily_scheduler.DailyScheduler(simulate.FakeBot(guilds))
+        scheduler._schedules = {'default': self.cfg.schedule_manager.default_schedule()}
+        users_by_guild = {guild.id: list(guild.members) for guild in guilds}
+        # El semáforo se lee en cada fan-out: reemplazarlo equivale a cambiar GUILD_CONCURRENCY
+        daily_scheduler._guild_semaphore = asyncio.Semaphore(concurrency)
+
+        started = time.perf_counter()
+        await scheduler._dispatch('default', name, users_by_guild)
+        total = time.perf_counter() - started
+
+        # Un DM por recordatorio; la daily son dos (fecha y botón)
+        per_member = 2 if name == 'prompt' else 1
+        healthy = [guild for index, guild in enumerate(guilds) if index not in failing]
+        latencies = [(self.finished[guild.id] - started) * 1000 for guild in healthy if guild.id in self.finished]
+        result = self.result(name, team_size, concurrency, 0, latencies, total)
+        result.pop('history_days')
+        result.update(guilds=guild_count, dms=sum(self.sent.values()),
+                      incomplete_guilds=sum(1 for guild in healthy if self.sent.get(guild.id, 0) != team_size * per_member))
+        return result
+
+
+async def run_suite(args, data_dir):
+    from utils.clock import clock, VirtualClock
+    clock.use(VirtualClock(auto_advance=True))
+
+    bench = GuildBench(args, data_dir)
+    results = []
+    cases = [case for case in args.cases.split(',') if case]
+    for guild_count in benchmark.parse_ints(args.guilds):
+        for team_size in benchmark.parse_ints(args.team_sizes):
+            for concurrency in benchmark.parse_ints(args.concurrency):
+                for name in cases:
+                    result = await bench.case(name, guild_count, team_size, concurrency)
+                    results.append(result)
+                    print(f"  {benchmark.describe(result)} "
+                          f"p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  total {result['total_s']:7.2f} s"
+                          f"  incompletos {result['incomplete_guilds']}", flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del envío de dailies a muchos servidores")
+    sub = parser.add_subparsers(dest='command')
+
+    cmp_parser = sub.add_parser('compare', help="Comparar dos archivos de resultados")
+    cmp_parser.add_argument('base')
+    cmp_parser.add_argument('head')
+    cmp_parser.add_argument('--threshold', type=float, default=0.2, help="Empeoramiento tolerado (0.2 = 20%%)")
+    cmp_parser.add_argument('--min-delta-ms', type=float, default=0.5, help="Ignorar diferencias menores (ruido)")
+    cmp_parser.add_argument('--metric', default='p50_ms', choices=('p50_ms', 'p95_ms', 'mean_ms'))
+
+    parser.add_argument('--guilds', default='50', help="Cantidad de servidores, ej: 10,50,200")
+    parser.add_argument('--team-sizes', default='5', help="Miembros por servidor, ej: 5,20")
+    parser.add_argument('--concurrency', default='1,5,10', help="GUILD_CONCURRENCY, ej: 1,5,10")
+    parser.add_argument('--cases', default=','.join(CASES))
+    parser.add_argument('--dm-latency-ms', type=float, default=20, help="Demora de cada DM")
+    parser.add_argument('--slow-guilds', type=int, default=1, help="Servidores con DMs lentos")
+    parser.add_argument('--slow-latency-ms', type=float, default=200, help="Demora de cada DM en los servidores lentos")
+    parser.add_argument('--failing-guilds', type=int, default=1, help="Servidores que fallan a mitad del envío")
+    parser.add_argument('--repo', default=os.path.dirname(TOOLS), help="Checkout del bot a medir")
+    parser.add_argument('--output', default='bench_guilds.json')
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        return benchmark.compare(args)
+
+    repo = os.path.abspath(args.repo)
+    sys.path.insert(0, repo)
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ.update({
+            'DATA_DIR': data_dir, 'GUILD_ID': '0', 'DAILIES_CHANNEL_ID': '0',
+            'PRODUCT_TEAM_ROLES': '', 'ADMIN_ROLE_ID': '0', 'TIMEZONE': simulate.TIMEZONE,
+        })
+        import logging
+        logging.disable(logging.CRITICAL)
+        started = time.perf_counter()
+        results = asyncio.run(run_suite(args, data_dir))
+        elapsed = time.perf_counter() - started
+
+    output = {
+        'meta': {
+            'commit': benchmark.git_commit(repo),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': {name: getattr(args, name) for name in (
+                'guilds', 'team_sizes', 'concurrency', 'cases', 'dm_latency_ms', 'slow_guilds', 'slow_latency_ms',
+                'failing_guilds')},
+            'elapsed_s': round(elapsed, 2),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"Results saved to {args.output} ({elapsed:.1f}s)")
+    return 1 if any(result['incomplete_guilds'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
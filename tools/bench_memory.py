@@ -0,0 +1,208 @@
+"""Memoria de las dailies y referencias a DMs y de la caché de miembros.
+
+Arma `dailies.json` y `messages.json` sintéticos con `--records` entradas cada
+uno (repartidas en días, servidores y miembros) y mide con `tracemalloc` lo que
+ocupan cargados como dicts anidados con IDs string (lo que devuelve el JSON) y
+como `DailyEntry` / `MessageRef` con IDs enteros y fechas interneadas. Verifica
+además que la ida y vuelta al formato en disco no cambie nada.
+
+Después compara el RSS de la caché de miembros de un servidor sintético de
+`--guild-members` miembros (`--team-members` del equipo). Con la caché completa,
+todos los miembros llegan por chunking. Con LOW_MEMORY_MODE corre
+`RosterCache.hydrate` (`cogs/roster_cache.py`) sobre la lista paginada. Cada
+modo corre en su propio proceso.
+
+    python tools/bench_memory.py --records 100000 --guild-members 20000
+"""
+import os
+import gc
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from utils.records import load_dailies, dump_dailies, load_messages, dump_messages  # noqa: E402
+
+GUILD_ID = 900000000000000000
+TEAM_ROLE_ID = GUILD_ID + 1
+BOT_USER_ID = 1
+PAGE_SIZE = 1000
+
+
+def build(records: int, guilds: int, members: int):
+    """Textos JSON de `dailies.json` y `messages.json` con `records` entradas"""
+    dailies, messages = {}, {}
+    start = date(2026, 1, 1)
+    per_day = guilds * members
+    for n in range(records):
+        day, rest = divmod(n, per_day)
+        guild, member = divmod(rest, members)
+        date_str = (start + timedelta(days=day)).isoformat()
+        guild_id, user_id = 900000000000000000 + guild, 300000000000000000 + member
+        dailies.setdefault(date_str, {}).setdefault(str(guild_id), {})[str(user_id)] = {
+            'feeling': 'Bien',
+            'yesterday': f'Avancé con la card #{n % 500}',
+            'today': f'Reviews y la feature {n % 37}',
+            'blockers': 'Sin bloqueos',
+            'timestamp': f'{date_str}T10:{n % 60:02d}:00-03:00'
+        }
+        messages.setdefault(date_str, {}).setdefault(str(guild_id), {})[str(user_id)] = {
+            'channel_id': 1100000000000000000 + member,
+            'message_id': 1200000000000000000 + n,
+            'disabled': True
+        }
+    return json.dumps(dailies), json.dumps(messages)
+
+
+def measure(load):
+    """Bytes retenidos por el resultado de `load()`"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = load()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, retained
+
+
+def rss_bytes() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def member_payload(n: int, team_every: int) -> dict:
+    """Miembro como lo manda Discord; uno de cada `team_every` tiene el rol del equipo"""
+    return {
+        'user': {'id': str(300000000000000000 + n), 'username': f'usuario{n}', 'discriminator': '0',
+                 'global_name': f'Usuario {n}', 'avatar': None},
+        'roles': [str(TEAM_ROLE_ID)] if n % team_every == 0 else [],
+        'joined_at': '2024-01-01T00:00:00+00:00', 'nick': None, 'deaf': False, 'mute': False, 'flags': 0,
+    }
+
+
+def guild_payload(members: int) -> dict:
+    role = {'permissions': '0', 'color': 0, 'hoist': False, 'managed': False, 'mentionable': False}
+    return {
+        'id': str(GUILD_ID), 'name': 'empresa', 'owner_id': str(BOT_USER_ID), 'member_count': members,
+        'features': [], 'emojis': [], 'stickers': [],
+        'roles': [{**role, 'id': str(GUILD_ID), 'name': '@everyone', 'position': 0},
+                  {**role, 'id': str(TEAM_ROLE_ID), 'name': 'product', 'position': 1}],
+    }
+
+
+async def member_cache_child(mode: str, members: int, team: int) -> dict:
+    """Carga un servidor con la caché completa o con LOW_MEMORY_MODE y devuelve el RSS que sumó"""
+    import discord
+    from discord.state import ConnectionState
+    from utils.config import guild_settings
+    from cogs.roster_cache import RosterCache
+    from utils.roster import team_roster
+
+    team_every = max(1, members // max(1, team))
+
+    class BenchGuild(discord.Guild):
+        async def fetch_members(self, *, limit=None, after=None):
+            # La lista paginada de la API: cada página se construye y se descarta
+            for start in range(0, members, PAGE_SIZE):
+                for n in range(start, min(members, start + PAGE_SIZE)):
+                    yield discord.Member(data=member_payload(n, team_every), guild=self, state=self._state)
+
+    flags = discord.MemberCacheFlags.all()
+    if mode == 'low':
+        flags = discord.MemberCacheFlags.none()
+        flags.joined = True
+    intents = discord.Intents.default()
+    intents.members = True
+    state = ConnectionState(dispatch=lambda *args: None, handlers={}, hooks={}, http=None,
+                            intents=intents, member_cache_flags=flags)
+    await guild_settings.update(GUILD_ID, team_roles=[TEAM_ROLE_ID])
+
+    gc.collect()
+    before = rss_bytes()
+    guild = BenchGuild(data=guild_payload(members), state=state)
+    state._add_guild(guild)
+    if mode == 'full':
+        # Lo que hace el chunking al arrancar: cada página de la gateway queda en caché
+        for start in range(0, members, PAGE_SIZE):
+            for n in range(start, min(members, start + PAGE_SIZE)):
+                guild._add_member(discord.Member(data=member_payload(n, team_every), guild=guild, state=state))
+    else:
+        bot = type('Bot', (), {'user': discord.Object(BOT_USER_ID), 'guilds': [guild]})()
+        await RosterCache(bot).hydrate(guild)
+    gc.collect()
+    return {
+        'rss': rss_bytes() - before,
+        # Con LOW_MEMORY_MODE los miembros quedan en el roster del cog, no en la caché de discord.py
+        'cached': len(guild.members) if mode == 'full' else len(team_roster.members(GUILD_ID)),
+        'team': sum(1 for n in range(members) if n % team_every == 0),
+    }
+
+
+def member_cache(members: int, team: int) -> bool:
+    """Corre cada modo en un proceso propio e imprime la comparación"""
+    results = {}
+    for mode in ('full', 'low'):
+        with tempfile.TemporaryDirectory() as data_dir:
+            env = dict(os.environ, DATA_DIR=data_dir, GUILD_ID='0', DAILIES_CHANNEL_ID='0',
+                       PRODUCT_TEAM_ROLES='', ADMIN_ROLE_ID='0', LOW_MEMORY_MODE=str(mode == 'low').lower())
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--member-cache-child', mode,
+                 '--guild-members', str(members), '--team-members', str(team)],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            results[mode] = json.loads(output.splitlines()[-1])
+
+    full, low = results['full'], results['low']
+    ok = full['cached'] == members and low['cached'] == low['team']
+    print(f"Caché de miembros: servidor de {members} miembros, {low['team']} del equipo")
+    print(f"  completa          RSS +{full['rss'] / 2**20:7.2f} MiB   {full['cached']:6d} miembros en caché")
+    print(f"  LOW_MEMORY_MODE   RSS +{low['rss'] / 2**20:7.2f} MiB   {low['cached']:6d} miembros en caché   "
+          f"({low['rss'] / max(1, full['rss']):.2f}x)  {'OK' if ok else 'CACHÉ INCORRECTA'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria por entrada de dailies y referencias a DMs")
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--guilds', type=int, default=5)
+    parser.add_argument('--members', type=int, default=50)
+    parser.add_argument('--guild-members', type=int, default=20000, help="Miembros del servidor grande (0: no medir)")
+    parser.add_argument('--team-members', type=int, default=50, help="Miembros del equipo en el servidor grande")
+    parser.add_argument('--member-cache-child', choices=('full', 'low'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.member_cache_child:
+        print(json.dumps(asyncio.run(member_cache_child(args.member_cache_child, args.guild_members, args.team_members))))
+        return 0
+
+    dailies_text, messages_text = build(args.records, args.guilds, args.members)
+    cases = (
+        ('dailies', dailies_text, load_dailies, dump_dailies),
+        ('messages', messages_text, load_messages, dump_messages),
+    )
+    ok = True
+    print(f"{args.records} entradas por archivo ({args.guilds} servidores x {args.members} miembros por día)")
+    for name, text, load, dump in cases:
+        raw, raw_bytes = measure(lambda: json.loads(text))
+        del raw
+        records, record_bytes = measure(lambda: load(json.loads(text)))
+        same = dump(records) == json.loads(text)
+        ok = ok and same
+        print(f"  {name:<9} dicts {raw_bytes / args.records:7.1f} B/entrada   "
+              f"records {record_bytes / args.records:7.1f} B/entrada   "
+              f"({record_bytes / raw_bytes:.2f}x)  ida y vuelta {'OK' if same else 'DISTINTA'}")
+        del records
+    if args.guild_members:
+        ok = member_cache(args.guild_members, args.team_members) and ok
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,322 @@
+"""Benchmark de publicación de dailies: bot vs pool de webhooks.
+
+Levanta un Discord falso local (aiohttp) que responde como la API real, con
+headers de rate limit y 429 según buckets configurables, y apunta el cliente
+HTTP de discord.py a él. Publica `--posts` dailies con el `DailyPoster` real
+usando el bot y luego un `WebhookPool`, y compara el tiempo total, la latencia
+por daily y los 429 recibidos. Ningún request sale a Discord.
+
+    python tools/bench_posting.py --posts 100 --spread 10 --pool-size 3
+    python tools/bench_posting.py --batch-seconds 2 --webhook-channel-limit 0
+
+Los límites por defecto son los que aplica Discord hoy: 5 mensajes cada 5 s por
+canal para el bot, 5 cada 2 s por webhook y 30 por minuto entre todos los
+webhooks de un canal (`0` desactiva un límite).
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+import tempfile
+import itertools
+from collections import Counter
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CHANNEL_ID = 4242
+_ids = itertools.count(10**17)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))]
+
+
+def parse_limit(value):
+    """'5/2' -> (5, 2.0); '0' desactiva el límite"""
+    if value in ('0', '', 'none'):
+        return None
+    count, seconds = value.split('/')
+    return int(count), float(seconds)
+
+
+class Bucket:
+    """Ventana fija de `limit` requests cada `per` segundos, como los buckets de Discord"""
+
+    def __init__(self, limit, per):
+        self.limit = limit
+        self.per = per
+        self.windows = {}
+
+    def take(self, key):
+        now = time.monotonic()
+        start, used = self.windows.get(key, (now, 0))
+        if now - start >= self.per:
+            start, used = now, 0
+        reset_after = self.per - (now - start)
+        if used >= self.limit:
+            return False, 0, reset_after
+        self.windows[key] = (start, used + 1)
+        return True, self.limit - used - 1, reset_after
+
+
+def respond(data, status=200, headers=None):
+    """JSON con el Content-Type exacto que espera discord.py (sin `charset`).
+
+    Sin `Via` discord.py toma un 429 como un bloqueo de Cloudflare y no reintenta.
+    """
+    return web.Response(body=json.dumps(data).encode(), status=status,
+                        headers={**(headers or {}), 'Content-Type': 'application/json', 'Via': '1.1 google'})
+
+
+class StandInDiscord:
+    """Discord falso: usuarios, mensajes de canal y webhooks con rate limits"""
+
+    def __init__(self, args):
+        self.latency = args.latency_ms / 1000
+        self.buckets = {
+            name: Bucket(*limit) for name, limit in (
+                ('channel', parse_limit(args.channel_limit)),
+                ('webhook', parse_limit(args.webhook_limit)),
+                ('webhook_channel', parse_limit(args.webhook_channel_limit)),
+            ) if limit is not None
+        }
+        self.requests = Counter()
+        self.ratelimited = Counter()
+        self.webhooks = {}
+
+    def user(self, name='bench'):
+        return {'id': str(next(_ids)), 'username': name, 'discriminator': '0', 'avatar': None, 'bot': True}
+
+    def message(self, channel_id, body, author):
+        return {
+            'id': str(next(_ids)), 'channel_id': str(channel_id), 'type': 0, 'author': author,
+            'content': body.get('content') or '', 'embeds': body.get('embeds') or [],
+            'timestamp': '2026-03-02T13:00:00+00:00', 'edited_timestamp': None, 'tts': False,
+            'mention_everyone': False, 'mentions': [], 'mention_roles': [], 'attachments': [],
+            'pinned': False, 'flags': 0, 'components': []
+        }
+
+    def limited(self, route, checks):
+        """Toma un turno de cada bucket; devuelve la respuesta 429 o los headers del más restrictivo.
+
+        Como en Discord, el hash de `X-RateLimit-Bucket` es el mismo para toda la
+        ruta (el del primer bucket) y el cupo es por parámetro mayor.
+        """
+        primary = checks[0][0]
+        headers = {}
+        for name, key in checks:
+            bucket = self.buckets.get(name)
+            if bucket is None:
+                continue
+            ok, remaining, reset_after = bucket.take(key)
+            if not ok:
+                self.ratelimited[route] += 1
+                body = {'message': 'You are being rate limited.', 'retry_after': round(reset_after, 3), 'global': False}
+                return respond(body, status=429, headers={
+                    'Retry-After': str(round(reset_after, 3)), 'X-RateLimit-Limit': str(bucket.limit),
+                    'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset-After': str(round(reset_after, 3)),
+                    'X-RateLimit-Bucket': primary, 'X-RateLimit-Scope': 'user' if name == primary else 'shared'
+                }), None
+            if not headers or remaining < int(headers['X-RateLimit-Remaining']):
+                headers = {
+                    'X-RateLimit-Limit': str(bucket.limit), 'X-RateLimit-Remaining': str(remaining),
+                    'X-RateLimit-Reset-After': str(round(reset_after, 3)), 'X-RateLimit-Bucket': primary
+                }
+        return None, headers
+
+    async def me(self, request):
+        return respond(self.user())
+
+    async def channel_message(self, request):
+        route = 'POST /channels/{id}/messages'
+        self.requests[route] += 1
+        await asyncio.sleep(self.latency)
+        channel_id = request.match_info['channel_id']
+        response, headers = self.limited(route, [('channel', channel_id)])
+        if response is not None:
+            return response
+        body = await request.json()
+        return respond(self.message(channel_id, body, self.user()), headers=headers)
+
+    async def list_webhooks(self, request):
+        self.requests['GET /channels/{id}/webhooks'] += 1
+        channel_id = request.match_info['channel_id']
+        return respond([hook for hook in self.webhooks.values() if hook['channel_id'] == channel_id])
+
+    async def create_webhook(self, request):
+        self.requests['POST /channels/{id}/webhooks'] += 1
+        body = await request.json()
+        hook = {
+            'id': str(next(_ids)), 'type': 1, 'token': f'token-{len(self.webhooks)}', 'name': body['name'],
+            'avatar': None, 'channel_id': request.match_info['channel_id'], 'guild_id': '1', 'application_id': None
+        }
+        self.webhooks[hook['id']] = hook
+        return respond(hook)
+
+    async def execute_webhook(self, request):
+        route = 'POST /webhooks/{id}/{token}'
+        self.requests[route] += 1
+        await asyncio.sleep(self.latency)
+        hook = self.webhooks.get(request.match_info['webhook_id'])
+        if hook is None or hook['token'] != request.match_info['token']:
+            return respond({'message': 'Unknown Webhook', 'code': 10015}, status=404)
+        response, headers = self.limited(route, [('webhook', hook['id']), ('webhook_channel', hook['channel_id'])])
+        if response is not None:
+            return response
+        body = await request.json()
+        author = self.user(body.get('username') or hook['name'])
+        return respond(self.message(hook['channel_id'], body, author), headers=headers)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/api/v10/users/@me', self.me)
+        app.router.add_post('/api/v10/channels/{channel_id}/messages', self.channel_message)
+        app.router.add_get('/api/v10/channels/{channel_id}/webhooks', self.list_webhooks)
+        app.router.add_post('/api/v10/channels/{channel_id}/webhooks', self.create_webhook)
+        app.router.add_post('/api/v10/webhooks/{webhook_id}/{token}', self.execute_webhook)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f'http://127.0.0.1:{port}/api/v10'
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class StandInChannel:
+    """Canal de texto mínimo sobre el cliente HTTP real de discord.py"""
+
+    def __init__(self, client, channel_id):
+        self.id = channel_id
+        self.client = client
+        self.messageable = client.get_partial_messageable(channel_id)
+
+    async def send(self, **kwargs):
+        return await self.messageable.send(**kwargs)
+
+    async def webhooks(self):
+        import discord
+        data = await self.client.http.channel_webhooks(self.id)
+        return [discord.Webhook.from_state(hook, self.client._connection) for hook in data]
+
+    async def create_webhook(self, name, reason=None):
+        import discord
+        data = await self.client.http.create_webhook(self.id, name=name, reason=reason)
+        return discord.Webhook.from_state(data, self.client._connection)
+
+
+class StandInMember:
+    display_avatar = None
+
+    def __init__(self, index):
+        self.id = next(_ids)
+        self.display_name = f'member-{index}'
+
+
+async def run_backend(client, args, backend):
+    import discord
+    from utils.posting import DailyPoster, WebhookPool
+
+    pool = WebhookPool(args.pool_size) if backend == 'webhook' else None
+    poster = DailyPoster(threads=False, batch_seconds=args.batch_seconds, webhooks=pool)
+    channel = StandInChannel(client, CHANNEL_ID + (1 if backend == 'webhook' else 0))
+    members = [StandInMember(index) for index in range(args.posts)]
+    rng = random.Random(args.seed)
+    arrivals = sorted(rng.uniform(0, args.spread) for _ in members)
+    latencies = []
+    failed = 0
+
+    async def submit(member, arrival):
+        nonlocal failed
+        await asyncio.sleep(arrival)
+        embed = discord.Embed(title=f"📋 Daily - {member.display_name}", description="Reviews y la feature Y")
+        started = time.perf_counter()
+        try:
+            await poster.post(None, channel, embed, author=member)
+        except Exception:
+            failed += 1
+            return
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(submit(member, arrival) for member, arrival in zip(members, arrivals)))
+    return {
+        'backend': backend,
+        'total_seconds': round(time.perf_counter() - started, 3),
+        'failed': failed,
+        'latency_ms': {q: round(percentile(latencies, int(q[1:])) * 1000, 1) for q in ('p50', 'p95', 'p99')},
+    }
+
+
+async def bench(args):
+    import discord
+    from discord.webhook import async_ as webhook_http
+    from utils.ratelimit import ratelimits
+
+    server = StandInDiscord(args)
+    base = await server.start()
+    discord.http.Route.BASE = base
+    webhook_http.Route.BASE = base
+
+    # El tracker de rate limits ve los headers igual que en el bot (main.py)
+    client = discord.Client(intents=discord.Intents.none(), http_trace=ratelimits.trace_config())
+    await client.http.static_login('bench')
+    results = []
+    try:
+        for backend in ('bot', 'webhook'):
+            before_requests, before_limited = Counter(server.requests), Counter(server.ratelimited)
+            result = await run_backend(client, args, backend)
+            result['requests'] = dict(server.requests - before_requests)
+            result['ratelimited'] = sum((server.ratelimited - before_limited).values())
+            results.append(result)
+    finally:
+        await client.http.close()
+        await server.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara publicar dailies con el bot y con un pool de webhooks")
+    parser.add_argument('--posts', type=int, default=60)
+    parser.add_argument('--spread', type=float, default=5.0, help="Segundos en los que llegan las dailies")
+    parser.add_argument('--pool-size', type=int, default=3)
+    parser.add_argument('--batch-seconds', type=float, default=0.0)
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Latencia simulada de cada request")
+    parser.add_argument('--channel-limit', default='5/5', help="Mensajes del bot por canal: N/segundos")
+    parser.add_argument('--webhook-limit', default='5/2', help="Mensajes por webhook: N/segundos")
+    parser.add_argument('--webhook-channel-limit', default='30/60', help="Mensajes de todos los webhooks de un canal")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ.update({'DATA_DIR': data_dir, 'GUILD_ID': '0', 'DAILIES_CHANNEL_ID': '0', 'ADMIN_ROLE_ID': '0'})
+        logging.basicConfig(level=logging.CRITICAL)
+        results = asyncio.run(bench(args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{args.posts} dailies en {args.spread:.0f}s, batch {args.batch_seconds}s, pool de {args.pool_size} webhooks")
+    for result in results:
+        latency = result['latency_ms']
+        requests = sum(result['requests'].values())
+        print(f"  {result['backend']:<8} total {result['total_seconds']:7.2f}s  p50 {latency['p50']:8.1f} ms  "
+              f"p95 {latency['p95']:8.1f} ms  requests {requests:4d}  429 {result['ratelimited']:3d}  fallidas {result['failed']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Benchmark del reporte de participación (`/daily_report`).
+
+Escribe un archivo sintético de `--days` días para `--members` miembros con el
+formato de `utils/archive.py` y mide la carga en columnas, los agregados y la
+imagen. Los agregados se comparan con los mismos cálculos hechos fila por fila
+en Python. Sale con código 1 si los resultados no coinciden o si el primer
+reporte después de la precarga, o el más rápido de los siguientes, supera
+`--target` segundos.
+
+    python tools/bench_report.py --days 365 --members 200
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from collections import defaultdict
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.archive import HEADER  # noqa: E402
+from utils import report  # noqa: E402
+
+
+def write_archive(path: str, days: int, members: int, seed: int) -> date:
+    """Archivo sintético que termina ayer: días hábiles, 85% de completación"""
+    rng = random.Random(seed)
+    end = date.today() - timedelta(days=1)
+    start = end - timedelta(days=days - 1)
+    rows = [HEADER]
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for member in range(members):
+            user_id = 300000000000000000 + member
+            if rng.random() < 0.85:
+                after = rng.expovariate(1 / 1800)
+                local = 10 * 3600 + after
+                rows.append(f"{day.isoformat()},{user_id},{after:.0f},{local:.0f},{int(rng.random() < 0.2)}\n")
+            else:
+                rows.append(f"{day.isoformat()},{user_id},nan,nan,0\n")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(rows)
+    return start
+
+
+def python_rollup(path: str):
+    """Los mismos agregados recorriendo las filas en Python (referencia)"""
+    prompted, completed = defaultdict(int), defaultdict(int)
+    hours = [0] * report.HOUR_BINS
+    total = done = blockers = 0
+    with open(path, encoding='utf-8') as f:
+        next(f)
+        for line in f:
+            _, user_id, after, local, has_blockers = line.rstrip('\n').split(',')
+            total += 1
+            prompted[int(user_id)] += 1
+            if after != 'nan':
+                done += 1
+                completed[int(user_id)] += 1
+                blockers += int(has_blockers)
+                hours[min(int(float(local) / 3600 * report.HOUR_BINS / 24), report.HOUR_BINS - 1)] += 1
+    rates = {user_id: completed[user_id] / count for user_id, count in prompted.items()}
+    return total, done, blockers / done if done else 0.0, rates, hours
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del reporte de participación")
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--members', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--target', type=float, default=1.0, help="Segundos máximos para el reporte completo")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Guardar la imagen en este archivo")
+    args = parser.parse_args()
+
+    if not report.available():
+        print("numpy y matplotlib no están instalados: pip install -r requirements-report.txt")
+        return 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'archive.csv')
+        since = write_archive(path, args.days, args.members, args.seed)
+        until = date.today()
+        names = {300000000000000000 + member: f"miembro-{member}" for member in range(args.members)}
+
+        # El bot precarga matplotlib en un thread al conectarse (`report.preload`): se mide
+        # aparte, y el primer reporte que sigue es el que ve el primer `/daily_report`
+        started = time.perf_counter()
+        report.preload()
+        preload = time.perf_counter() - started
+        started = time.perf_counter()
+        report.build_report(path, since, until, names)
+        first = time.perf_counter() - started
+
+        timings = defaultdict(list)
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            participation = report.load_participation(path, since, until)
+            loaded = time.perf_counter()
+            result = report.Report(participation)
+            summarized = time.perf_counter()
+            png = report.render_png(result, names)
+            rendered = time.perf_counter()
+            timings['load'].append(loaded - started)
+            timings['rollups'].append(summarized - loaded)
+            timings['render'].append(rendered - summarized)
+            timings['total'].append(rendered - started)
+
+        started = time.perf_counter()
+        total, done, blockers_rate, rates, hours = python_rollup(path)
+        loop_seconds = time.perf_counter() - started
+
+    ok = (
+        total == result.prompts and done == result.completed
+        and abs(blockers_rate - result.blockers_rate) < 1e-9
+        and all(abs(rates[int(user_id)] - rate) < 1e-9 for user_id, rate in zip(participation.user_ids, result.member_rate))
+        and hours == result.hour_counts.tolist()
+    )
+    print(f"{len(participation)} filas ({args.members} miembros, {len(participation.dates)} días hábiles de {args.days}), PNG de {len(png) / 1024:.0f} KiB")
+    print(f"  precarga (al conectarse)      {preload * 1000:8.1f} ms")
+    print(f"  primer reporte                {first * 1000:8.1f} ms")
+    for name, values in timings.items():
+        print(f"  {name:<29} {min(values) * 1000:8.1f} ms")
+    print(f"  agregados en Python (ref.)    {loop_seconds * 1000:8.1f} ms")
+    print(f"  resultados iguales a la referencia: {'OK' if ok else 'NO'}")
+    if args.output:
+        with open(args.output, 'wb') as f:
+            f.write(png)
+    fast = first <= args.target and min(timings['total']) <= args.target
+    print(f"  objetivo {args.target:.1f} s: {'OK' if fast else 'SUPERADO'}")
+    return 0 if ok and fast else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Benchmark de arranque en frío: desde el primer import hasta dejar el bot listo.
+
+Cada corrida es un proceso nuevo (imports en frío) sobre un directorio de datos
+temporal, sin conexión a Discord: la sincronización del árbol de comandos se
+reemplaza por un no-op. En la misma ejecución mide también el commit base
+(`--base`, por defecto HEAD, extraído con `git archive`), alternando una corrida
+de cada uno para que el ruido de la máquina afecte a los dos por igual. Compara
+la mediana del árbol actual contra la del base y sale con código 1 si el
+arranque creció más que el umbral. No hay números absolutos versionados: solo
+importa la relación entre los dos en la misma máquina.
+
+    python tools/bench_startup.py                    # cambios sin commitear contra HEAD
+    python tools/bench_startup.py --base origin/main # la rama contra main
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tarfile
+import tempfile
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TOOLS)
+
+# El total lo mide el hijo: un commit base anterior a `StartupProfiler` también se puede comparar
+CHILD = r"""
+import time
+STARTED = time.perf_counter()
+import asyncio, json, logging
+import main
+
+logging.disable(logging.CRITICAL)
+
+async def run():
+    startup = main.StartupProfiler(main._STARTED) if hasattr(main, 'StartupProfiler') else None
+    if startup:
+        startup.phase('imports')
+        bot = main.DailiesBot(startup=startup)
+    else:
+        bot = main.DailiesBot()
+    bot._connection.application_id = 1
+
+    async def sync(guild=None):
+        return []
+    bot.tree.sync = sync
+
+    await bot.setup_hook()
+    if startup:
+        startup.skip()
+    if hasattr(bot, 'register_persistent_views'):
+        bot.register_persistent_views()
+        if startup:
+            startup.phase('view registration')
+    if hasattr(bot, 'reconcile_persistent_views'):
+        await bot.reconcile_persistent_views()
+        if startup:
+            startup.phase('reconciliation')
+    total = time.perf_counter() - STARTED
+    print(json.dumps({'total': total, 'phases': startup.phases if startup else []}))
+
+asyncio.run(run())
+"""
+
+
+def extract(ref: str, directory: str):
+    """Copia el árbol de `ref` en `directory` (sin tocar el working tree)"""
+    archive = subprocess.run(['git', 'archive', '--format=tar', ref], cwd=ROOT, capture_output=True, check=True)
+    with tempfile.TemporaryFile() as f:
+        f.write(archive.stdout)
+        f.seek(0)
+        with tarfile.open(fileobj=f) as tar:
+            tar.extractall(directory)
+
+
+def run_once(root: str, data_dir: str) -> dict:
+    env = dict(os.environ, DATA_DIR=data_dir, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=root, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def medians(runs) -> dict:
+    phases: dict = {}
+    for run in runs:
+        for name, seconds in run['phases']:
+            phases.setdefault(name, []).append(seconds)
+    return {name: statistics.median(values) for name, values in phases.items()}
+
+
+def growth(head: float, base: float) -> str:
+    return f"{(head / base - 1) * 100:+6.1f}%" if base > 0 else "     -"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque del bot contra un commit base")
+    parser.add_argument('--runs', type=int, default=5, help="Corridas de cada árbol")
+    parser.add_argument('--base', default='HEAD', help="Commit contra el que se compara")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Crecimiento tolerado (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    head_runs, base_runs = [], []
+    with tempfile.TemporaryDirectory() as directory:
+        base_root = os.path.join(directory, 'base')
+        extract(args.base, base_root)
+        # Los dos árboles con bytecode al día: si no, uno de los dos compila en cada corrida
+        for root in (base_root, ROOT):
+            subprocess.run([sys.executable, '-m', 'compileall', '-q', root], capture_output=True)
+        for _ in range(args.runs):
+            # Directorios de datos separados: cada árbol arranca con sus propios archivos
+            base_runs.append(run_once(base_root, os.path.join(directory, 'base-data')))
+            head_runs.append(run_once(ROOT, os.path.join(directory, 'head-data')))
+
+    base_phases, head_phases = medians(base_runs), medians(head_runs)
+    print(f"{'fase':<28} {'base':>9} {'actual':>9}")
+    for name in list(dict.fromkeys([*base_phases, *head_phases])):
+        base, head = base_phases.get(name), head_phases.get(name)
+        base_text = f"{base * 1000:7.1f}ms" if base is not None else "        -"
+        head_text = f"{head * 1000:7.1f}ms" if head is not None else "        -"
+        change = growth(head, base) if base is not None and head is not None else ""
+        print(f"  {name:<26} {base_text} {head_text}  {change}")
+
+    base_total = statistics.median(run['total'] for run in base_runs)
+    head_total = statistics.median(run['total'] for run in head_runs)
+    ratio = head_total / base_total
+    print(f"Cold start to ready (mediana de {args.runs}): base {args.base} {base_total * 1000:.1f} ms, "
+          f"actual {head_total * 1000:.1f} ms ({growth(head_total, base_total).strip()})")
+    if ratio > 1 + args.threshold:
+        print(f"FAIL: el arranque creció más del {args.threshold:.0%} respecto de {args.base}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
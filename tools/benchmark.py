@@ -0,0 +1,302 @@
+"""Benchmarks de los caminos calientes del storage y del envío de dailies.
+
+Mide `save_daily`, `has_submitted_today`, `get_today_dailies`, `save_message`,
+`mark_disabled` y `send_daily_reminders` variando el tamaño del equipo, la
+concurrencia de envíos y los días de historial guardados. Corre sobre un
+directorio temporal con los stores JSON reales y la versión falsa de Discord
+de `tools/simulate.py`. Los resultados se guardan en JSON.
+
+    python tools/benchmark.py --team-sizes 10,100,1000 --output bench.json
+    python tools/benchmark.py compare base.json head.json
+
+Para comparar dos commits, correr el benchmark sobre otro checkout con
+`--repo` (p. ej. un `git worktree add /tmp/base <commit>`) y después `compare`.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TOOLS)
+import simulate  # noqa: E402  (fakes de Discord; no importa el bot a nivel de módulo)
+
+CASES = ('save_daily', 'has_submitted_today', 'get_today_dailies', 'save_message', 'mark_disabled', 'send_daily_reminders')
+GUILD_ID = 1
+CHANNEL_ID = 2
+
+
+def parse_ints(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+class NullSim:
+    def on_dm(self, member, message):
+        pass
+
+
+class Bench:
+    def __init__(self, args, data_dir):
+        self.args = args
+        self.data_dir = data_dir
+        from utils import config as config_module
+        self.cfg = config_module
+        self.today = None
+
+    async def reset(self):
+        """Vacía el directorio de datos y recarga los stores"""
+        for name in os.listdir(self.data_dir):
+            path = os.path.join(self.data_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        await self.cfg.guild_settings.load()
+        await self.cfg.member_prefs.load()
+
+    def seed(self, team_size, history_days, today_users=0):
+        """Escribe historial de `history_days` días completos y `today_users` dailies de hoy"""
+        self.today = self.cfg.dailies_storage.today_key(GUILD_ID)
+        day = datetime.strptime(self.today, '%Y-%m-%d')
+        entry = {'feeling': 'Bien', 'yesterday': 'Card #123', 'today': 'Feature Y', 'blockers': 'Sin bloqueos',
+                 'timestamp': '2026-01-01T10:00:00-03:00'}
+        dailies, messages = {}, {}
+        for offset in range(1, history_days + 1):
+            date_str = (day - timedelta(days=offset)).strftime('%Y-%m-%d')
+            dailies[date_str] = {str(GUILD_ID): {str(user): dict(entry) for user in range(team_size)}}
+            messages[date_str] = {str(GUILD_ID): {
+                str(user): {'channel_id': 10 + user, 'message_id': 100000 + user, 'disabled': True}
+                for user in range(team_size)
+            }}
+        if today_users:
+            dailies[self.today] = {str(GUILD_ID): {str(user): dict(entry) for user in range(today_users)}}
+            messages[self.today] = {str(GUILD_ID): {
+                str(user): {'channel_id': 10 + user, 'message_id': 100000 + user, 'disabled': False}
+                for user in range(today_users)
+            }}
+        for path, data in ((self.cfg.config.DAILIES_FILE, dailies), (self.cfg.config.MESSAGES_FILE, messages)):
+            with open(path, 'w') as f:
+                json.dump(data, f)
+
+    async def timed(self, operations, concurrency):
+        """Corre las operaciones con la concurrencia dada y devuelve las latencias (ms)"""
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def run(operation):
+            async with semaphore:
+                started = time.perf_counter()
+                await operation()
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run(operation) for operation in operations))
+        return latencies, time.perf_counter() - started
+
+    async def case(self, name, team_size, concurrency, history_days):
+        storage = self.cfg.dailies_storage
+        messages = self.cfg.messages_storage
+        ops = min(team_size, self.args.max_ops)
+        # Los primeros `team_size - ops` miembros ya están guardados: se miden los últimos
+        await self.reset()
+        await self.cfg.guild_settings.update(GUILD_ID, dailies_channel_id=CHANNEL_ID)
+
+        if name == 'save_daily':
+            self.seed(team_size, history_days, team_size - ops)
+            data = {'feeling': 'Bien', 'yesterday': 'Card #123', 'today': 'Feature Y', 'blockers': ''}
+            operations = [lambda user=user: storage.save_daily(user, GUILD_ID, data)
+                          for user in range(team_size - ops, team_size)]
+        elif name == 'has_submitted_today':
+            self.seed(team_size, history_days, team_size)
+            operations = [lambda user=user: storage.has_submitted_today(user, GUILD_ID) for user in range(ops)]
+        elif name == 'get_today_dailies':
+            self.seed(team_size, history_days, team_size)
+            operations = [lambda: storage.get_today_dailies(GUILD_ID) for _ in range(min(ops, 20))]
+        elif name == 'save_message':
+            self.seed(team_size, history_days, team_size - ops)
+            operations = [lambda user=user: messages.save_message(user, GUILD_ID, 10 + user, 100000 + user, self.today)
+                          for user in range(team_size - ops, team_size)]
+        elif name == 'mark_disabled':
+            self.seed(team_size, history_days, team_size)
+            operations = [lambda user=user: messages.mark_disabled(user, GUILD_ID, self.today) for user in range(ops)]
+        else:
+            return await self.reminders_case(team_size, concurrency, history_days, ops)
+
+        latencies, total = await self.timed(operations, concurrency)
+        return self.result(name, team_size, concurrency, history_days, latencies, total)
+
+    async def reminders_case(self, team_size, concurrency, history_days, ops):
+        from cogs.daily_scheduler import send_daily_reminders
+
+        self.seed(team_size, history_days, team_size - ops)
+        guild = simulate.FakeGuild('bench')
+        guild.id = GUILD_ID
+        role = simulate.FakeRole('product')
+        guild.roles[role.id] = role
+        channel = simulate.FakeChannel('dailies', guild)
+        channel.id = CHANNEL_ID
+        guild.channels[channel.id] = channel
+        for user in range(team_size):
+            member = simulate.FakeMember(NullSim(), guild, f'member-{user}', [role])
+            member.id = user
+            role.members.append(member)
+            guild.members[user] = member
+        await self.cfg.guild_settings.update(GUILD_ID, team_roles=[role.id])
+
+        started = time.perf_counter()
+        # Sin el cog `StatusBoard`: mide el encabezado simple y los DMs
+        sent = await send_daily_reminders(simulate.FakeBot([guild]), guild)
+        total = time.perf_counter() - started
+        # Una "operación" por DM enviado; la pausa entre DMs corre en el reloj virtual
+        per_op = total * 1000 / max(1, sent)
+        return self.result('send_daily_reminders', team_size, concurrency, history_days, [per_op] * max(1, sent), total)
+
+    def result(self, name, team_size, concurrency, history_days, latencies, total):
+        return {
+            'case': name,
+            'team_size': team_size,
+            'concurrency': concurrency,
+            'history_days': history_days,
+            'ops': len(latencies),
+            'total_s': round(total, 4),
+            'ops_per_s': round(len(latencies) / total, 1) if total else None,
+            'p50_ms': round(simulate.percentile(latencies, 50), 3),
+            'p95_ms': round(simulate.percentile(latencies, 95), 3),
+            'mean_ms': round(statistics.mean(latencies), 3) if latencies else 0.0,
+        }
+
+
+def git_commit(repo):
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run_suite(args, data_dir):
+    try:
+        from utils.clock import clock, VirtualClock
+        # Sin esperas reales entre DMs: el reloj virtual avanza solo
+        clock.use(VirtualClock(auto_advance=True))
+    except ImportError:
+        pass
+
+    bench = Bench(args, data_dir)
+    results = []
+    cases = [case for case in args.cases.split(',') if case]
+    for team_size in parse_ints(args.team_sizes):
+        for history_days in parse_ints(args.history_days):
+            for concurrency in parse_ints(args.concurrency):
+                for name in cases:
+                    result = await bench.case(name, team_size, concurrency, history_days)
+                    results.append(result)
+                    print(f"  {describe(result)} "
+                          f"p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  {result['ops_per_s']} ops/s",
+                          flush=True)
+    return results
+
+
+# Parámetros que identifican un resultado (los de `tools/bench_guilds.py` incluyen `guilds`)
+PARAMS = ('case', 'guilds', 'team_size', 'concurrency', 'history_days')
+LABELS = (('guilds', 'guilds', 4), ('team_size', 'team', 6), ('concurrency', 'conc', 4), ('history_days', 'hist', 4))
+
+
+def describe(result):
+    labels = ' '.join(f"{label}={result[field]:<{width}}" for field, label, width in LABELS if field in result)
+    return f"{result['case']:<22} {labels}"
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    def key(result):
+        return tuple(result.get(field) for field in PARAMS)
+
+    base_results = {key(result): result for result in base['results']}
+    regressions = 0
+    print(f"{base['meta'].get('commit')} -> {head['meta'].get('commit')} (umbral {args.threshold:.0%} en {args.metric})")
+    for result in head['results']:
+        previous = base_results.get(key(result))
+        if previous is None or not previous[args.metric]:
+            continue
+        ratio = result[args.metric] / previous[args.metric]
+        delta = result[args.metric] - previous[args.metric]
+        flag = ''
+        if ratio > 1 + args.threshold and delta > args.min_delta_ms:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif ratio < 1 - args.threshold and -delta > args.min_delta_ms:
+            flag = '  faster'
+        print(f"  {describe(result)} "
+              f"{previous[args.metric]:9.3f} -> {result[args.metric]:9.3f} ms ({ratio:5.2f}x){flag}")
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del storage y del envío de dailies")
+    sub = parser.add_subparsers(dest='command')
+
+    cmp_parser = sub.add_parser('compare', help="Comparar dos archivos de resultados")
+    cmp_parser.add_argument('base')
+    cmp_parser.add_argument('head')
+    cmp_parser.add_argument('--threshold', type=float, default=0.2, help="Empeoramiento tolerado (0.2 = 20%%)")
+    cmp_parser.add_argument('--min-delta-ms', type=float, default=0.5, help="Ignorar diferencias menores (ruido)")
+    cmp_parser.add_argument('--metric', default='p50_ms', choices=('p50_ms', 'p95_ms', 'mean_ms'))
+
+    parser.add_argument('--team-sizes', default='10,100,1000', help="Ej: 10,100,1000,10000")
+    parser.add_argument('--concurrency', default='1,10', help="Envíos concurrentes, ej: 1,10,50")
+    parser.add_argument('--history-days', default='0,7', help="Días de historial guardados, ej: 0,30,365")
+    parser.add_argument('--cases', default=','.join(CASES))
+    parser.add_argument('--max-ops', type=int, default=50, help="Operaciones medidas por caso")
+    parser.add_argument('--repo', default=os.path.dirname(TOOLS), help="Checkout del bot a medir")
+    parser.add_argument('--output', default='bench_results.json')
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        return compare(args)
+
+    repo = os.path.abspath(args.repo)
+    sys.path.insert(0, repo)
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ.update({
+            'DATA_DIR': data_dir, 'GUILD_ID': '0', 'DAILIES_CHANNEL_ID': '0',
+            'PRODUCT_TEAM_ROLES': '', 'ADMIN_ROLE_ID': '0', 'TIMEZONE': simulate.TIMEZONE,
+        })
+        import logging
+        logging.disable(logging.CRITICAL)
+        started = time.perf_counter()
+        results = asyncio.run(run_suite(args, data_dir))
+        elapsed = time.perf_counter() - started
+
+    output = {
+        'meta': {
+            'commit': git_commit(repo),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': {name: getattr(args, name) for name in ('team_sizes', 'concurrency', 'history_days', 'cases', 'max_ops')},
+            'elapsed_s': round(elapsed, 2),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"Results saved to {args.output} ({elapsed:.1f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
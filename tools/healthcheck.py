@@ -0,0 +1,40 @@
+"""Health check para Docker: consulta /healthz (o /readyz) del bot en este contenedor.
+
+Sale con código 0 si el endpoint responde 200 y 1 si responde otra cosa, no
+responde en `--timeout` segundos (event loop bloqueado) o el puerto está cerrado.
+
+    python tools/healthcheck.py             # /healthz en HEALTH_PORT
+    python tools/healthcheck.py --ready     # /readyz
+"""
+import os
+import sys
+import argparse
+import urllib.error
+import urllib.request
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ready', action='store_true', help='consultar /readyz en lugar de /healthz')
+    parser.add_argument('--port', type=int, default=int(os.getenv('HEALTH_PORT', 0) or 0))
+    parser.add_argument('--timeout', type=float, default=5.0)
+    args = parser.parse_args()
+
+    if not args.port:
+        print("HEALTH_PORT is not set", file=sys.stderr)
+        return 1
+
+    url = f"http://127.0.0.1:{args.port}/{'readyz' if args.ready else 'healthz'}"
+    try:
+        with urllib.request.urlopen(url, timeout=args.timeout) as response:
+            print(response.read().decode('utf-8'))
+            return 0
+    except urllib.error.HTTPError as e:
+        print(e.read().decode('utf-8'), file=sys.stderr)
+    except (urllib.error.URLError, OSError) as e:
+        print(f"Health check failed: {e}", file=sys.stderr)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
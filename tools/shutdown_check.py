@@ -0,0 +1,197 @@
+"""Verificación del apagado ordenado: SIGTERM en medio de un envío masivo.
+
+Arma un servidor falso (los mismos fakes de `simulate.py`, con latencia de red
+simulada), dispara el envío de dailies del `DailyScheduler` real y, mientras
+los miembros van completando la `DailyModal`, el proceso se manda SIGTERM a sí
+mismo. Después del apagado verifica que:
+
+- ninguna daily aceptada (`on_submit` ya invocado) se haya perdido ni cortado,
+- `dailies.json` siga siendo JSON válido,
+- cada miembro haya recibido su DM o haya quedado pendiente, sin repetir,
+- al volver a arrancar el scheduler retome los pendientes y cada miembro
+  termine con exactamente un DM con botón.
+
+    python tools/shutdown_check.py --members 60 --sigterm-after 0.5 --timeout 1
+"""
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import argparse
+import logging
+import tempfile
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from simulate import TIMEZONE, FakeBot, FakeChannel, FakeGuild, FakeInteraction, FakeMember, FakeRole
+
+
+class SlowChannel(FakeChannel):
+    """Canal con latencia de red simulada"""
+
+    latency = 0.02
+
+    async def send(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return await super().send(*args, **kwargs)
+
+
+class Check:
+    def __init__(self, args):
+        self.args = args
+        self.prompts = Counter()       # user_id -> DMs con botón recibidos
+        self.accepted = set()          # miembros cuyo envío de la daily se aceptó
+        self.submit_tasks = set()
+
+    def on_dm(self, member, message):
+        if message.view is None:
+            return
+        self.prompts[member.id] += 1
+        # Un tercio de los miembros completa la daily apenas le llega el DM
+        if member.submits and self.prompts[member.id] == 1:
+            task = asyncio.ensure_future(self.submit(member, message))
+            self.submit_tasks.add(task)
+
+    async def submit(self, member, message):
+        from cogs.daily_scheduler import DailyModal
+
+        interaction = FakeInteraction(self.bot, member, message)
+        modal = DailyModal(guild_id=member.guild.id)
+        modal.feeling._value = 'Bien'
+        modal.yesterday._value = 'Avancé con la card #123'
+        modal.today._value = 'Reviews'
+        modal.blockers._value = ''
+        self.accepted.add(member.id)
+        await modal.on_submit(interaction)
+
+    def build_guild(self):
+        guild = FakeGuild('guild-shutdown')
+        role = FakeRole('product')
+        guild.roles[role.id] = role
+        channel = SlowChannel('dailies', guild)
+        # Publicar la daily en el canal es lo lento: al llegar el SIGTERM hay envíos a medias
+        channel.latency = 0.3
+        guild.channels[channel.id] = channel
+        for m in range(self.args.members):
+            member = FakeMember(self, guild, f'member-{m}', [role])
+            member.dm_channel = SlowChannel(f'dm-{member.name}')
+            member.submits = m % 3 == 0
+            role.members.append(member)
+            guild.members[member.id] = member
+        guild.dailies_channel = channel
+        return guild
+
+    async def fire_burst(self, scheduler, guild):
+        from utils.clock import clock
+        from utils.config import schedule_manager
+
+        name = schedule_manager.DEFAULT_NAME
+        run_key = clock.now(TIMEZONE).strftime('%Y-%m-%d %H:%M')
+        user_ids = list(guild.members)
+        for user_id in user_ids:
+            scheduler.last_fired[(name, 'prompt', guild.id, user_id)] = run_key
+        scheduler._start_job(name, 'prompt', {guild.id: user_ids})
+
+    async def run(self):
+        from utils.config import config, guild_settings, schedule_manager
+        from utils.lifecycle import lifecycle
+        from cogs.daily_scheduler import DailyScheduler
+
+        guild = self.build_guild()
+        self.bot = FakeBot([guild])
+        role_id = next(iter(guild.roles))
+        await guild_settings.update(guild.id, dailies_channel_id=guild.dailies_channel.id,
+                                    team_roles=[role_id], timezone=TIMEZONE)
+
+        # Primer arranque: envío masivo y SIGTERM a mitad de camino
+        scheduler = DailyScheduler(self.bot)
+        await scheduler.cog_load()
+        await asyncio.sleep(0.1)
+        await self.fire_burst(scheduler, guild)
+
+        loop = asyncio.get_running_loop()
+        stopped = loop.create_future()
+
+        def on_sigterm():
+            task = asyncio.ensure_future(lifecycle.shutdown(self.args.timeout))
+            task.add_done_callback(lambda _: stopped.set_result(None))
+
+        loop.add_signal_handler(signal.SIGTERM, on_sigterm)
+        await asyncio.sleep(self.args.sigterm_after)
+        os.kill(os.getpid(), signal.SIGTERM)
+        started = time.perf_counter()
+        await stopped
+        shutdown_seconds = time.perf_counter() - started
+        loop.remove_signal_handler(signal.SIGTERM)
+
+        with open(config.DAILIES_FILE, encoding='utf-8') as f:
+            dailies = json.load(f)
+        saved = {int(user_id) for day in dailies.values() for users in day.values() for user_id in users}
+        with open(config.SCHEDULER_STATE_FILE, encoding='utf-8') as f:
+            pending = {user_id for _, kind, _, user_id in json.load(f)['pending'] if kind == 'prompt'}
+        prompted_before = set(self.prompts)
+        lost_submissions = self.accepted - saved
+        accepted = len(self.accepted)
+        cancelled_submits = sum(1 for task in self.submit_tasks if not task.done() or task.cancelled())
+
+        # Segundo arranque: el scheduler retoma los pendientes
+        lifecycle.stopping = False
+        restarted = DailyScheduler(self.bot)
+        task = asyncio.ensure_future(restarted._run())
+        deadline = time.perf_counter() + 60
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+            if len(self.prompts) == self.args.members and not restarted._jobs:
+                break
+        task.cancel()
+
+        members = set(guild.members)
+        checks = {
+            'dailies aceptadas perdidas': (len(lost_submissions), 0),
+            'envíos de daily cortados por el apagado': (cancelled_submits, 0),
+            'DMs enviados + pendientes': (len(prompted_before | pending), len(members)),
+            'DMs enviados y también pendientes': (len(prompted_before & pending), 0),
+            'miembros con DM tras reiniciar': (len(self.prompts), len(members)),
+            'miembros con más de un DM': (sum(1 for count in self.prompts.values() if count > 1), 0),
+        }
+        return {
+            'shutdown_seconds': round(shutdown_seconds, 3),
+            'accepted_submissions': accepted,
+            'prompted_before_shutdown': len(prompted_before),
+            'pending_after_shutdown': len(pending),
+            'checks': {name: {'actual': actual, 'expected': expected} for name, (actual, expected) in checks.items()},
+            'ok': all(actual == expected for actual, expected in checks.values())
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica el apagado ordenado con SIGTERM a mitad de un envío masivo")
+    parser.add_argument('--members', type=int, default=60)
+    parser.add_argument('--sigterm-after', type=float, default=0.5, help="Segundos desde el inicio del envío hasta el SIGTERM")
+    parser.add_argument('--timeout', type=float, default=1.0, help="Plazo del apagado (SHUTDOWN_TIMEOUT)")
+    parser.add_argument('--verbose', action='store_true', help="Mostrar el log del bot")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ.update({
+            'DATA_DIR': data_dir, 'GUILD_ID': '0', 'DAILIES_CHANNEL_ID': '0',
+            'PRODUCT_TEAM_ROLES': '', 'ADMIN_ROLE_ID': '0', 'TIMEZONE': TIMEZONE,
+        })
+        logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+        result = asyncio.run(Check(args).run())
+
+    print(f"Apagado en {result['shutdown_seconds']} s: {result['prompted_before_shutdown']} DMs enviados, "
+          f"{result['pending_after_shutdown']} pendientes, {result['accepted_submissions']} dailies aceptadas")
+    for name, check in result['checks'].items():
+        status = 'OK ' if check['actual'] == check['expected'] else 'FAIL'
+        print(f"  [{status}] {name}: {check['actual']} (esperado {check['expected']})")
+    return 0 if result['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
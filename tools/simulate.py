@@ -0,0 +1,615 @@
+"""Simulación offline de días completos de actividad del bot con un reloj virtual.
+
+Arma servidores, roles, miembros y canales falsos (sin conexión a Discord) y
+deja correr el `DailyScheduler` real: encabezado y DMs a la hora configurada,
+recordatorio, cierre del día, resumen y limpieza. Los miembros completan la
+`DailyModal` real a una hora aleatoria (con semilla) y todo se guarda con la
+capa de storage real en un directorio temporal. Un mes se simula en segundos.
+
+    python tools/simulate.py --days 30 --guilds 3 --members 25
+
+Al final muestra las llamadas a la API por endpoint, los bytes escritos en
+disco y los percentiles de latencia, y verifica que los DMs, recordatorios,
+dailies y resúmenes coincidan con lo esperado (código de salida 1 si no).
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+import tempfile
+import itertools
+import contextvars
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TIMEZONE = 'America/Buenos_Aires'
+# Zona de los miembros de --west-members: su cierre cae después del resumen del servidor
+WEST_TIMEZONE = 'America/Los_Angeles'
+# Cierre del horario `diseño` de --split-schedules: antes que el de `default` (23:59)
+SPLIT_END_HOUR = 23
+
+_ids = itertools.count(1000)
+api_calls = Counter()
+# Marca el envío en curso cuya escritura de dailies debe fallar (--failed-saves)
+fail_daily_write = contextvars.ContextVar('fail_daily_write', default=False)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class FakeAsset:
+    url = 'https://cdn.discordapp.com/embed/avatars/0.png'
+
+
+class FakeMessage:
+    def __init__(self, channel, content=None, embed=None, view=None, embeds=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.embed = embed
+        self.embeds = embeds or ([embed] if embed is not None else [])
+        self.view = view
+        self.pinned = False
+
+    async def create_thread(self, name, **kwargs):
+        api_calls['POST /channels/{id}/messages/{id}/threads'] += 1
+        thread = FakeChannel(name, self.channel.guild)
+        self.channel.guild.threads[thread.id] = thread
+        return thread
+
+    async def pin(self, **kwargs):
+        api_calls['PUT /channels/{id}/pins/{id}'] += 1
+        self.pinned = True
+
+    async def unpin(self, **kwargs):
+        api_calls['DELETE /channels/{id}/pins/{id}'] += 1
+        self.pinned = False
+
+    async def edit(self, **fields):
+        api_calls['PATCH /channels/{id}/messages/{id}'] += 1
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return self
+
+
+class FakeChannel:
+    def __init__(self, name, guild=None):
+        self.id = next(_ids)
+        self.name = name
+        self.guild = guild
+        self.messages = {}
+
+    async def send(self, content=None, embed=None, view=None, embeds=None, **kwargs):
+        api_calls['POST /channels/{id}/messages'] += 1
+        message = FakeMessage(self, content, embed, view, embeds)
+        self.messages[message.id] = message
+        return message
+
+    async def fetch_message(self, message_id):
+        api_calls['GET /channels/{id}/messages/{id}'] += 1
+        return self.messages[message_id]
+
+    def get_partial_message(self, message_id):
+        return self.messages[message_id]
+
+
+class FakeRole:
+    def __init__(self, name):
+        self.id = next(_ids)
+        self.name = name
+        self.members = []
+
+
+class FakeMember:
+    bot = False
+    display_avatar = FakeAsset()
+
+    def __init__(self, sim, guild, name, roles):
+        self.id = next(_ids)
+        self.sim = sim
+        self.guild = guild
+        self.name = self.display_name = name
+        self.mention = f'<@{self.id}>'
+        self.roles = roles
+        self.dm_channel = FakeChannel(f'dm-{name}')
+        self.mutual_guilds = [guild]
+        self.guild_permissions = type('Permissions', (), {'administrator': False})()
+
+    async def send(self, content=None, embed=None, view=None, **kwargs):
+        message = await self.dm_channel.send(content, embed=embed, view=view)
+        self.sim.on_dm(self, message)
+        return message
+
+    async def create_dm(self):
+        return self.dm_channel
+
+
+class FakeGuild:
+    def __init__(self, name):
+        self.id = next(_ids)
+        self.name = name
+        self.roles = {}
+        self.members = {}
+        self.channels = {}
+        self.threads = {}
+
+    def get_thread(self, thread_id):
+        return self.threads.get(thread_id)
+
+    def get_role(self, role_id):
+        return self.roles.get(role_id)
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def fetch_member(self, user_id):
+        api_calls['GET /guilds/{id}/members/{id}'] += 1
+        return self.members[user_id]
+
+
+class FakeBot:
+    def __init__(self, guilds):
+        self.guilds = guilds
+        self._guilds = {guild.id: guild for guild in guilds}
+        self._channels = {}
+        self._users = {}
+        self.cogs = {}
+        for guild in guilds:
+            self._channels.update(guild.channels)
+            for member in guild.members.values():
+                self._users[member.id] = member
+                self._channels[member.dm_channel.id] = member.dm_channel
+
+    def get_guild(self, guild_id):
+        return self._guilds.get(guild_id)
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+    def get_channel(self, channel_id):
+        return self._channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id):
+        api_calls['GET /channels/{id}'] += 1
+        return self._channels[channel_id]
+
+    def get_user(self, user_id):
+        return self._users.get(user_id)
+
+    async def fetch_user(self, user_id):
+        api_calls['GET /users/{id}'] += 1
+        return self._users[user_id]
+
+    async def wait_until_ready(self):
+        return None
+
+    def add_member(self, member):
+        self._users[member.id] = member
+        self._channels[member.dm_channel.id] = member.dm_channel
+
+
+class FakeResponse:
+    async def defer(self, **kwargs):
+        api_calls['POST /interactions/{id}/callback'] += 1
+
+    async def send_message(self, *args, **kwargs):
+        api_calls['POST /interactions/{id}/callback'] += 1
+
+
+class FakeFollowup:
+    async def send(self, *args, **kwargs):
+        api_calls['POST /webhooks/{id}/{token}'] += 1
+
+
+class FakeInteraction:
+    def __init__(self, bot, member, message):
+        self.client = bot
+        self.user = member
+        self.guild = None
+        self.message = message
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+
+class Simulation:
+    def __init__(self, args):
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.latencies = defaultdict(list)
+        self.submit_tasks = set()
+        self.prompts = Counter()      # fecha -> DMs con botón enviados
+        self.reminders = Counter()    # fecha -> recordatorios enviados
+        self.expected_reminders = Counter()
+        self.expected_missing = defaultdict(set)  # (guild_id, fecha) -> miembros sin daily
+        self.submitted = Counter()    # fecha -> dailies guardadas
+        self.doubled = 0              # envíos duplicados generados
+        self.guild_schedules = 0      # horarios propios creados con --guild-schedules
+        self.failed_saves = 0         # envíos cuya escritura falla (--failed-saves)
+        self.lost_saves = 0           # de esos, los que no quedaron guardados antes del reintento
+        self.retried_saves = 0        # de esas, las que se guardaron al reenviar
+        self.churned = 0              # miembros que se fueron y fueron reemplazados (--churn)
+        self.rebuilds = 0             # reconstrucciones completas de la cola del scheduler
+
+    def build_guilds(self):
+        guilds = []
+        for g in range(self.args.guilds):
+            guild = FakeGuild(f'guild-{g}')
+            role = FakeRole('product')
+            guild.roles[role.id] = role
+            channel = FakeChannel('dailies', guild)
+            guild.channels[channel.id] = channel
+            # Con --split-schedules la segunda mitad del equipo tiene el rol `design` (su propio horario)
+            design = FakeRole('design') if self.args.split_schedules else None
+            if design is not None:
+                guild.roles[design.id] = design
+            for m in range(self.args.members):
+                member_role = design if design is not None and m >= self.args.members // 2 else role
+                member = FakeMember(self, guild, f'member-{g}-{m}', [member_role])
+                member_role.members.append(member)
+                guild.members[member.id] = member
+            guild.dailies_channel = channel
+            guilds.append(guild)
+        return guilds
+
+    def on_dm(self, member, message):
+        from utils.clock import clock
+        today = clock.today_key(TIMEZONE)
+        if message.view is not None:
+            self.prompts[today] += 1
+            self.plan_submission(member, message, today)
+        elif message.embed is not None and 'Recordatorio' in (message.embed.title or ''):
+            self.reminders[today] += 1
+
+    def plan_submission(self, member, message, today):
+        from utils.clock import clock
+        from utils.config import member_prefs
+        now = clock.now(member_prefs.timezone_for(member.guild.id, member.id))
+        if any(role.name == 'design' for role in member.roles):
+            cutoff = now.replace(hour=SPLIT_END_HOUR, minute=0, second=0, microsecond=0)
+        else:
+            cutoff = now.replace(hour=23, minute=59, second=0, microsecond=0)
+        reminder = now.replace(hour=14, minute=0, second=0, microsecond=0)
+        submit_at = None
+        if self.random.random() < self.args.submit_rate:
+            submit_at = now + timedelta(seconds=self.random.randint(60, self.args.submit_window * 60))
+        if submit_at is None or submit_at >= reminder:
+            self.expected_reminders[today] += 1
+        if submit_at is None or submit_at >= cutoff:
+            self.expected_missing[(member.guild.id, today)].add(member.id)
+            return
+        task = asyncio.ensure_future(self.submit(member, message, (submit_at - now).total_seconds()))
+        self.submit_tasks.add(task)
+        task.add_done_callback(self.submit_tasks.discard)
+
+    async def submit(self, member, message, delay):
+        from utils.clock import clock
+        from utils.config import dailies_storage
+        from cogs.daily_scheduler import DailyModal
+
+        await clock.sleep(delay)
+        interaction = FakeInteraction(self.bot, member, message)
+        blockers = '' if self.random.random() < 0.8 else 'Esperando review del PR #456'
+        # Doble envío: dos modals del mismo miembro llegan a la vez
+        copies = 2 if self.random.random() < self.args.double_submit_rate else 1
+        modals = [self.modal(DailyModal, member, blockers) for _ in range(copies)]
+        self.doubled += copies - 1
+
+        # Los primeros `--failed-saves` envíos encuentran el disco lleno al guardar
+        failing = self.failed_saves < self.args.failed_saves
+        if failing:
+            self.failed_saves += 1
+            fail_daily_write.set(True)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(modal.on_submit(interaction) for modal in modals))
+        self.latencies['daily submit'].append((time.perf_counter() - started) * 1000)
+        if failing:
+            # El miembro vuelve a enviar el formulario: no debe descartarse como duplicado
+            fail_daily_write.set(False)
+            self.lost_saves += not await dailies_storage.has_submitted_today(member.id, member.guild.id)
+            await self.modal(DailyModal, member, blockers).on_submit(interaction)
+            if await dailies_storage.has_submitted_today(member.id, member.guild.id):
+                self.retried_saves += 1
+        self.submitted[clock.today_key(TIMEZONE)] += 1
+
+    async def churn(self, scheduler, guilds):
+        """Cada día a las 8:00, `--churn` miembros por servidor se van y entran otros con el rol del equipo"""
+        from utils.clock import clock
+        while True:
+            now = clock.now(TIMEZONE)
+            at = now.replace(hour=8, minute=0, second=0, microsecond=0)
+            if at <= now:
+                at += timedelta(days=1)
+            await clock.sleep((at - now).total_seconds())
+            for guild in guilds:
+                role = next(iter(guild.roles.values()))
+                # Los miembros del oeste se quedan: sus cierres caen en el día siguiente
+                for member in role.members[self.args.west_members:][:self.args.churn]:
+                    role.members.remove(member)
+                    del guild.members[member.id]
+                    await scheduler.on_member_remove(member)
+                    self.churned += 1
+                for _ in range(self.args.churn):
+                    member = FakeMember(self, guild, f'member-{guild.name}-{next(_ids)}', [])
+                    guild.members[member.id] = member
+                    self.bot.add_member(member)
+                    before = FakeMember.__new__(FakeMember)
+                    before.__dict__.update(member.__dict__)
+                    member.roles = [role]
+                    role.members.append(member)
+                    await scheduler.on_member_update(before, member)
+
+    def modal(self, modal_class, member, blockers):
+        modal = modal_class(guild_id=member.guild.id)
+        modal.feeling._value = 'Bien'
+        modal.yesterday._value = 'Avancé con la card #123'
+        modal.today._value = 'Reviews y la feature Y'
+        modal.blockers._value = blockers
+        return modal
+
+    def fail_daily_writes(self):
+        """Las escrituras de `dailies.json` fallan en los envíos marcados con `fail_daily_write`"""
+        from utils import config as config_module
+        write_json = config_module.write_json
+
+        async def failing_write(path, data):
+            if path == config_module.config.DAILIES_FILE and fail_daily_write.get():
+                raise OSError(28, 'No space left on device')
+            return await write_json(path, data)
+
+        config_module.write_json = failing_write
+
+    async def run(self):
+        from utils.clock import clock, VirtualClock, get_zone
+        from utils.config import guild_settings, member_prefs, schedule_manager
+        from utils import fileio
+        from cogs.daily_scheduler import DailyScheduler
+        from cogs.status_board import StatusBoard
+
+        tz = get_zone(TIMEZONE)
+        start_day = datetime.strptime(self.args.start, '%Y-%m-%d')
+        start = tz.localize(start_day)
+        end = tz.localize(start_day + timedelta(days=self.args.days))
+        if self.args.west_members:
+            # Hasta pasado el cierre del último día de los miembros del oeste
+            end += timedelta(hours=6)
+        virtual = clock.use(VirtualClock(start))
+
+        guilds = self.build_guilds()
+        self.bot = FakeBot(guilds)
+        for guild in guilds:
+            await guild_settings.update(guild.id, dailies_channel_id=guild.dailies_channel.id,
+                                        team_roles=list(guild.roles), timezone=TIMEZONE)
+        await schedule_manager.update_time(10, 0)
+        await schedule_manager.update_reminder(True, 14, 0)
+        await schedule_manager.update_end_of_day(23, 59)
+        for guild in guilds:
+            for member in list(guild.members.values())[:self.args.west_members]:
+                await member_prefs.set_timezone(member.id, WEST_TIMEZONE)
+        if self.args.guild_schedules:
+            # Cada servidor con su propio horario del mismo nombre: reemplaza al global para sus miembros
+            for guild in guilds:
+                if await schedule_manager.create_schedule('mañana', guild.id):
+                    self.guild_schedules += 1
+                await schedule_manager.update_time(10, 0, name='mañana', guild_id=guild.id)
+                await schedule_manager.update_reminder(True, 14, 0, name='mañana', guild_id=guild.id)
+            # Desactivar `default` desde un servidor crea su copia: el global sigue activo
+            await schedule_manager.toggle_enabled(False, guild_id=guilds[0].id)
+        if self.args.split_schedules:
+            # La mitad `design` del equipo con su horario, que cierra antes que `default`
+            for guild in guilds:
+                design = [role for role in guild.roles.values() if role.name == 'design'][0]
+                await schedule_manager.create_schedule('diseño', guild.id, roles=[design.id])
+                await schedule_manager.update_time(10, 0, name='diseño', guild_id=guild.id)
+                await schedule_manager.update_reminder(True, 14, 0, name='diseño', guild_id=guild.id)
+                await schedule_manager.update_end_of_day(SPLIT_END_HOUR, 0, name='diseño', guild_id=guild.id)
+        if not self.args.no_status_board:
+            board = StatusBoard(self.bot)
+            await board.cog_load()
+            self.bot.cogs['StatusBoard'] = board
+        setup_writes = dict(fileio.write_stats)
+        if self.args.failed_saves:
+            self.fail_daily_writes()
+
+        sim = self
+
+        class TimedScheduler(DailyScheduler):
+            async def _fire(self, name, kind, users_by_guild):
+                started = time.perf_counter()
+                await super()._fire(name, kind, users_by_guild)
+                sim.latencies[f'scheduler {kind}'].append((time.perf_counter() - started) * 1000)
+
+            async def _rebuild(self):
+                sim.rebuilds += 1
+                await super()._rebuild()
+
+        scheduler = TimedScheduler(self.bot)
+        task = asyncio.ensure_future(scheduler._run())
+        churn = asyncio.ensure_future(self.churn(scheduler, guilds)) if self.args.churn else None
+
+        wall = time.perf_counter()
+        await virtual.run_until(end)
+        wall = time.perf_counter() - wall
+
+        task.cancel()
+        for pending in list(scheduler._jobs) + list(self.submit_tasks) + [task, churn]:
+            if pending is None:
+                continue
+            pending.cancel()
+        clock.use(None)
+
+        self.global_default = (await schedule_manager.load_schedule())['enabled']
+        writes = fileio.write_stats['writes'] - setup_writes['writes']
+        written = fileio.write_stats['bytes'] - setup_writes['bytes']
+        return self.report(guilds, wall, writes, written)
+
+    def report(self, guilds, wall, writes, written):
+        from utils import metrics
+
+        summaries = 0
+        summarized = 0
+        for guild in guilds:
+            for message in guild.dailies_channel.messages.values():
+                if message.embed is not None and 'Resumen' in (message.embed.title or ''):
+                    summaries += 1
+                    # Tasa del tablero cerrado: "completadas/total (N%)"
+                    for field in message.embed.fields:
+                        if field.name.startswith('📈'):
+                            summarized += int(field.value.split()[0].split('/')[1])
+        daily_messages = [
+            len([embed for embed in message.embeds if (embed.title or '').startswith('📋 Daily')])
+            for guild in guilds
+            for channel in [guild.dailies_channel, *guild.threads.values()]
+            for message in channel.messages.values()
+        ]
+        posted = sum(daily_messages)
+        pinned = sum(1 for guild in guilds for message in guild.dailies_channel.messages.values() if message.pinned)
+        if self.args.no_status_board:
+            expected_summaries = sum(1 for missing in self.expected_missing.values() if missing)
+        else:
+            # El tablero fijado de cada día se convierte en el resumen, falte alguien o no
+            expected_summaries = self.active_days() * self.args.guilds
+        expected_submitted = sum(self.prompts.values()) - sum(len(m) for m in self.expected_missing.values())
+
+        checks = {
+            'prompts sent': (sum(self.prompts.values()), self.active_days() * self.args.guilds * self.args.members),
+            'reminders sent': (sum(self.reminders.values()), sum(self.expected_reminders.values())),
+            'dailies submitted': (sum(self.submitted.values()), expected_submitted),
+            'end of day summaries': (summaries, expected_summaries),
+            'dailies posted': (posted, sum(self.submitted.values())),
+        }
+        # Archivo de participación: una fila por DM pedido, con la daily si se envió
+        from utils.config import config
+        archived = []
+        for name in os.listdir(config.ARCHIVE_DIR) if os.path.isdir(config.ARCHIVE_DIR) else []:
+            with open(os.path.join(config.ARCHIVE_DIR, name), encoding='utf-8') as f:
+                archived.extend(line.split(',') for line in f.read().splitlines()[1:])
+        checks['archived days'] = (len(archived), sum(self.prompts.values()))
+        checks['archived dailies'] = (sum(1 for row in archived if row[2] != 'nan'), sum(self.submitted.values()))
+        if self.args.double_submit_rate:
+            checks['duplicate submits absorbed'] = (int(sum(metrics.duplicates_absorbed._values.values())), self.doubled)
+        if self.args.threads:
+            checks['daily threads'] = (sum(len(guild.threads) for guild in guilds), self.active_days() * self.args.guilds)
+        if self.args.failed_saves:
+            checks['failed daily writes'] = (self.lost_saves, self.args.failed_saves)
+            checks['dailies saved on retry'] = (self.retried_saves, self.failed_saves)
+        if self.args.guild_schedules:
+            checks['guild schedules created'] = (self.guild_schedules, self.args.guilds)
+            checks['global default still enabled'] = (self.global_default, True)
+        if self.args.churn:
+            checks['members replaced'] = (self.churned, self.args.churn * self.args.guilds * self.args.days)
+            # Altas y bajas solo vuelven a encolar a esos miembros: la cola se arma una vez
+            checks['scheduler queue rebuilds'] = (self.rebuilds, 1)
+        if not self.args.no_status_board:
+            checks['pinned status boards'] = (pinned, self.args.guilds if self.active_days() else 0)
+            # Un solo resumen por servidor y día, con todos los miembros a los que se les pidió
+            checks['members in board summaries'] = (summarized, sum(self.prompts.values()))
+
+        result = {
+            'days': self.args.days,
+            'guilds': self.args.guilds,
+            'members_per_guild': self.args.members,
+            'wall_seconds': round(wall, 3),
+            'api_calls': dict(sorted(api_calls.items())),
+            'api_calls_total': sum(api_calls.values()),
+            'daily_posts': sum(1 for count in daily_messages if count),
+            'storage_writes': writes,
+            'storage_bytes_written': written,
+            'latency_ms': {
+                name: {q: round(percentile(values, int(q[1:])), 2) for q in ('p50', 'p95', 'p99')}
+                for name, values in sorted(self.latencies.items())
+            },
+            'checks': {name: {'actual': actual, 'expected': expected} for name, (actual, expected) in checks.items()},
+            'ok': all(actual == expected for actual, expected in checks.values()),
+        }
+        return result
+
+    def active_days(self):
+        start = datetime.strptime(self.args.start, '%Y-%m-%d')
+        return sum(1 for offset in range(self.args.days) if (start + timedelta(days=offset)).weekday() < 5)
+
+
+def print_report(result):
+    print(f"Simulated {result['days']} day(s), {result['guilds']} guild(s) x {result['members_per_guild']} members "
+          f"in {result['wall_seconds']:.2f}s")
+    print("API calls:")
+    for endpoint, count in result['api_calls'].items():
+        print(f"  {endpoint:<40} {count:7d}")
+    print(f"  {'total':<40} {result['api_calls_total']:7d}")
+    print(f"Daily posts: {result['daily_posts']} messages for {result['checks']['dailies posted']['actual']} dailies")
+    print(f"Storage: {result['storage_writes']} writes, {result['storage_bytes_written'] / 1024:.1f} KiB written")
+    print("Latency (ms, wall clock):")
+    for name, stats in result['latency_ms'].items():
+        print(f"  {name:<28} p50 {stats['p50']:8.2f}  p95 {stats['p95']:8.2f}  p99 {stats['p99']:8.2f}")
+    print("Checks:")
+    for name, check in result['checks'].items():
+        status = 'OK ' if check['actual'] == check['expected'] else 'FAIL'
+        print(f"  [{status}] {name}: {check['actual']} (esperado {check['expected']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación offline del bot con reloj virtual")
+    parser.add_argument('--days', type=int, default=1)
+    parser.add_argument('--guilds', type=int, default=1)
+    parser.add_argument('--members', type=int, default=10)
+    parser.add_argument('--submit-rate', type=float, default=0.8, help="Probabilidad de que un miembro complete su daily")
+    parser.add_argument('--start', default='2026-03-02', help="Fecha inicial (YYYY-MM-DD)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="Imprimir el reporte como JSON")
+    parser.add_argument('--verbose', action='store_true', help="Mostrar el log del bot")
+    parser.add_argument('--metrics', action='store_true', help="Imprimir al final las métricas en formato Prometheus")
+    parser.add_argument('--submit-window', type=int, default=15 * 60,
+                        help="Minutos desde el DM dentro de los que los miembros completan la daily (p. ej. 5 para una ráfaga)")
+    parser.add_argument('--threads', action='store_true', help="Publicar las dailies en un hilo por día (DAILY_THREADS)")
+    parser.add_argument('--batch-seconds', type=float, default=0.0, help="Agrupar embeds por mensaje (DAILY_BATCH_SECONDS)")
+    parser.add_argument('--double-submit-rate', type=float, default=0.0, help="Probabilidad de que una daily se envíe dos veces a la vez")
+    parser.add_argument('--failed-saves', type=int, default=0,
+                        help="Las primeras N escrituras de dailies fallan; el miembro reenvía el formulario")
+    parser.add_argument('--guild-schedules', action='store_true',
+                        help="Cada servidor crea su propio horario además del global (un solo DM por miembro)")
+    parser.add_argument('--split-schedules', action='store_true',
+                        help=f"La mitad del equipo de cada servidor en un horario propio que cierra a las {SPLIT_END_HOUR}:00")
+    parser.add_argument('--west-members', type=int, default=0,
+                        help=f"Miembros por servidor en {WEST_TIMEZONE}: envían después del resumen del servidor")
+    parser.add_argument('--churn', type=int, default=0,
+                        help="Miembros por servidor que se van cada día a las 8:00 y son reemplazados por otros")
+    parser.add_argument('--no-status-board', action='store_true', help="Sin tablero fijado: encabezado y resumen como mensajes separados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # Entorno aislado: sin .env del desarrollador ni datos reales
+        os.environ.update({
+            'DATA_DIR': data_dir, 'GUILD_ID': '0', 'DAILIES_CHANNEL_ID': '0',
+            'PRODUCT_TEAM_ROLES': '', 'ADMIN_ROLE_ID': '0', 'TIMEZONE': TIMEZONE,
+            'DAILY_THREADS': 'true' if args.threads else 'false', 'DAILY_BATCH_SECONDS': str(args.batch_seconds),
+        })
+        logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+        result = asyncio.run(Simulation(args).run())
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+    if args.metrics:
+        from utils import metrics
+        print(metrics.render(), end='')
+    return 0 if result['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""Verificación de fallas del storage de `data/` (escritura atómica, `.prev` y locks).
+
+Inyecta fallas en `utils/fileio.py` sobre un directorio temporal y verifica que:
+
+- un proceso que muere entre la escritura del temporal y el rename deja el
+  archivo original intacto,
+- un archivo principal truncado, corrupto o vacío se recupera desde `.prev`,
+- un error de fsync o de disco durante la escritura deja el original intacto y
+  no deja temporales,
+- un lock se libera si el bloque falla o si se cancela la espera,
+- varios procesos escribiendo a la vez sobre el mismo `DATA_DIR` (dailies,
+  referencias de DMs, horarios y zonas horarias) no pierden ni duplican entradas,
+- una reescritura de otro proceso con el mismo mtime no deja datos viejos en memoria,
+- una daily cuya escritura falla (o sigue en curso) no se ve como enviada.
+
+    python tools/storage_check.py --writers 8 --ops 25
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import subprocess
+import tempfile
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import fileio  # noqa: E402
+
+ORIGINAL = {'generation': 1, 'dailies': {'2026-03-02': {'1': {'2': {'feeling': 'Bien'}}}}}
+UPDATED = {'generation': 2, 'dailies': {}}
+
+# Proceso hijo: escribe una generación nueva y muere justo antes del rename
+CRASH_CHILD = r"""
+import os, sys, asyncio
+import aiofiles.os
+sys.path.insert(0, sys.argv[1])
+from utils import fileio
+
+async def crash(*args, **kwargs):
+    os._exit(17)
+
+aiofiles.os.replace = crash
+asyncio.run(fileio.write_json(sys.argv[2], {'generation': 2, 'dailies': {}}))
+"""
+
+
+def read_raw(path: str):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def leftovers(directory: str):
+    return sorted(name for name in os.listdir(directory) if '.tmp.' in name)
+
+
+async def write_two_generations(path: str):
+    """Deja ORIGINAL como `.prev` y UPDATED como archivo principal"""
+    await fileio.write_json(path, ORIGINAL)
+    await fileio.write_json(path, UPDATED)
+
+
+async def check_crash_before_rename(directory: str):
+    path = os.path.join(directory, 'crash.json')
+    await fileio.write_json(path, ORIGINAL)
+    result = subprocess.run([sys.executable, '-c', CRASH_CHILD, ROOT, path], capture_output=True)
+    return {
+        'el hijo murió antes del rename': (result.returncode, 17),
+        'original intacto tras morir antes del rename': (read_raw(path), ORIGINAL),
+        'read_json tras morir antes del rename': (await fileio.read_json(path), ORIGINAL),
+    }
+
+
+async def check_recovery(directory: str):
+    checks = {}
+    for name, content in (('truncado', '{"generation": 2, "dail'), ('corrupto', '\x00\x00garbage'), ('vacío', '')):
+        path = os.path.join(directory, f'recover-{len(checks)}.json')
+        await write_two_generations(path)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        checks[f'recupera .prev con el principal {name}'] = (await fileio.read_json(path), ORIGINAL)
+
+    path = os.path.join(directory, 'missing.json')
+    await write_two_generations(path)
+    os.remove(path)
+    checks['recupera .prev sin el principal'] = (await fileio.read_json(path), ORIGINAL)
+
+    path = os.path.join(directory, 'nothing.json')
+    try:
+        await fileio.read_json(path)
+        raised = False
+    except FileNotFoundError:
+        raised = True
+    checks['FileNotFoundError sin principal ni .prev'] = (raised, True)
+    return checks
+
+
+async def check_write_errors(directory: str):
+    checks = {}
+    failures = (
+        ('fsync', 'os.fsync', OSError(5, 'Input/output error')),
+        ('disco lleno', 'aiofiles.threadpool.text.AsyncTextIOWrapper.write', OSError(28, 'No space left on device')),
+        ('rename', 'aiofiles.os.replace', OSError(13, 'Permission denied')),
+    )
+    for name, target, error in failures:
+        sub = tempfile.mkdtemp(dir=directory)
+        path = os.path.join(sub, 'store.json')
+        await fileio.write_json(path, ORIGINAL)
+        with mock.patch(target, side_effect=error):
+            try:
+                await fileio.write_json(path, UPDATED)
+                raised = False
+            except OSError:
+                raised = True
+        checks[f'{name}: la escritura falla'] = (raised, True)
+        checks[f'{name}: original intacto'] = (read_raw(path), ORIGINAL)
+        checks[f'{name}: sin temporales'] = (leftovers(sub), [])
+    return checks
+
+
+# Proceso escritor: cada uno guarda `ops` entradas propias en cada store compartido
+WRITER_CHILD = r"""
+import sys, asyncio
+sys.path.insert(0, sys.argv[1])
+from utils.config import dailies_storage, messages_storage, schedule_manager, member_prefs
+
+async def main(writer, ops):
+    for op in range(ops):
+        user_id = writer * 1000 + op
+        assert await dailies_storage.save_daily(user_id, 1, {'feeling': 'Bien', 'yesterday': '', 'today': '', 'blockers': ''})
+        assert await messages_storage.save_message(user_id, 1, 10, 100000 + user_id, dailies_storage.today_key(1, user_id))
+        assert await schedule_manager.create_schedule(f'w{writer}-{op}', 1)
+        await schedule_manager.update_time(9, op % 60)
+        assert await schedule_manager.save_schedule(schedule_manager.default_schedule(1), f's{writer}-{op}')
+        assert await member_prefs.set_timezone(user_id, 'UTC')
+
+asyncio.run(main(int(sys.argv[2]), int(sys.argv[3])))
+"""
+
+
+# Otro proceso reescribe `dailies.json` y el mtime queda igual (resolución gruesa o reloj que retrocede)
+SAME_MTIME_CHILD = r"""
+import os, sys, asyncio
+sys.path.insert(0, sys.argv[1])
+from utils.config import config, dailies_storage
+from utils import fileio
+
+async def main():
+    assert await dailies_storage.save_daily(1, 1, {'feeling': 'Bien', 'yesterday': '', 'today': '', 'blockers': ''})
+    before = os.stat(config.DAILIES_FILE)
+    await fileio.write_json(config.DAILIES_FILE, {})
+    os.utime(config.DAILIES_FILE, ns=(before.st_atime_ns, before.st_mtime_ns))
+    print(await dailies_storage.has_submitted_today(1, 1))
+
+asyncio.run(main())
+"""
+
+
+# Una escritura de `save_daily` que falla: lecturas sin lock durante y después de la escritura
+FAILED_SAVE_CHILD = r"""
+import sys, asyncio
+sys.path.insert(0, sys.argv[1])
+from utils import config as storage
+from utils.config import dailies_storage
+
+seen = []
+
+async def failing_write(path, data):
+    seen.append(await dailies_storage.has_submitted_today(1, 1))
+    raise OSError(28, 'No space left on device')
+
+async def main():
+    assert await dailies_storage.save_daily(2, 1, {'feeling': 'Bien', 'yesterday': '', 'today': '', 'blockers': ''})
+    storage.write_json = failing_write
+    saved = await dailies_storage.save_daily(1, 1, {'feeling': 'Bien', 'yesterday': '', 'today': '', 'blockers': ''})
+    print(saved, seen[0], await dailies_storage.has_submitted_today(1, 1))
+
+asyncio.run(main())
+"""
+
+
+def child_env(directory: str) -> dict:
+    return dict(os.environ, DATA_DIR=tempfile.mkdtemp(dir=directory), GUILD_ID='0', DAILIES_CHANNEL_ID='0',
+                PRODUCT_TEAM_ROLES='', ADMIN_ROLE_ID='0', TIMEZONE='UTC')
+
+
+def check_same_mtime(directory: str):
+    result = subprocess.run([sys.executable, '-c', SAME_MTIME_CHILD, ROOT], env=child_env(directory),
+                            capture_output=True, text=True)
+    return {'relee una reescritura con el mismo mtime': (result.stdout.strip(), 'False')}
+
+
+def check_failed_save(directory: str):
+    result = subprocess.run([sys.executable, '-c', FAILED_SAVE_CHILD, ROOT], env=child_env(directory),
+                            capture_output=True, text=True)
+    # save_daily imprime el error antes: el resultado es la última línea
+    saved, during, after = ((result.stdout.strip().splitlines() or [''])[-1].split() + ['?'] * 3)[:3]
+    return {
+        'save_daily fallida devuelve False': (saved, 'False'),
+        'la daily no se ve mientras se escribe': (during, 'False'),
+        'la daily no queda en memoria si la escritura falla': (after, 'False'),
+    }
+
+
+def check_multiprocess(directory: str, writers: int, ops: int):
+    env = child_env(directory)
+    data_dir = env['DATA_DIR']
+    processes = [
+        subprocess.Popen([sys.executable, '-c', WRITER_CHILD, ROOT, str(writer), str(ops)],
+                         env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        for writer in range(writers)
+    ]
+    failed = sum(1 for process in processes if process.wait() != 0)
+
+    expected = {writer * 1000 + op for writer in range(writers) for op in range(ops)}
+    dailies = read_raw(os.path.join(data_dir, 'dailies.json'))
+    saved = [int(user_id) for day in dailies.values() for users in day.values() for user_id in users]
+    messages = read_raw(os.path.join(data_dir, 'messages.json'))
+    refs = {int(user_id) for day in messages.values() for users in day.values() for user_id in users}
+    schedules = read_raw(os.path.join(data_dir, 'schedule.json'))['schedules']
+    members = read_raw(os.path.join(data_dir, 'members.json'))
+    return {
+        f'{writers} procesos escritores terminaron bien': (failed, 0),
+        'dailies de todos los procesos': (sorted(saved), sorted(expected)),
+        'referencias a DMs de todos los procesos': (refs, expected),
+        'horarios creados por todos los procesos': (len(schedules), 2 * writers * ops + 1),
+        'zonas horarias de todos los procesos': ({int(user_id) for user_id in members}, expected),
+    }
+
+
+async def check_locks(directory: str):
+    path = os.path.join(directory, 'locked.json')
+    lock = fileio.FileLock(path)
+
+    try:
+        async with lock:
+            raise RuntimeError("falla dentro del lock")
+    except RuntimeError:
+        pass
+    released_after_error = not lock.locked()
+
+    # Otro FileLock sobre el mismo archivo ocupa el flock: la espera se cancela
+    holder = fileio.FileLock(path)
+    await holder.acquire()
+    waiter = asyncio.ensure_future(lock.acquire())
+    await asyncio.sleep(0.05)
+    waiter.cancel()
+    try:
+        await waiter
+    except asyncio.CancelledError:
+        pass
+    released_after_cancel = not lock.locked()
+    holder.release()
+
+    try:
+        await asyncio.wait_for(lock.acquire(), 1)
+        acquired = True
+        lock.release()
+    except asyncio.TimeoutError:
+        acquired = False
+    return {
+        'lock liberado tras una excepción': (released_after_error, True),
+        'lock liberado tras cancelar la espera': (released_after_cancel, True),
+        'lock adquirible después': (acquired, True),
+        'drain_locks sin escrituras en curso': (await fileio.drain_locks(1), True),
+    }
+
+
+async def run(directory: str):
+    checks = {}
+    for check in (check_crash_before_rename, check_recovery, check_write_errors, check_locks):
+        checks.update(await check(directory))
+    return checks
+
+
+def summarize(value):
+    """Diferencias legibles para listas y sets grandes"""
+    if isinstance(value, (list, set)) and len(value) > 10:
+        return f"{len(value)} elementos"
+    return repr(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inyección de fallas en el storage de data/")
+    parser.add_argument('--writers', type=int, default=8, help="Procesos escribiendo a la vez sobre el mismo DATA_DIR")
+    parser.add_argument('--ops', type=int, default=25, help="Entradas que guarda cada proceso en cada store")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        checks = asyncio.run(run(directory))
+        checks.update(check_same_mtime(directory))
+        checks.update(check_failed_save(directory))
+        checks.update(check_multiprocess(directory, args.writers, args.ops))
+
+    ok = True
+    for name, (actual, expected) in checks.items():
+        status = 'OK ' if actual == expected else 'FAIL'
+        ok = ok and actual == expected
+        print(f"  [{status}] {name}" + ('' if actual == expected else f": {summarize(actual)} (esperado {summarize(expected)})"))
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import os
+import asyncio
+import logging
+import aiofiles
+from datetime import datetime
+from typing import Dict, List, Optional
+from utils.config import config
+from utils.fileio import FileLock
+from utils.records import DailyEntry, NO_BLOCKERS
+
+logger = logging.getLogger('DailiesBot.Archive')
+
+COLUMNS = ('date', 'user_id', 'seconds_after_prompt', 'local_seconds', 'has_blockers')
+HEADER = ','.join(COLUMNS) + '\n'
+
+
+def archive_row(date_str: str, user_id: int, prompted_at: datetime, entry: Optional[DailyEntry]) -> str:
+    """Fila del archivo para un miembro al que se le pidió la daily.
+
+    `seconds_after_prompt` y `local_seconds` (hora local del envío, en segundos
+    desde la medianoche) quedan en `nan` si no la envió.
+    """
+    if entry is not None:
+        try:
+            submitted = datetime.fromisoformat(entry.timestamp)
+            after = (submitted - prompted_at).total_seconds()
+            local = submitted.hour * 3600 + submitted.minute * 60 + submitted.second
+            blockers = int(bool(entry.blockers) and entry.blockers != NO_BLOCKERS)
+            return f"{date_str},{user_id},{after:.0f},{local},{blockers}\n"
+        except (TypeError, ValueError):
+            logger.warning(f"Daily of user {user_id} on {date_str} has no valid timestamp, archived as missing")
+    return f"{date_str},{user_id},nan,nan,0\n"
+
+
+class DailyArchive:
+    """Historial de participación por servidor en `data/archive/<guild_id>.csv`.
+
+    `dailies.json` solo guarda ayer y hoy; al cierre del día de cada miembro (a
+    su hora local) se agrega su fila, haya enviado la daily o no. El archivo
+    solo crece por el final (una escritura por servidor y por tanda de cierres)
+    y `utils/report.py` lo carga en columnas para los reportes. Si alguien envía
+    la daily después de su cierre se agrega otra fila: la última de cada
+    (fecha, miembro) es la que vale.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._locks: Dict[int, FileLock] = {}
+
+    def path(self, guild_id: int) -> str:
+        return os.path.join(self.directory, f'{guild_id}.csv')
+
+    async def append(self, guild_id: int, rows: List[str]) -> bool:
+        if not rows:
+            return True
+        path = self.path(guild_id)
+        try:
+            # El lock vive junto al archivo: el directorio tiene que existir antes
+            os.makedirs(self.directory, exist_ok=True)
+            lock = self._locks.get(guild_id)
+            if lock is None:
+                lock = self._locks[guild_id] = FileLock(path)
+            async with lock:
+                content = ''.join(rows) if os.path.exists(path) else HEADER + ''.join(rows)
+                async with aiofiles.open(path, 'a', encoding='utf-8') as f:
+                    await f.write(content)
+                    await f.flush()
+                    await asyncio.to_thread(os.fsync, f.fileno())
+            return True
+        except Exception as e:
+            logger.error(f"Error archiving dailies for guild {guild_id}: {e}")
+            return False
+
+
+daily_archive = DailyArchive(config.ARCHIVE_DIR)
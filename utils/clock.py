@@ -0,0 +1,211 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str):
+    """Zona horaria de pytz cacheada por nombre; pytz se importa recién al primer uso"""
+    import pytz
+    return pytz.timezone(name)
+
+
+class SystemTime:
+    """Fuente de tiempo real: reloj del sistema y sleeps de asyncio"""
+
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+    async def wait(self, event: asyncio.Event, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return event.is_set()
+
+
+class _CountingExecutor(ThreadPoolExecutor):
+    """Executor por defecto del loop simulado: cuenta el trabajo pendiente en threads"""
+
+    def __init__(self):
+        super().__init__()
+        self.pending = 0
+        self._pending_lock = threading.Lock()
+
+    def _done(self, _future):
+        with self._pending_lock:
+            self.pending -= 1
+
+    def submit(self, fn, *args, **kwargs):
+        with self._pending_lock:
+            self.pending += 1
+        future = super().submit(fn, *args, **kwargs)
+        future.add_done_callback(self._done)
+        return future
+
+
+class VirtualClock:
+    """Fuente de tiempo simulada para pruebas, simulaciones y benchmarks.
+
+    El tiempo solo avanza con `advance()` / `set()`, que despiertan a los sleeps
+    vencidos, o con `run_until()`, que salta de vencimiento en vencimiento cada vez
+    que el event loop queda sin trabajo. Con `auto_advance=True` cada sleep adelanta
+    el reloj hasta su vencimiento.
+    """
+
+    def __init__(self, start: Optional[datetime] = None, auto_advance: bool = False):
+        start = start or datetime.now(timezone.utc)
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        self._now = start.astimezone(timezone.utc)
+        self.auto_advance = auto_advance
+        self._sleepers: List[Tuple[datetime, asyncio.Future]] = []
+        self._executor: Optional[_CountingExecutor] = None
+
+    def now(self) -> datetime:
+        return self._now
+
+    def set(self, when: datetime):
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        self._now = when.astimezone(timezone.utc)
+        pending = []
+        for deadline, future in self._sleepers:
+            if future.done():
+                continue
+            if deadline <= self._now:
+                future.set_result(None)
+            else:
+                pending.append((deadline, future))
+        self._sleepers = pending
+
+    def advance(self, delta: Optional[timedelta] = None, **kwargs):
+        """Adelanta el reloj (`advance(days=1)`, `advance(timedelta(minutes=5))`)"""
+        self.set(self._now + (delta or timedelta(**kwargs)))
+
+    def next_deadline(self) -> Optional[datetime]:
+        deadlines = [deadline for deadline, future in self._sleepers if not future.done()]
+        return min(deadlines) if deadlines else None
+
+    def _timer(self, seconds: float) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._sleepers.append((self._now + timedelta(seconds=max(0.0, seconds)), future))
+        return future
+
+    async def sleep(self, seconds: float):
+        if self.auto_advance:
+            if seconds > 0:
+                self.advance(seconds=seconds)
+            await asyncio.sleep(0)
+            return
+        await self._timer(seconds)
+
+    async def wait(self, event: asyncio.Event, timeout: float) -> bool:
+        if event.is_set():
+            return True
+        if self.auto_advance:
+            await self.sleep(timeout)
+            return event.is_set()
+        timer = self._timer(timeout)
+        waiter = asyncio.ensure_future(event.wait())
+        try:
+            await asyncio.wait({timer, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            timer.cancel()
+            waiter.cancel()
+        return event.is_set()
+
+    def idle(self) -> bool:
+        """True si el loop no tiene nada listo para correr: solo quedan esperas del reloj virtual"""
+        loop = asyncio.get_running_loop()
+        # Atributos internos del loop de asyncio: callbacks listos y timers reales pendientes
+        if loop._ready or any(not handle.cancelled() for handle in loop._scheduled):
+            return False
+        return self._executor is None or self._executor.pending == 0
+
+    async def settle(self):
+        """Deja correr al event loop hasta que todas las tareas esperen al reloj"""
+        if self._executor is None:
+            self._executor = _CountingExecutor()
+            asyncio.get_running_loop().set_default_executor(self._executor)
+        quiet = 0
+        while quiet < 2:
+            await asyncio.sleep(0)
+            if self.idle():
+                quiet += 1
+            else:
+                quiet = 0
+                if self._executor.pending:
+                    # Escrituras a disco en threads: ceder tiempo real
+                    await asyncio.sleep(0.0005)
+
+    async def run_until(self, end: datetime):
+        """Simula hasta `end` saltando directo al próximo vencimiento"""
+        while True:
+            await self.settle()
+            deadline = self.next_deadline()
+            if deadline is None or deadline > end:
+                self.set(end)
+                await self.settle()
+                return
+            self.set(deadline)
+
+
+class Clock:
+    """Reloj compartido por todo el bot.
+
+    Cachea las zonas horarias y memoiza `today_key()` por zona hasta la próxima
+    medianoche local, así las consultas de "hoy" no recalculan la fecha ni hacen
+    `strftime` en cada llamada. La fuente de tiempo se puede reemplazar con
+    `use(VirtualClock(...))` para avanzar días de forma determinística.
+    """
+
+    def __init__(self, source=None):
+        self.source = source or SystemTime()
+        # zona -> (clave del día, inicio UTC, fin UTC)
+        self._today: Dict[str, Tuple[str, datetime, datetime]] = {}
+
+    def use(self, source=None):
+        """Instala una fuente de tiempo (None vuelve al reloj del sistema)"""
+        self.source = source or SystemTime()
+        self._today.clear()
+        return self.source
+
+    def now_utc(self) -> datetime:
+        return self.source.now()
+
+    def now(self, tz_name: Optional[str] = None) -> datetime:
+        """Hora actual en `tz_name` (UTC si no se indica)"""
+        now = self.source.now()
+        return now.astimezone(get_zone(tz_name)) if tz_name else now
+
+    def today_key(self, tz_name: str) -> str:
+        """Fecha local 'YYYY-MM-DD' en `tz_name`, memoizada hasta la medianoche local"""
+        now = self.source.now()
+        cached = self._today.get(tz_name)
+        if cached is not None and cached[1] <= now < cached[2]:
+            return cached[0]
+
+        tz = get_zone(tz_name)
+        day = now.astimezone(tz).date()
+        start = tz.normalize(tz.localize(datetime.combine(day, time.min)))
+        end = tz.normalize(tz.localize(datetime.combine(day + timedelta(days=1), time.min)))
+        key = day.isoformat()
+        self._today[tz_name] = (key, start.astimezone(timezone.utc), end.astimezone(timezone.utc))
+        return key
+
+    async def sleep(self, seconds: float):
+        await self.source.sleep(seconds)
+
+    async def wait(self, event: asyncio.Event, timeout: float) -> bool:
+        """Espera a `event` como máximo `timeout` segundos; devuelve si quedó seteado"""
+        return await self.source.wait(event, timeout)
+
+
+clock = Clock()
@@ -1,9 +1,11 @@
 import os
-import json
-import aiofiles
-import asyncio
-from typing import Dict, List, Optional
+import traceback
+from typing import Dict, List, Optional, Set, Tuple
 from dotenv import load_dotenv
+from utils.fileio import FileLock, atomic_write, file_signature, read_json, write_json
+from utils.records import DailyEntry, MessageRef, date_key, load_dailies, dump_dailies, load_messages, dump_messages
+from utils.clock import clock
+from utils.tracing import traced
 
 load_dotenv()
 
@@ -17,11 +19,64 @@ class Config:
         self.TIMEZONE = os.getenv('TIMEZONE', 'America/Buenos_Aires')
         self.DAILY_HOUR = int(os.getenv('DAILY_HOUR', 10))
         self.DAILY_MINUTE = int(os.getenv('DAILY_MINUTE', 0))
+
+        # Sharding: sin valores, discord.py usa la cantidad de shards recomendada
+        self.SHARD_COUNT = int(os.getenv('SHARD_COUNT', 0)) or None
+        self.SHARD_IDS = [int(shard_id.strip()) for shard_id in os.getenv('SHARD_IDS', '').split(',') if shard_id.strip()] or None
+        # Cantidad máxima de guilds procesados en paralelo por el scheduler
+        self.GUILD_CONCURRENCY = max(1, int(os.getenv('GUILD_CONCURRENCY', 5)))
+
+        # Modo de bajo consumo de memoria: solo se cachean los miembros de los roles del equipo
+        self.LOW_MEMORY_MODE = os.getenv('LOW_MEMORY_MODE', 'false').lower() in ('1', 'true', 'yes', 'si', 'sí')
+        self.ROSTER_REFRESH_MINUTES = max(1, int(os.getenv('ROSTER_REFRESH_MINUTES', 15)))
+
+        # Sincronizar los slash commands solo en GUILD_ID (se ven al instante) en lugar de globalmente
+        self.SYNC_GUILD_ONLY = os.getenv('SYNC_GUILD_ONLY', 'false').lower() in ('1', 'true', 'yes', 'si', 'sí')
+
+        # Endpoint de métricas estilo Prometheus (deshabilitado con puerto 0)
+        self.METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+        self.METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+        # Health checks HTTP (/healthz y /readyz, deshabilitados con puerto 0)
+        self.HEALTH_PORT = int(os.getenv('HEALTH_PORT', 0))
+        self.HEALTH_HOST = os.getenv('HEALTH_HOST', '127.0.0.1')
+        # /readyz falla si el p95 del retraso del event loop supera este valor
+        self.HEALTH_MAX_LAG_MS = float(os.getenv('HEALTH_MAX_LAG_MS', 1000))
+        # El watchdog loguea el stack si el event loop queda bloqueado más que esto
+        self.LOOP_STALL_SECONDS = float(os.getenv('LOOP_STALL_SECONDS', 10))
+
+        # Segundos que el apagado espera envíos y escrituras en curso antes de cancelarlos
+        self.SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 20))
+
+        # Un hilo por día (desde el encabezado) para las dailies, y embeds agrupados por mensaje
+        self.DAILY_THREADS = os.getenv('DAILY_THREADS', 'false').lower() in ('1', 'true', 'yes', 'si', 'sí')
+        self.DAILY_BATCH_SECONDS = max(0.0, float(os.getenv('DAILY_BATCH_SECONDS', 0)))
+        # Publicar las dailies con el bot ('bot') o con un pool de webhooks del canal ('webhook')
+        self.POSTING_BACKEND = os.getenv('POSTING_BACKEND', 'bot').strip().lower()
+        self.WEBHOOK_POOL_SIZE = min(10, max(1, int(os.getenv('WEBHOOK_POOL_SIZE', 3))))
+
+        # Segundos que se recuerda una daily en curso o recién enviada para descartar duplicados
+        self.INFLIGHT_TTL_SECONDS = max(1.0, float(os.getenv('INFLIGHT_TTL_SECONDS', 600)))
+
+        # Segundos que se agrupan los cambios antes de editar el tablero de estado fijado
+        self.STATUS_BOARD_DEBOUNCE = max(1.0, float(os.getenv('STATUS_BOARD_DEBOUNCE', 5)))
+
+        # Tracing: operaciones más lentas que SLOW_OP_MS van a data/slow_ops.jsonl
+        self.SLOW_OP_MS = float(os.getenv('SLOW_OP_MS', 1000))
+        self.TRACE_BUFFER_SIZE = max(1, int(os.getenv('TRACE_BUFFER_SIZE', 50)))
         
-        self.DATA_DIR = 'data'
+        self.DATA_DIR = os.getenv('DATA_DIR', 'data')
         self.SCHEDULE_FILE = os.path.join(self.DATA_DIR, 'schedule.json')
         self.DAILIES_FILE = os.path.join(self.DATA_DIR, 'dailies.json')
         self.MESSAGES_FILE = os.path.join(self.DATA_DIR, 'messages.json')
+        self.GUILDS_FILE = os.path.join(self.DATA_DIR, 'guilds.json')
+        self.MEMBERS_FILE = os.path.join(self.DATA_DIR, 'members.json')
+        self.COMMAND_TREE_FILE = os.path.join(self.DATA_DIR, 'command_tree.json')
+        self.SLOW_OPS_FILE = os.path.join(self.DATA_DIR, 'slow_ops.jsonl')
+        self.SCHEDULER_STATE_FILE = os.path.join(self.DATA_DIR, 'scheduler_state.json')
+        self.STATUS_BOARD_FILE = os.path.join(self.DATA_DIR, 'status_board.json')
+        self.DAILY_THREADS_FILE = os.path.join(self.DATA_DIR, 'daily_threads.json')
+        self.ARCHIVE_DIR = os.path.join(self.DATA_DIR, 'archive')
         
         self._ensure_data_dir()
     
@@ -29,13 +84,149 @@ class Config:
         if not os.path.exists(self.DATA_DIR):
             os.makedirs(self.DATA_DIR)
 
+class GuildSettings:
+    """Configuración de un servidor: canal de dailies, roles, admin y zona horaria"""
+
+    FIELDS = ('dailies_channel_id', 'team_roles', 'admin_role_id', 'timezone')
+
+    def __init__(self, guild_id: int, dailies_channel_id: int = 0, team_roles: Optional[List[int]] = None,
+                 admin_role_id: int = 0, timezone: str = 'America/Buenos_Aires'):
+        self.guild_id = guild_id
+        self.dailies_channel_id = dailies_channel_id
+        self.team_roles = list(team_roles or [])
+        self.admin_role_id = admin_role_id
+        self.timezone = timezone
+
+    @classmethod
+    def from_env(cls, guild_id: int, config: 'Config') -> 'GuildSettings':
+        # Los valores del .env solo aplican al servidor de GUILD_ID (o a todos si no está definido)
+        if config.GUILD_ID and guild_id != config.GUILD_ID:
+            return cls(guild_id, timezone=config.TIMEZONE)
+        return cls(
+            guild_id,
+            dailies_channel_id=config.DAILIES_CHANNEL_ID,
+            team_roles=config.PRODUCT_TEAM_ROLES,
+            admin_role_id=config.ADMIN_ROLE_ID,
+            timezone=config.TIMEZONE
+        )
+
+    @classmethod
+    def from_dict(cls, guild_id: int, data: Dict, defaults: 'GuildSettings') -> 'GuildSettings':
+        return cls(
+            guild_id,
+            dailies_channel_id=int(data.get('dailies_channel_id', defaults.dailies_channel_id) or 0),
+            team_roles=[int(role_id) for role_id in data.get('team_roles', defaults.team_roles)],
+            admin_role_id=int(data.get('admin_role_id', defaults.admin_role_id) or 0),
+            timezone=data.get('timezone') or defaults.timezone
+        )
+
+    def is_admin(self, member) -> bool:
+        if self.admin_role_id:
+            return any(role.id == self.admin_role_id for role in member.roles)
+        # Sin rol de admin configurado: permitir a los administradores del servidor
+        return member.guild_permissions.administrator
+
+    def to_dict(self) -> Dict:
+        return {
+            'dailies_channel_id': self.dailies_channel_id,
+            'team_roles': list(self.team_roles),
+            'admin_role_id': self.admin_role_id,
+            'timezone': self.timezone
+        }
+
+class GuildSettingsStore:
+    """Configuración por servidor en `guilds.json`, cacheada en memoria por guild_id"""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.guilds_file = config.GUILDS_FILE
+        self._lock = FileLock(self.guilds_file)
+        self._cache: Dict[int, GuildSettings] = {}
+        self._signature = None
+
+    async def load(self):
+        try:
+            data = await read_json(self.guilds_file) or {}
+            self._signature = file_signature(self.guilds_file)
+        except FileNotFoundError:
+            data = {}
+        except Exception as e:
+            print(f"Error loading guild settings: {e}")
+            return
+        self._cache = {
+            int(guild_id): GuildSettings.from_dict(int(guild_id), entry, GuildSettings.from_env(int(guild_id), self.config))
+            for guild_id, entry in data.items()
+        }
+
+    async def reload_if_changed(self):
+        """Recarga si otro proceso modificó el archivo"""
+        current = file_signature(self.guilds_file)
+        if current is not None and current != self._signature:
+            await self.load()
+
+    def signature(self):
+        """Cambia cada vez que se reescribe `guilds.json` (en este u otro proceso)"""
+        return file_signature(self.guilds_file)
+
+    def get(self, guild_id: int) -> GuildSettings:
+        settings = self._cache.get(guild_id)
+        if settings is None:
+            settings = GuildSettings.from_env(guild_id, self.config)
+            self._cache[guild_id] = settings
+        return settings
+
+    async def update(self, guild_id: int, **changes) -> bool:
+        unknown = set(changes) - set(GuildSettings.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown guild settings: {', '.join(sorted(unknown))}")
+        async with self._lock:
+            try:
+                try:
+                    data = await read_json(self.guilds_file) or {}
+                except FileNotFoundError:
+                    data = {}
+                current = GuildSettings.from_dict(guild_id, data.get(str(guild_id), {}), GuildSettings.from_env(guild_id, self.config))
+                for field, value in changes.items():
+                    setattr(current, field, value)
+                data[str(guild_id)] = current.to_dict()
+                await write_json(self.guilds_file, data)
+                self._signature = file_signature(self.guilds_file)
+                self._cache[guild_id] = current
+                return True
+            except Exception as e:
+                print(f"Error saving guild settings: {e}")
+                return False
+
 class ScheduleManager:
+    """Horarios con nombre en `schedule.json`.
+
+    Cada horario está asociado a un servidor (`guild_id`, 0 = todos) y a un conjunto
+    de roles (`roles`, vacío = roles del equipo del servidor), con sus propios días,
+    hora de envío, recordatorio y hora de cierre del día.
+
+    Los nombres son por servidor: en el archivo cada horario se guarda bajo
+    `schedule_key(guild_id, name)`. Los horarios globales (como `default`) son la
+    base de todos los servidores; editarlos desde un servidor crea una copia
+    propia de ese servidor en lugar de cambiarlos para todos.
+    """
+
+    DEFAULT_NAME = 'default'
+
     def __init__(self, config: Config):
         self.config = config
         self.schedule_file = config.SCHEDULE_FILE
-        
-    async def load_schedule(self) -> Dict:
-        default_schedule = {
+        self._lock = FileLock(self.schedule_file)
+
+    @staticmethod
+    def schedule_key(guild_id: int, name: str) -> str:
+        """Clave del horario en el archivo: los globales conservan su nombre"""
+        return name if not guild_id else f"{guild_id}:{name}"
+
+    def default_schedule(self, guild_id: int = 0, roles: Optional[List[int]] = None, name: str = DEFAULT_NAME) -> Dict:
+        return {
+            "name": name,
+            "guild_id": guild_id,
+            "roles": list(roles or []),
             "enabled": True,
             "days": ["monday", "tuesday", "wednesday", "thursday", "friday"],
             "hour": self.config.DAILY_HOUR,
@@ -43,248 +234,488 @@ class ScheduleManager:
             "custom_schedule": False,
             "reminder_enabled": False,
             "reminder_hour": 14,
-            "reminder_minute": 0
+            "reminder_minute": 0,
+            "end_of_day_hour": 23,
+            "end_of_day_minute": 59
         }
-        
+
+    def _normalize(self, data: Dict) -> Dict:
+        # Formato anterior: un único horario en la raíz del archivo
+        if 'schedules' not in data:
+            data = {'schedules': {self.DEFAULT_NAME: data}}
+        schedules = {}
+        for key, schedule in data['schedules'].items():
+            # Formato anterior: horarios de servidor guardados solo por nombre
+            schedule = {**self.default_schedule(name=key), **schedule}
+            schedules[self.schedule_key(schedule['guild_id'], schedule['name'])] = schedule
+        data['schedules'] = schedules
+        return data
+
+    def _initial_data(self) -> Dict:
+        return {'schedules': {self.DEFAULT_NAME: self.default_schedule()}}
+
+    async def _read_data(self) -> Optional[Dict]:
+        """Contenido del archivo; None si no existe o ninguna generación es legible"""
         try:
-            async with aiofiles.open(self.schedule_file, 'r') as f:
-                content = await f.read()
-                if not content.strip():
-                    # Archivo vacío, usar default
-                    await self.save_schedule(default_schedule)
-                    return default_schedule
-                return json.loads(content)
+            data = await read_json(self.schedule_file)
         except FileNotFoundError:
-            await self.save_schedule(default_schedule)
-            return default_schedule
-        except json.JSONDecodeError as e:
-            print(f"Error decoding schedule JSON: {e}")
-            # Archivo corrupto, recrear con valores por defecto
-            await self.save_schedule(default_schedule)
-            return default_schedule
+            return None
+        return self._normalize(data) if data is not None else None
+
+    async def _load_data(self) -> Dict:
+        try:
+            data = await self._read_data()
         except Exception as e:
             print(f"Error loading schedule: {e}")
-            return default_schedule
-    
-    async def save_schedule(self, schedule: Dict):
+            return self._initial_data()
+        if data is None:
+            # Crear el archivo con el horario por defecto, bajo el lock como cualquier escritura
+            async with self._lock:
+                data = await self._load_locked()
+                if not os.path.exists(self.schedule_file):
+                    await self._save_data(data)
+        return data
+
+    async def _load_locked(self) -> Dict:
+        """Lectura para un read-modify-write: llamar con `self._lock` tomado"""
+        return await self._read_data() or self._initial_data()
+
+    async def _save_data(self, data: Dict) -> bool:
         try:
-            async with aiofiles.open(self.schedule_file, 'w') as f:
-                await f.write(json.dumps(schedule, indent=2))
+            await write_json(self.schedule_file, data)
             return True
         except Exception as e:
             print(f"Error saving schedule: {e}")
             return False
-    
-    async def update_days(self, days: List[str]):
-        schedule = await self.load_schedule()
-        schedule['days'] = days
-        schedule['custom_schedule'] = True
-        return await self.save_schedule(schedule)
-    
-    async def update_time(self, hour: int, minute: int):
-        schedule = await self.load_schedule()
-        schedule['hour'] = hour
-        schedule['minute'] = minute
-        return await self.save_schedule(schedule)
-    
-    async def toggle_enabled(self, enabled: bool):
-        schedule = await self.load_schedule()
-        schedule['enabled'] = enabled
-        return await self.save_schedule(schedule)
-    
-    async def update_reminder(self, enabled: bool, hour: int = None, minute: int = None):
-        schedule = await self.load_schedule()
-        schedule['reminder_enabled'] = enabled
+
+    def signature(self):
+        """Cambia cada vez que se reescribe `schedule.json` (en este u otro proceso)"""
+        return file_signature(self.schedule_file)
+
+    async def load_all(self) -> Dict[str, Dict]:
+        """Todos los horarios por clave (`schedule_key`)"""
+        return (await self._load_data())['schedules']
+
+    def for_guild(self, schedules: Dict[str, Dict], guild_id: int) -> List[Tuple[str, Dict]]:
+        """(clave, horario) de los horarios que aplican a un servidor, por prioridad.
+
+        Un horario propio reemplaza al global del mismo nombre. Primero van los que
+        tienen roles propios, después los propios del servidor y al final los
+        globales: un miembro que entra en varios recibe solo el primero.
+        """
+        own = {schedule['name'] for schedule in schedules.values() if schedule['guild_id'] == guild_id}
+        applicable = [
+            (key, schedule) for key, schedule in schedules.items()
+            if schedule['guild_id'] == guild_id or (not schedule['guild_id'] and schedule['name'] not in own)
+        ]
+        return sorted(applicable, key=lambda item: (not item[1]['roles'], not item[1]['guild_id'], item[1]['name']))
+
+    async def list_schedules(self, guild_id: int) -> List[str]:
+        """Nombres de los horarios que aplican a un servidor"""
+        return sorted(schedule['name'] for _, schedule in self.for_guild(await self.load_all(), guild_id))
+
+    def _resolve(self, schedules: Dict[str, Dict], guild_id: int, name: str) -> Optional[str]:
+        """Clave del horario `name` para el servidor: el propio o, si no hay, el global"""
+        for key in (self.schedule_key(guild_id, name), name):
+            schedule = schedules.get(key)
+            if schedule is not None and schedule['guild_id'] in (0, guild_id):
+                return key
+        return None
+
+    async def load_schedule(self, name: str = DEFAULT_NAME, guild_id: int = 0) -> Dict:
+        schedules = await self.load_all()
+        key = self._resolve(schedules, guild_id, name)
+        return schedules[key] if key is not None else self.default_schedule(name=name)
+
+    async def save_schedule(self, schedule: Dict, name: str = DEFAULT_NAME):
+        schedule = {**schedule, 'name': name}
+        async with self._lock:
+            data = await self._load_locked()
+            data['schedules'][self.schedule_key(schedule['guild_id'], name)] = schedule
+            return await self._save_data(data)
+
+    async def _update(self, name: str, guild_id: int, **changes):
+        async with self._lock:
+            data = await self._load_locked()
+            schedules = data['schedules']
+            key = self._resolve(schedules, guild_id, name)
+            if key is None:
+                return False
+            if guild_id and not schedules[key]['guild_id']:
+                # Editar un horario global desde un servidor: copia propia del servidor
+                key = self.schedule_key(guild_id, name)
+                schedules[key] = {**schedules[name], 'guild_id': guild_id}
+            schedules[key].update(changes)
+            return await self._save_data(data)
+
+    async def create_schedule(self, name: str, guild_id: int, roles: Optional[List[int]] = None) -> bool:
+        async with self._lock:
+            data = await self._load_locked()
+            if self._resolve(data['schedules'], guild_id, name) is not None:
+                return False
+            data['schedules'][self.schedule_key(guild_id, name)] = self.default_schedule(guild_id, roles, name)
+            return await self._save_data(data)
+
+    async def delete_schedule(self, name: str, guild_id: int) -> bool:
+        """Elimina un horario propio del servidor (nunca `default` ni uno global)"""
+        if name == self.DEFAULT_NAME or not guild_id:
+            return False
+        async with self._lock:
+            data = await self._load_locked()
+            if data['schedules'].pop(self.schedule_key(guild_id, name), None) is None:
+                return False
+            return await self._save_data(data)
+
+    # `guild_id=0` edita el horario global; desde un servidor, su copia propia
+
+    async def update_roles(self, roles: List[int], name: str = DEFAULT_NAME, guild_id: int = 0):
+        return await self._update(name, guild_id, roles=list(roles))
+
+    async def update_days(self, days: List[str], name: str = DEFAULT_NAME, guild_id: int = 0):
+        return await self._update(name, guild_id, days=days, custom_schedule=True)
+
+    async def update_time(self, hour: int, minute: int, name: str = DEFAULT_NAME, guild_id: int = 0):
+        return await self._update(name, guild_id, hour=hour, minute=minute)
+
+    async def update_end_of_day(self, hour: int, minute: int, name: str = DEFAULT_NAME, guild_id: int = 0):
+        return await self._update(name, guild_id, end_of_day_hour=hour, end_of_day_minute=minute)
+
+    async def toggle_enabled(self, enabled: bool, name: str = DEFAULT_NAME, guild_id: int = 0):
+        return await self._update(name, guild_id, enabled=enabled)
+
+    async def update_reminder(self, enabled: bool, hour: int = None, minute: int = None, name: str = DEFAULT_NAME,
+                              guild_id: int = 0):
+        changes = {'reminder_enabled': enabled}
         if hour is not None:
-            schedule['reminder_hour'] = hour
+            changes['reminder_hour'] = hour
         if minute is not None:
-            schedule['reminder_minute'] = minute
-        return await self.save_schedule(schedule)
-    
-    async def toggle_reminder_enabled(self, enabled: bool):
-        schedule = await self.load_schedule()
-        schedule['reminder_enabled'] = enabled
-        return await self.save_schedule(schedule)
+            changes['reminder_minute'] = minute
+        return await self._update(name, guild_id, **changes)
+
+    async def toggle_reminder_enabled(self, enabled: bool, name: str = DEFAULT_NAME, guild_id: int = 0):
+        return await self._update(name, guild_id, reminder_enabled=enabled)
+
+class MemberPreferencesStore:
+    """Preferencias por usuario en `members.json` (por ahora, la zona horaria)"""
+
+    def __init__(self, config: Config, guild_settings: GuildSettingsStore):
+        self.config = config
+        self.guild_settings = guild_settings
+        self.members_file = config.MEMBERS_FILE
+        self._lock = FileLock(self.members_file)
+        self._timezones: Dict[int, str] = {}
+        self._signature = None
+
+    async def load(self):
+        try:
+            data = await read_json(self.members_file) or {}
+            self._signature = file_signature(self.members_file)
+        except FileNotFoundError:
+            data = {}
+        except Exception as e:
+            print(f"Error loading member preferences: {e}")
+            return
+        self._timezones = {
+            int(user_id): entry['timezone']
+            for user_id, entry in data.items() if entry.get('timezone')
+        }
+
+    async def reload_if_changed(self) -> Set[int]:
+        """Relee el archivo si otro proceso lo cambió; devuelve los usuarios cuya zona cambió"""
+        if self.signature() == self._signature:
+            return set()
+        before = self._timezones
+        await self.load()
+        return {user_id for user_id in before.keys() | self._timezones.keys()
+                if before.get(user_id) != self._timezones.get(user_id)}
+
+    def signature(self):
+        return file_signature(self.members_file)
+
+    def get_timezone(self, user_id: int) -> Optional[str]:
+        return self._timezones.get(user_id)
+
+    def timezone_for(self, guild_id: int, user_id: Optional[int] = None) -> str:
+        """Zona horaria efectiva: la del usuario si la configuró, si no la del servidor"""
+        if user_id is not None:
+            timezone = self._timezones.get(user_id)
+            if timezone:
+                return timezone
+        return self.guild_settings.get(guild_id).timezone
+
+    async def set_timezone(self, user_id: int, timezone: Optional[str]) -> bool:
+        """Guarda la zona horaria del usuario (None vuelve a la del servidor)"""
+        async with self._lock:
+            try:
+                try:
+                    data = await read_json(self.members_file) or {}
+                except FileNotFoundError:
+                    data = {}
+                entry = data.setdefault(str(user_id), {})
+                if timezone:
+                    entry['timezone'] = timezone
+                else:
+                    entry.pop('timezone', None)
+                    if not entry:
+                        del data[str(user_id)]
+                await write_json(self.members_file, data)
+                self._signature = file_signature(self.members_file)
+                if timezone:
+                    self._timezones[user_id] = timezone
+                else:
+                    self._timezones.pop(user_id, None)
+                return True
+            except Exception as e:
+                print(f"Error saving member preferences: {e}")
+                return False
 
 class DailiesStorage:
-    def __init__(self, config: Config):
+    """Dailies por fecha, servidor y usuario.
+
+    La fecha ("hoy") de cada daily se resuelve en la zona horaria del usuario, así
+    que en un mismo momento dos miembros de un servidor pueden estar en días distintos.
+    Las dailies se mantienen en memoria como `DailyEntry` con IDs enteros y se
+    releen solo si otro proceso reescribió el archivo.
+    """
+
+    def __init__(self, config: Config, member_prefs: MemberPreferencesStore):
         self.config = config
+        self.member_prefs = member_prefs
         self.dailies_file = config.DAILIES_FILE
-        self._lock = asyncio.Lock()  # Lock para evitar condiciones de carrera
+        self._lock = FileLock(self.dailies_file)  # Lock entre corrutinas y entre procesos
+        self._dailies: Dict[str, Dict[int, Dict[int, DailyEntry]]] = {}
+        self._signature = None
+
+    def today_key(self, guild_id: int, user_id: Optional[int] = None) -> str:
+        return date_key(clock.today_key(self.member_prefs.timezone_for(guild_id, user_id)))
+
+    def signature(self):
+        return file_signature(self.dailies_file)
+
+    async def _load(self) -> Dict[str, Dict[int, Dict[int, DailyEntry]]]:
+        """Dailies en memoria; se releen si el archivo cambió desde la última lectura"""
+        current = self.signature()
+        if current is None or current != self._signature:
+            try:
+                data = await read_json(self.dailies_file) or {}
+            except FileNotFoundError:
+                data = {}
+            self._dailies = load_dailies(data)
+            self._signature = current
+        return self._dailies
+
+    async def _save(self, dailies: Dict[str, Dict[int, Dict[int, DailyEntry]]]):
+        """Escribe `dailies` y recién entonces las deja en memoria.
+
+        Las lecturas sin lock (`has_submitted_today`) nunca ven una daily que no
+        llegó al disco.
+        """
+        try:
+            await write_json(self.dailies_file, dump_dailies(dailies))
+        except BaseException:
+            # No se sabe si el archivo quedó escrito: releer en el próximo acceso
+            self._signature = None
+            raise
+        self._dailies = dailies
+        self._signature = self.signature()
     
+    @traced('storage.save_daily', root=False)
     async def save_daily(self, user_id: int, guild_id: int, daily_data: Dict):
         async with self._lock:  # Usar lock para evitar condiciones de carrera
             try:
-                # Intentar cargar dailies existentes
-                dailies = {}
-                try:
-                    async with aiofiles.open(self.dailies_file, 'r') as f:
-                        content = await f.read()
-                        if content.strip():  # Solo parsear si el archivo no está vacío
-                            dailies = json.loads(content)
-                except FileNotFoundError:
-                    # Archivo no existe, usar diccionario vacío
-                    dailies = {}
-                except json.JSONDecodeError as e:
-                    print(f"Warning: Corrupted dailies file, starting fresh. Error: {e}")
-                    # Archivo corrupto, hacer backup y empezar de nuevo
-                    import shutil
-                    from datetime import datetime
-                    backup_name = f"{self.dailies_file}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    try:
-                        shutil.copy2(self.dailies_file, backup_name)
-                        print(f"Backup created: {backup_name}")
-                    except:
-                        pass
-                    dailies = {}
-                
-                from datetime import datetime
-                import pytz
-                
-                tz = pytz.timezone(self.config.TIMEZONE)
-                today = datetime.now(tz).strftime('%Y-%m-%d')
+                # Cargar dailies existentes (recuperando la generación anterior si hace falta)
+                dailies = await self._load()
                 
-                # Asegurar estructura del diccionario
-                if today not in dailies:
-                    dailies[today] = {}
-                
-                if str(guild_id) not in dailies[today]:
-                    dailies[today][str(guild_id)] = {}
+                tz_name = self.member_prefs.timezone_for(guild_id, user_id)
+                today = date_key(clock.today_key(tz_name))
+                guilds = dailies.get(today, {})
+                users = guilds.get(guild_id, {})
                 
                 # Verificar si ya existe una daily para este usuario hoy
-                if str(user_id) in dailies[today][str(guild_id)]:
+                if user_id in users:
                     print(f"User {user_id} already has a daily for today")
                     return False  # Ya existe una daily
                 
-                dailies[today][str(guild_id)][str(user_id)] = {
+                entry = DailyEntry.from_dict({
                     **daily_data,
-                    'timestamp': datetime.now(tz).isoformat()
-                }
+                    'timestamp': clock.now(tz_name).isoformat()
+                })
                 
-                # Guardar con manejo de errores
-                async with aiofiles.open(self.dailies_file, 'w') as f:
-                    await f.write(json.dumps(dailies, indent=2, ensure_ascii=False))
+                # Guardar con escritura atómica; se copian solo los mapas que cambian
+                await self._save({**dailies, today: {**guilds, guild_id: {**users, user_id: entry}}})
                 
                 return True
             except Exception as e:
                 print(f"Error saving daily: {e}")
-                import traceback
                 traceback.print_exc()
                 return False
     
-    async def get_today_dailies(self, guild_id: int) -> Dict:
+    async def get_guild_dailies(self, guild_id: int) -> Dict[str, Dict[int, DailyEntry]]:
+        """Dailies guardadas de un servidor: fecha -> user_id -> daily (no modificar)"""
         try:
-            async with aiofiles.open(self.dailies_file, 'r') as f:
-                content = await f.read()
-                if not content.strip():  # Archivo vacío
-                    return {}
-                dailies = json.loads(content)
-            
-            from datetime import datetime
-            import pytz
-            
-            tz = pytz.timezone(self.config.TIMEZONE)
-            today = datetime.now(tz).strftime('%Y-%m-%d')
-            
-            if today in dailies and str(guild_id) in dailies[today]:
-                return dailies[today][str(guild_id)]
-            
-            return {}
-        except FileNotFoundError:
-            return {}
-        except json.JSONDecodeError as e:
-            print(f"Warning: Corrupted dailies file when reading. Error: {e}")
-            return {}
+            dailies = await self._load()
         except Exception as e:
             print(f"Error getting dailies: {e}")
-            import traceback
             traceback.print_exc()
             return {}
+        return {date_str: guilds_map[guild_id] for date_str, guilds_map in dailies.items() if guild_id in guilds_map}
+    
+    async def get_today_dailies(self, guild_id: int) -> Dict[int, DailyEntry]:
+        """Dailies de "hoy" de cada usuario del servidor, según su zona horaria"""
+        result = {}
+        for date_str, users_map in (await self.get_guild_dailies(guild_id)).items():
+            for user_id, entry in users_map.items():
+                if date_str == self.today_key(guild_id, user_id):
+                    result[user_id] = entry
+        return result
     
     async def has_submitted_today(self, user_id: int, guild_id: int) -> bool:
-        dailies = await self.get_today_dailies(guild_id)
-        return str(user_id) in dailies
+        try:
+            dailies = await self._load()
+        except Exception as e:
+            print(f"Error getting dailies: {e}")
+            return False
+        return user_id in dailies.get(self.today_key(guild_id, user_id), {}).get(guild_id, {})
 
     async def clear_all_dailies(self):
         """Limpia completamente el archivo de dailies"""
         async with self._lock:
             try:
-                async with aiofiles.open(self.dailies_file, 'w') as f:
-                    await f.write('{}')
+                await atomic_write(self.dailies_file, '{}')
+                self._dailies = {}
+                self._signature = self.signature()
                 return True
             except Exception as e:
                 print(f"Error clearing dailies: {e}")
                 return False
 
+    async def prune_guild_dailies(self, guild_id: int, keep_from: str):
+        """Elimina las dailies de un servidor con fecha anterior a `keep_from`"""
+        async with self._lock:
+            try:
+                dailies = await self._load()
+                pruned = {}
+                changed = False
+                for date_str, guilds in dailies.items():
+                    if date_str < keep_from and guild_id in guilds:
+                        guilds = {other: users for other, users in guilds.items() if other != guild_id}
+                        changed = True
+                    if guilds:
+                        pruned[date_str] = guilds
+                if changed:
+                    await self._save(pruned)
+                return True
+            except Exception as e:
+                print(f"Error pruning dailies for guild {guild_id}: {e}")
+                return False
+
 class DailyMessagesStorage:
+    """Referencias a los DMs con el botón de la daily: fecha -> guild_id -> user_id -> `MessageRef`"""
+
     def __init__(self, config: Config):
         self.config = config
         self.messages_file = config.MESSAGES_FILE
-        self._lock = asyncio.Lock()
+        self._lock = FileLock(self.messages_file)
+        self._messages: Dict[str, Dict[int, Dict[int, MessageRef]]] = {}
+        self._signature = None
 
-    async def _read_all(self):
-        try:
-            async with aiofiles.open(self.messages_file, 'r') as f:
-                content = await f.read()
-                if not content.strip():
-                    return {}
-                return json.loads(content)
-        except FileNotFoundError:
-            return {}
-        except json.JSONDecodeError:
-            return {}
-        except Exception as e:
-            print(f"Error reading messages store: {e}")
-            return {}
+    def signature(self):
+        return file_signature(self.messages_file)
 
-    async def _write_all(self, data: dict) -> bool:
+    async def _read_all(self) -> Dict[str, Dict[int, Dict[int, MessageRef]]]:
+        current = self.signature()
+        if current is None or current != self._signature:
+            try:
+                data = await read_json(self.messages_file) or {}
+            except FileNotFoundError:
+                data = {}
+            except Exception as e:
+                print(f"Error reading messages store: {e}")
+                data = {}
+            self._messages = load_messages(data)
+            self._signature = current
+        return self._messages
+
+    async def _write_all(self) -> bool:
         try:
-            async with aiofiles.open(self.messages_file, 'w') as f:
-                await f.write(json.dumps(data, indent=2, ensure_ascii=False))
-            return True
+            await write_json(self.messages_file, dump_messages(self._messages))
         except Exception as e:
             print(f"Error writing messages store: {e}")
+            self._signature = None
             return False
+        self._signature = self.signature()
+        return True
 
+    @traced('messages.save_message', root=False)
     async def save_message(self, user_id: int, guild_id: int, channel_id: int, message_id: int, date_str: str) -> bool:
         async with self._lock:
             data = await self._read_all()
-            if date_str not in data:
-                data[date_str] = {}
-            if str(guild_id) not in data[date_str]:
-                data[date_str][str(guild_id)] = {}
-            data[date_str][str(guild_id)][str(user_id)] = {
-                'channel_id': int(channel_id),
-                'message_id': int(message_id),
-                'disabled': bool(data[date_str][str(guild_id)].get(str(user_id), {}).get('disabled', False))
-            }
-            return await self._write_all(data)
-
-    async def list_all(self) -> dict:
+            users = data.setdefault(date_key(date_str), {}).setdefault(guild_id, {})
+            previous = users.get(user_id)
+            users[user_id] = MessageRef(int(channel_id), int(message_id), previous is not None and previous.disabled)
+            return await self._write_all()
+
+    @traced('messages.list_all', root=False)
+    async def list_all(self) -> Dict[str, Dict[int, Dict[int, MessageRef]]]:
         return await self._read_all()
 
-    async def list_for_date(self, date_str: str) -> dict:
+    @traced('messages.list_for_date', root=False)
+    async def list_for_date(self, date_str: str) -> Dict[int, Dict[int, MessageRef]]:
         data = await self._read_all()
         return data.get(date_str, {})
 
+    @traced('messages.mark_disabled', root=False)
     async def mark_disabled(self, user_id: int, guild_id: int, date_str: str) -> bool:
         async with self._lock:
             data = await self._read_all()
-            try:
-                if date_str in data and str(guild_id) in data[date_str] and str(user_id) in data[date_str][str(guild_id)]:
-                    data[date_str][str(guild_id)][str(user_id)]['disabled'] = True
-                    return await self._write_all(data)
-            except Exception:
-                pass
-            return False
+            ref = data.get(date_str, {}).get(guild_id, {}).get(user_id)
+            if ref is None:
+                return False
+            ref.disabled = True
+            return await self._write_all()
 
-    async def delete_date(self, date_str: str) -> bool:
+    @traced('messages.find_guild_for_message', root=False)
+    async def find_guild_for_message(self, user_id: int, message_id: int) -> Optional[int]:
+        """Devuelve el guild al que pertenece un DM de daily enviado al usuario"""
+        data = await self._read_all()
+        for guilds_map in data.values():
+            for guild_id, users_map in guilds_map.items():
+                ref = users_map.get(user_id)
+                if ref is not None and ref.message_id == message_id:
+                    return guild_id
+        return None
+
+    @traced('messages.prune_guild', root=False)
+    async def prune_guild(self, guild_id: int, keep_from: str) -> bool:
+        """Elimina las referencias de un servidor con fecha anterior a `keep_from`"""
+        async with self._lock:
+            data = await self._read_all()
+            changed = False
+            for date_str in list(data):
+                if date_str < keep_from and guild_id in data[date_str]:
+                    del data[date_str][guild_id]
+                    if not data[date_str]:
+                        del data[date_str]
+                    changed = True
+            return await self._write_all() if changed else True
+
+    @traced('messages.delete_date', root=False)
+    async def delete_date(self, date_str: str, guild_id: Optional[int] = None, user_ids: Optional[set] = None) -> bool:
         async with self._lock:
             data = await self._read_all()
-            if date_str in data:
+            if date_str not in data:
+                return True
+            if guild_id is None:
                 del data[date_str]
-                return await self._write_all(data)
-            return True
+            else:
+                users = data[date_str].get(guild_id, {})
+                for user_id in (user_ids if user_ids is not None else list(users)):
+                    users.pop(user_id, None)
+                if not users:
+                    data[date_str].pop(guild_id, None)
+                if not data[date_str]:
+                    del data[date_str]
+            return await self._write_all()
 
 def sort_days(days: list) -> list:
     """Ordena los días de la semana en orden cronológico"""
@@ -307,6 +738,24 @@ def format_days_spanish(days: list) -> str:
     return ", ".join([days_map.get(day, day.capitalize()) for day in sorted_days])
 
 config = Config()
-schedule_manager = ScheduleManager(config)
-dailies_storage = DailiesStorage(config)
-messages_storage = DailyMessagesStorage(config)
\ No newline at end of file
+
+# Los stores se crean recién cuando alguien los importa (PEP 562), así los scripts
+# y herramientas que solo necesitan `config` no pagan su inicialización.
+_SINGLETONS = {
+    'guild_settings': lambda: GuildSettingsStore(config),
+    'member_prefs': lambda: MemberPreferencesStore(config, __getattr__('guild_settings')),
+    'schedule_manager': lambda: ScheduleManager(config),
+    'dailies_storage': lambda: DailiesStorage(config, __getattr__('member_prefs')),
+    'messages_storage': lambda: DailyMessagesStorage(config),
+}
+
+def __getattr__(name: str):
+    # Las factories se llaman entre sí por acá: reusar el store si ya se creó
+    if name in globals():
+        return globals()[name]
+    factory = _SINGLETONS.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    instance = factory()
+    globals()[name] = instance
+    return instance
\ No newline at end of file
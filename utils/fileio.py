@@ -0,0 +1,232 @@
+import os
+import json
+import shutil
+import time
+import asyncio
+import weakref
+import itertools
+import aiofiles
+import aiofiles.os
+from typing import Any, Dict, Optional, Tuple
+from utils import metrics, tracing
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo lock dentro del proceso
+    fcntl = None
+
+# Sufijo de los temporales: dos escrituras del mismo proceso nunca comparten archivo
+_tmp_ids = itertools.count(1)
+
+# Escrituras completadas y bytes escritos por este proceso (simulaciones y métricas)
+write_stats: Dict[str, int] = {'writes': 0, 'bytes': 0}
+
+# Locks creados por este proceso, para esperar las escrituras en curso al apagar
+_locks: 'weakref.WeakSet[FileLock]' = weakref.WeakSet()
+
+
+def prev_path(path: str) -> str:
+    return f"{path}.prev"
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """(mtime en ns, inodo, tamaño) de `path`, o None si no existe.
+
+    Cambia con cada escritura, de este u otro proceso: `atomic_write` crea un
+    archivo nuevo (otro inodo) aunque el mtime coincida por la resolución del
+    sistema de archivos o un reloj que retrocede.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_ino, st.st_size
+
+
+def _fsync_dir(directory: str):
+    # En algunas plataformas (Windows) no se puede abrir un directorio
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _keep_previous(path: str):
+    """Conserva la generación actual como `.prev` sin dejar de tener `path`"""
+    if not os.path.exists(path):
+        return
+    prev = prev_path(path)
+    staging = f"{prev}.tmp.{os.getpid()}"
+    try:
+        os.link(path, staging)
+    except OSError:
+        shutil.copy2(path, staging)
+    os.replace(staging, prev)
+
+
+class FileLock:
+    """Lock para read-modify-write sobre un archivo de `data/`.
+
+    Combina un asyncio.Lock (corrutinas del mismo proceso) con un lock advisory
+    `flock` sobre `<archivo>.lock`, de modo que varios procesos que comparten el
+    volumen de datos no pisen sus escrituras. El lock de archivo se adquiere en
+    modo no bloqueante con reintentos para no bloquear el event loop y poder
+    cancelarse limpiamente.
+    """
+
+    def __init__(self, path: str):
+        self.lock_file = f"{path}.lock"
+        self._lock = asyncio.Lock()
+        self._fd: Optional[int] = None
+        _locks.add(self)
+
+    def _try_flock(self) -> bool:
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return True
+
+    async def acquire(self):
+        with tracing.span('lock.wait', root=False, file=os.path.basename(self.lock_file)):
+            await self._lock.acquire()
+            if fcntl is None:
+                return
+            try:
+                delay = 0.005
+                while not self._try_flock():
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 0.1)
+            except BaseException:
+                self._lock.release()
+                raise
+
+    def release(self):
+        if self._fd is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+
+async def drain_locks(timeout: float = 5.0) -> bool:
+    """Espera a que se liberen todos los locks de este proceso (escrituras en curso)"""
+    async def wait_lock(lock: FileLock):
+        async with lock._lock:
+            pass
+
+    locks = list(_locks)
+    if not locks:
+        return True
+    try:
+        await asyncio.wait_for(asyncio.gather(*(wait_lock(lock) for lock in locks)), timeout)
+        return True
+    except asyncio.TimeoutError:
+        print(f"Warning: storage writes still in progress after {timeout}s")
+        return False
+
+
+async def atomic_write(path: str, content: str):
+    """Escribe en un temporal, hace fsync y renombra atómicamente sobre `path`.
+
+    Un lector concurrente ve siempre la generación anterior completa o la nueva
+    completa, nunca un archivo truncado. La anterior queda en `<archivo>.prev`
+    para recuperación.
+    """
+    started = time.perf_counter()
+    tmp = f"{path}.tmp.{os.getpid()}.{next(_tmp_ids)}"
+    try:
+        async with aiofiles.open(tmp, 'w') as f:
+            await f.write(content)
+            await f.flush()
+            await asyncio.to_thread(os.fsync, f.fileno())
+        await asyncio.to_thread(_keep_previous, path)
+        await aiofiles.os.replace(tmp, path)
+        await asyncio.to_thread(_fsync_dir, os.path.dirname(path) or '.')
+    except BaseException:
+        try:
+            await aiofiles.os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    size = len(content.encode('utf-8'))
+    write_stats['writes'] += 1
+    write_stats['bytes'] += size
+    name = os.path.basename(path)
+    metrics.storage_seconds.observe(time.perf_counter() - started, 'write', name)
+    metrics.storage_bytes.inc('write', name, amount=size)
+
+
+async def write_json(path: str, data: Any):
+    with tracing.span('json.write', root=False, file=os.path.basename(path)):
+        await atomic_write(path, json.dumps(data, indent=2, ensure_ascii=False))
+
+
+async def _read_json_file(path: str) -> Optional[Any]:
+    started = time.perf_counter()
+    async with aiofiles.open(path, 'r') as f:
+        content = await f.read()
+        size = os.fstat(f.fileno()).st_size
+    name = os.path.basename(path)
+    metrics.storage_seconds.observe(time.perf_counter() - started, 'read', name)
+    metrics.storage_bytes.inc('read', name, amount=size)
+    if not content.strip():
+        return None
+    return json.loads(content)
+
+
+async def read_json(path: str) -> Optional[Any]:
+    """Lee `path`; si está vacío o corrupto recupera la generación anterior.
+
+    Devuelve None si no existe ninguna generación legible. Lanza
+    FileNotFoundError solo si no existe ni el archivo ni su `.prev`.
+    """
+    with tracing.span('json.read', root=False, file=os.path.basename(path)):
+        return await _read_json_recovering(path)
+
+
+async def _read_json_recovering(path: str) -> Optional[Any]:
+    try:
+        data = await _read_json_file(path)
+        if data is not None:
+            return data
+        error = "empty file"
+    except FileNotFoundError:
+        if not os.path.exists(prev_path(path)):
+            raise
+        error = "missing file"
+    except json.JSONDecodeError as e:
+        error = str(e)
+
+    print(f"Warning: could not read {path} ({error}), recovering previous generation")
+    try:
+        return await _read_json_file(prev_path(path))
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError as e:
+        print(f"Warning: previous generation of {path} is also unreadable: {e}")
+        return None
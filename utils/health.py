@@ -0,0 +1,235 @@
+import os
+import sys
+import json
+import math
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from utils.clock import clock
+from utils import metrics
+
+logger = logging.getLogger('DailiesBot.Health')
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class LoopMonitor:
+    """Watchdog del event loop.
+
+    Una tarea mide cada `interval` segundos cuánto tarde despierta un timer (el
+    retraso del loop) y guarda las últimas `window` mediciones. Un thread aparte
+    revisa que esas mediciones sigan llegando: si el loop queda bloqueado más de
+    `stall_seconds` (un `json.dumps` enorme, una llamada síncrona colgada) loguea
+    el stack del thread del loop, porque desde el propio loop no se puede ver.
+    """
+
+    def __init__(self, interval: float = 0.5, stall_seconds: float = 10.0, window: int = 600):
+        self.interval = interval
+        self.stall_seconds = stall_seconds
+        self.lags = deque(maxlen=window)
+        self.stalls = 0
+        self.last_beat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread = 0
+
+    async def _measure(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.lags.append(lag)
+            self.last_beat = time.monotonic()
+            metrics.loop_lag_seconds.observe(lag)
+            metrics.loop_lag_last.set(lag)
+
+    def _watch(self):
+        reported = False
+        while not self._stop.wait(self.interval):
+            blocked = self.blocked_for()
+            if blocked < self.stall_seconds:
+                reported = False
+                continue
+            if reported:
+                continue
+            reported = True
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else 'unavailable'
+            logger.warning(f"Event loop blocked for {blocked:.1f}s, current stack:\n{stack}")
+
+    def blocked_for(self) -> float:
+        """Segundos que lleva el loop sin atender el timer del watchdog"""
+        return max(0.0, time.monotonic() - self.last_beat - self.interval)
+
+    def summary(self) -> Dict:
+        lags = list(self.lags)
+        return {
+            'samples': len(lags),
+            'last_ms': round(lags[-1] * 1000, 2) if lags else 0.0,
+            'p50_ms': round(_percentile(lags, 50) * 1000, 2),
+            'p95_ms': round(_percentile(lags, 95) * 1000, 2),
+            'p99_ms': round(_percentile(lags, 99) * 1000, 2),
+            'max_ms': round(max(lags, default=0.0) * 1000, 2),
+            'blocked_s': round(self.blocked_for(), 2),
+            'stalls': self.stalls
+        }
+
+    def start(self):
+        self._loop_thread = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._thread = threading.Thread(target=self._watch, name='dailies-loop-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+class HealthChecks:
+    """Endpoints `/healthz` (el proceso está vivo) y `/readyz` (puede enviar dailies).
+
+    `/healthz` falla si el gateway lleva más de `disconnect_grace` segundos caído
+    o si la tarea del scheduler murió; un loop bloqueado directamente no responde.
+    `/readyz` además exige conexión al gateway, la cola del scheduler armada,
+    `data/` escribible y un retraso p95 del loop menor a `max_lag_ms`.
+    """
+
+    def __init__(self, bot, monitor: LoopMonitor, max_lag_ms: float = 1000, disconnect_grace: float = 300,
+                 storage_ttl: float = 30):
+        self.bot = bot
+        self.monitor = monitor
+        self.max_lag_ms = max_lag_ms
+        self.disconnect_grace = disconnect_grace
+        self.storage_ttl = storage_ttl
+        self._disconnected_since: Optional[float] = None
+        self._storage: Optional[Dict] = None
+        self._storage_checked = 0.0
+
+    def gateway(self) -> Dict:
+        shards = {
+            shard_id: {'connected': not shard.is_closed(), 'latency_ms': self._ms(shard.latency)}
+            for shard_id, shard in getattr(self.bot, 'shards', {}).items()
+        }
+        connected = self.bot.is_ready() and not self.bot.is_closed() and all(s['connected'] for s in shards.values())
+        now = time.monotonic()
+        if connected:
+            self._disconnected_since = None
+        elif self._disconnected_since is None:
+            self._disconnected_since = now
+        return {
+            'connected': connected,
+            'latency_ms': self._ms(self.bot.latency),
+            'disconnected_s': round(now - self._disconnected_since, 1) if self._disconnected_since else 0.0,
+            'guilds': len(self.bot.guilds),
+            'shards': shards
+        }
+
+    def scheduler(self) -> Dict:
+        cog = self.bot.get_cog('DailyScheduler')
+        if cog is None:
+            return {'running': False, 'next_fire': None, 'timers': 0, 'jobs': 0}
+        return cog.status()
+
+    async def storage(self) -> Dict:
+        """Prueba de escritura en DATA_DIR, cacheada `storage_ttl` segundos"""
+        from utils.config import config
+        now = time.monotonic()
+        if self._storage is None or now - self._storage_checked > self.storage_ttl:
+            path = os.path.join(config.DATA_DIR, '.healthcheck')
+            try:
+                await asyncio.to_thread(self._probe, path)
+                self._storage = {'writable': True}
+            except OSError as e:
+                self._storage = {'writable': False, 'error': str(e)}
+            self._storage_checked = now
+        return self._storage
+
+    @staticmethod
+    def _probe(path: str):
+        with open(path, 'w') as f:
+            f.write(clock.now_utc().isoformat())
+            f.flush()
+            os.fsync(f.fileno())
+        os.remove(path)
+
+    @staticmethod
+    def _ms(seconds) -> Optional[float]:
+        return round(seconds * 1000, 1) if seconds is not None and math.isfinite(seconds) else None
+
+    async def report(self) -> Dict:
+        gateway = self.gateway()
+        scheduler = self.scheduler()
+        storage = await self.storage()
+        loop = self.monitor.summary()
+        live = scheduler['running'] and gateway['disconnected_s'] < self.disconnect_grace
+        ready = (live and gateway['connected'] and scheduler['next_fire'] is not None
+                 and storage['writable'] and loop['p95_ms'] < self.max_lag_ms)
+        return {
+            'live': live,
+            'ready': ready,
+            'gateway': gateway,
+            'scheduler': scheduler,
+            'storage': storage,
+            'loop': loop
+        }
+
+    async def _respond(self, key: str):
+        from aiohttp import web
+        report = await self.report()
+        return web.json_response(report, status=200 if report[key] else 503, dumps=lambda data: json.dumps(data, default=str))
+
+    async def _handle_healthz(self, request):
+        return await self._respond('live')
+
+    async def _handle_readyz(self, request):
+        return await self._respond('ready')
+
+    def add_routes(self, app):
+        app.router.add_get('/healthz', self._handle_healthz)
+        app.router.add_get('/readyz', self._handle_readyz)
+
+
+class HttpServer:
+    """Servidor HTTP local sobre el aiohttp que ya trae discord.py.
+
+    Recibe funciones `add_routes(app)` (métricas, health checks) para poder
+    servir varias en el mismo puerto.
+    """
+
+    def __init__(self, host: str, port: int, routes: List[Callable]):
+        self.host = host
+        self.port = port
+        self.routes = routes
+        self._runner = None
+
+    async def start(self):
+        from aiohttp import web
+        app = web.Application()
+        for add_routes in self.routes:
+            add_routes(app)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        paths = ', '.join(sorted(resource.canonical for resource in app.router.resources()))
+        logger.info(f"HTTP endpoints listening on http://{self.host}:{self.port} ({paths})")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
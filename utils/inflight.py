@@ -0,0 +1,80 @@
+from typing import Dict, Hashable, Optional, Tuple
+from utils.config import config, dailies_storage
+from utils.clock import clock
+from utils import metrics
+
+# Estados de una daily en el registro
+SUBMITTING = 'submitting'
+SUBMITTED = 'submitted'
+OPENING = 'opening'
+
+# Segundos en los que un segundo click del mismo botón se toma como doble click
+BUTTON_WINDOW = 3.0
+
+
+class InFlightRegistry:
+    """Registro en memoria de interacciones de dailies en curso.
+
+    Las claves son `(guild_id, user_id, fecha)` para los envíos y
+    `('button', user_id, message_id)` para los clicks del botón del DM. Un doble
+    click o un segundo envío del modal encuentra la clave ocupada y se descarta en
+    O(1), antes de leer `dailies.json` o esperar el lock de `save_daily`. Cada
+    entrada vence a los `ttl` segundos; las vencidas se limpian cada `sweep_every`
+    operaciones.
+    """
+
+    def __init__(self, ttl: float = 600, sweep_every: int = 256):
+        self.ttl = ttl
+        self.sweep_every = sweep_every
+        self._entries: Dict[Hashable, Tuple[str, float]] = {}
+        self._ops = 0
+
+    def _now(self) -> float:
+        return clock.now_utc().timestamp()
+
+    def _sweep(self, now: float):
+        self._ops += 1
+        if self._ops % self.sweep_every:
+            return
+        for key in [key for key, (_, expires) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+
+    def state(self, key: Hashable) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= self._now():
+            del self._entries[key]
+            return None
+        return entry[0]
+
+    def claim(self, key: Hashable, state: str = SUBMITTING, ttl: Optional[float] = None) -> Optional[str]:
+        """Ocupa `key`; si ya estaba ocupada devuelve su estado y no la modifica"""
+        now = self._now()
+        self._sweep(now)
+        current = self.state(key)
+        if current is not None:
+            return current
+        self._entries[key] = (state, now + (self.ttl if ttl is None else ttl))
+        return None
+
+    def mark(self, key: Hashable, state: str, ttl: Optional[float] = None):
+        self._entries[key] = (state, self._now() + (self.ttl if ttl is None else ttl))
+
+    def release(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def absorbed(self, kind: str):
+        """Cuenta una interacción duplicada descartada"""
+        metrics.duplicates_absorbed.inc(kind)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def daily_key(guild_id: int, user_id: int) -> Tuple[int, int, str]:
+    """Clave del envío de hoy de un miembro (fecha en su zona horaria)"""
+    return (guild_id, user_id, dailies_storage.today_key(guild_id, user_id))
+
+
+inflight = InFlightRegistry(ttl=config.INFLIGHT_TTL_SECONDS)
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from functools import wraps
+from typing import Awaitable, Callable, List, Set
+
+logger = logging.getLogger('DailiesBot.Lifecycle')
+
+
+class Lifecycle:
+    """Apagado ordenado del bot.
+
+    1. `on_stop`: se deja de generar trabajo nuevo (p. ej. el scheduler).
+    2. Se espera el trabajo en curso registrado con `add()` / `@tracked` hasta el
+       plazo; lo que no termina se cancela. Las tareas reanudables (fan-outs de
+       DMs, que guardan lo que les faltaba al cancelarse) se cortan a mitad del
+       plazo para dejarle el resto a las que no se pueden retomar (envíos de dailies).
+    3. Se espera a que terminen las escrituras en `data/` (locks de archivo).
+    4. `on_flush`: se persisten cachés e índices en memoria.
+    """
+
+    def __init__(self):
+        self.stopping = False
+        self._work: Set[asyncio.Task] = set()
+        self._resumable: Set[asyncio.Task] = set()
+        self._stop_hooks: List[Callable[[], Awaitable]] = []
+        self._flush_hooks: List[Callable[[], Awaitable]] = []
+        self._done = None
+
+    def add(self, task: asyncio.Task, resumable: bool = False) -> asyncio.Task:
+        """Registra una tarea que el apagado tiene que esperar.
+
+        `resumable=True` si al cancelarla guarda lo pendiente para el próximo arranque.
+        """
+        work = self._resumable if resumable else self._work
+        work.add(task)
+        task.add_done_callback(work.discard)
+        return task
+
+    def in_flight(self) -> int:
+        return sum(1 for task in self._work | self._resumable if not task.done())
+
+    def on_stop(self, hook: Callable[[], Awaitable]):
+        self._stop_hooks.append(hook)
+
+    def on_flush(self, hook: Callable[[], Awaitable]):
+        self._flush_hooks.append(hook)
+
+    async def _run_hooks(self, hooks, label: str):
+        for hook in hooks:
+            try:
+                await hook()
+            except Exception as e:
+                logger.error(f"Error in {label} hook {getattr(hook, '__qualname__', hook)}: {e}")
+
+    async def _wait(self, work: Set[asyncio.Task], deadline: float) -> Set[asyncio.Task]:
+        """Espera las tareas de `work` hasta `deadline` y cancela las que no terminaron"""
+        loop = asyncio.get_running_loop()
+        current = asyncio.current_task()
+        # Las tareas pueden registrar trabajo nuevo mientras se espera
+        while True:
+            pending = {task for task in work if not task.done() and task is not current}
+            remaining = deadline - loop.time()
+            if not pending or remaining <= 0:
+                break
+            await asyncio.wait(pending, timeout=remaining)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending, timeout=5)
+        return pending
+
+    async def _drain(self, timeout: float) -> int:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        cancelled = await self._wait(self._resumable, start + timeout / 2)
+        cancelled |= await self._wait(self._work, start + timeout)
+        if cancelled:
+            logger.warning(f"Shutdown deadline reached, cancelled {len(cancelled)} task(s)")
+        return len(cancelled)
+
+    async def shutdown(self, timeout: float = 20.0):
+        """Ejecuta el apagado una sola vez; llamadas concurrentes esperan a la primera"""
+        if self._done is not None:
+            await asyncio.shield(self._done)
+            return
+        self._done = asyncio.get_running_loop().create_future()
+        self.stopping = True
+        try:
+            logger.info(f"Shutting down: {self.in_flight()} task(s) in flight")
+            await self._run_hooks(self._stop_hooks, 'stop')
+            cancelled = await self._drain(timeout)
+
+            from utils.fileio import drain_locks
+            await drain_locks(timeout=5)
+            await self._run_hooks(self._flush_hooks, 'flush')
+            logger.info(f"Shutdown complete ({cancelled} task(s) cancelled)")
+        finally:
+            self._done.set_result(None)
+
+
+lifecycle = Lifecycle()
+
+
+def tracked(func):
+    """Decorador para corrutinas: el apagado espera a que terminen las llamadas en curso"""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        task = asyncio.current_task()
+        if task is not None:
+            lifecycle.add(task)
+        return await func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,153 @@
+import re
+import logging
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('DailiesBot.Metrics')
+
+# Registro global de métricas, en el orden en que se declaran
+_registry: List['Metric'] = []
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Metric:
+    """Métrica en formato de texto de Prometheus. Los labels se pasan por posición"""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, object] = {}
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labels, key)} {value}' for key, value in self._values.items()]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._function: Optional[Callable[[], Dict[Tuple, float]]] = None
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+    def set_function(self, function: Callable[[], Dict[Tuple, float]]):
+        """Calcula los valores recién al exportar (labels -> valor)"""
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                self._values = dict(self._function())
+            except Exception as e:
+                logger.error(f"Error collecting {self.name}: {e}")
+        return super()._samples()
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        state = self._values.get(labels)
+        if state is None:
+            # [conteo por bucket (+Inf al final), suma, cantidad]
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {count}')
+        return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# Métricas del bot
+dm_sent = Counter('dailies_dm_sent_total', 'DMs enviados por tipo', ('kind',))
+dm_failed = Counter('dailies_dm_failed_total', 'DMs que no se pudieron enviar por tipo y motivo', ('kind', 'reason'))
+submit_ack_seconds = Histogram('dailies_submit_ack_seconds', 'Tiempo desde el envío de la daily hasta la confirmación al usuario')
+storage_seconds = Histogram('dailies_storage_seconds', 'Latencia de lectura/escritura de archivos de datos',
+                            ('op', 'file'), buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+storage_bytes = Counter('dailies_storage_bytes_total', 'Bytes leídos/escritos en archivos de datos', ('op', 'file'))
+fire_lag_seconds = Histogram('dailies_scheduler_fire_lag_seconds', 'Demora del disparo respecto de la hora programada',
+                             ('kind',), buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0))
+ratelimited = Counter('dailies_discord_ratelimited_total', 'Respuestas 429 de Discord por ruta', ('route',))
+loop_lag_seconds = Histogram('dailies_event_loop_lag_seconds', 'Retraso del event loop medido por el watchdog',
+                             buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+loop_lag_last = Gauge('dailies_event_loop_lag_last_seconds', 'Último retraso medido del event loop')
+roster_size = Gauge('dailies_roster_size', 'Miembros del equipo por servidor', ('guild',))
+bucket_remaining = Gauge('dailies_discord_bucket_remaining', 'Requests restantes del último bucket visto por ruta', ('route',))
+bucket_limit = Gauge('dailies_discord_bucket_limit', 'Límite del último bucket visto por ruta', ('route',))
+pacer_delay_seconds = Gauge('dailies_pacer_delay_seconds', 'Separación actual entre envíos masivos', ('pacer',))
+board_edits = Counter('dailies_status_board_edits_total', 'Ediciones del tablero de estado fijado por tipo', ('kind',))
+duplicates_absorbed = Counter('dailies_duplicate_interactions_total', 'Clicks y envíos de daily duplicados descartados antes de tocar el storage', ('kind',))
+
+
+_ID_SEGMENT = re.compile(r'/\d{15,25}')
+_TOKEN_SEGMENT = re.compile(r'(/(?:webhooks|interactions)/\{id\}/)[^/]+')
+
+
+def route_of(method: str, path: str) -> str:
+    """Ruta sin IDs ni tokens, p. ej. 'POST /channels/{id}/messages'"""
+    path = path.split('/api/v', 1)[-1]
+    path = path[path.find('/'):] if '/' in path else path
+    path = _TOKEN_SEGMENT.sub(r'\1{token}', _ID_SEGMENT.sub('/{id}', path))
+    return f'{method} {path}'
+
+
+async def _handle_metrics(request):
+    from aiohttp import web
+    return web.Response(body=render().encode('utf-8'),
+                        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+
+def add_routes(app):
+    """Agrega `/metrics` a una app de aiohttp (ver `utils.health.HttpServer`)"""
+    app.router.add_get('/metrics', _handle_metrics)
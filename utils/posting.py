@@ -0,0 +1,270 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from utils.config import config, member_prefs
+from utils.clock import clock
+from utils import tracing
+from utils.fileio import FileLock, read_json, write_json
+from utils.ratelimit import ratelimits
+
+logger = logging.getLogger('DailiesBot.Posting')
+
+# Discord acepta hasta 10 embeds por mensaje
+MAX_EMBEDS = 10
+
+
+def _status(error) -> int:
+    return getattr(error, 'status', 0)
+
+
+class WebhookPool:
+    """Webhooks propios del bot en cada canal, usados por turnos.
+
+    Cada webhook tiene su propio bucket de rate limit, separado del del bot en el
+    canal, y todos los webhooks de un canal comparten un tope de
+    `channel_limit` mensajes cada `channel_period` segundos. Un envío usa el
+    próximo webhook con cupo según su bucket (y los envíos suyos en curso); si
+    ninguno tiene, o el canal llegó a su tope, `send` devuelve None y la daily
+    sale con el bot en lugar de quedar esperando un 429. Se reutilizan los
+    webhooks que el bot ya creó (mismo nombre y con token) y se crean los que
+    falten hasta `size`. Si no hay permiso para gestionar webhooks el canal
+    queda en el bot durante `retry_after` segundos.
+    """
+
+    NAME = 'Dailies Bot'
+    ROUTE = 'POST /webhooks/{id}/{token}'
+
+    def __init__(self, size: int = 3, retry_after: float = 600, channel_limit: int = 30, channel_period: float = 60):
+        self.size = size
+        self.retry_after = retry_after
+        self.channel_limit = channel_limit
+        self.channel_period = channel_period
+        self._pools: Dict[int, List] = {}
+        self._turn: Dict[int, int] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # channel_id -> instante hasta el que se publica con el bot
+        self._disabled: Dict[int, float] = {}
+        # channel_id -> instantes de los últimos envíos por webhook (tope del canal)
+        self._sent: Dict[int, Deque[float]] = {}
+        # webhook_id -> envíos en curso
+        self._inflight: Dict[int, int] = {}
+
+    def available(self, channel_id: int) -> bool:
+        return self._disabled.get(channel_id, 0.0) <= clock.now_utc().timestamp()
+
+    async def _pool(self, channel) -> List:
+        pool = self._pools.get(channel.id)
+        if pool:
+            return pool
+        async with self._locks.setdefault(channel.id, asyncio.Lock()):
+            pool = self._pools.get(channel.id)
+            if pool:
+                return pool
+            with tracing.span('discord.webhooks', root=False):
+                pool = [webhook for webhook in await channel.webhooks() if webhook.name == self.NAME and webhook.token]
+                while len(pool) < self.size:
+                    pool.append(await channel.create_webhook(name=self.NAME, reason="Publicación de dailies"))
+            self._pools[channel.id] = pool = pool[:self.size]
+            logger.info(f"Webhook pool ready for channel {channel.id} ({len(pool)} webhooks)")
+            return pool
+
+    def _has_quota(self, webhook) -> bool:
+        major = f"{webhook.id}/{webhook.token}"
+        if ratelimits.blocked_for(self.ROUTE, major):
+            return False
+        remaining = ratelimits.remaining(self.ROUTE, major)
+        # Sin headers todavía (o con el bucket ya reseteado) va de a un envío por webhook
+        return self._inflight.get(webhook.id, 0) < (remaining if remaining is not None else 1)
+
+    def _next(self, channel_id: int, pool: List):
+        """Próximo webhook con cupo, o None si el canal llegó a su tope o ninguno tiene"""
+        now = clock.now_utc().timestamp()
+        sent = self._sent.setdefault(channel_id, deque())
+        while sent and sent[0] <= now - self.channel_period:
+            sent.popleft()
+        if len(sent) >= self.channel_limit:
+            return None
+        turn = self._turn.get(channel_id, 0)
+        for offset in range(len(pool)):
+            webhook = pool[(turn + offset) % len(pool)]
+            if self._has_quota(webhook):
+                self._turn[channel_id] = turn + offset + 1
+                sent.append(now)
+                return webhook
+        return None
+
+    async def send(self, channel, embeds, author=None, thread=None):
+        """Publica `embeds` con el próximo webhook con cupo de `channel`; None si no hay ninguno"""
+        try:
+            pool = await self._pool(channel)
+        except Exception as e:
+            if _status(e) == 403:
+                self._disabled[channel.id] = clock.now_utc().timestamp() + self.retry_after
+            raise
+        webhook = self._next(channel.id, pool)
+        if webhook is None:
+            return None
+
+        kwargs = {'thread': thread} if thread is not None else {}
+        if author is not None:
+            kwargs['username'] = author.display_name
+            kwargs['avatar_url'] = author.display_avatar.url if author.display_avatar else None
+        self._inflight[webhook.id] = self._inflight.get(webhook.id, 0) + 1
+        try:
+            with tracing.span('discord.webhook_send', root=False, embeds=len(embeds)):
+                return await webhook.send(embeds=embeds, wait=True, **kwargs)
+        except Exception as e:
+            if _status(e) == 404:
+                # Alguien borró el webhook: el pool se rearma en el próximo envío
+                self._pools.pop(channel.id, None)
+            raise
+        finally:
+            self._inflight[webhook.id] -= 1
+
+
+class DailyPoster:
+    """Publicación de las dailies en el canal del equipo.
+
+    Con `DAILY_THREADS` cada día abre un hilo desde el encabezado con la fecha y
+    las dailies se publican ahí en lugar de en el canal. Con `DAILY_BATCH_SECONDS`
+    los embeds que llegan juntos se agrupan (hasta 10 por mensaje) y se envían al
+    vencer el timer o al completar el mensaje; quien publica espera a que su
+    embed salga, así un error sigue llegando al usuario. Con un `WebhookPool`
+    las dailies salen por webhooks con el nombre y avatar del miembro; si
+    ningún webhook tiene cupo, o ante cualquier error, se publican con el bot.
+    """
+
+    def __init__(self, threads: bool = False, batch_seconds: float = 0.0, webhooks: Optional[WebhookPool] = None):
+        self.threads_enabled = threads
+        self.batch_seconds = batch_seconds
+        self.webhooks = webhooks
+        # guild_id -> {'date', 'thread_id'}
+        self.threads: Dict[int, Dict] = {}
+        self._loaded = False
+        self._lock = FileLock(config.DAILY_THREADS_FILE)
+        # id del destino -> (destino, canal, [(embed, autor, future)])
+        self._batches: Dict[int, Tuple[object, object, List]] = {}
+        self._timers: Dict[int, asyncio.Task] = {}
+
+    async def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            data = await read_json(config.DAILY_THREADS_FILE) or {}
+        except FileNotFoundError:
+            data = {}
+        except Exception as e:
+            logger.error(f"Error loading daily threads: {e}")
+            data = {}
+        self.threads = {int(guild_id): entry for guild_id, entry in data.items()}
+
+    async def _save(self):
+        async with self._lock:
+            await write_json(config.DAILY_THREADS_FILE, {str(guild_id): entry for guild_id, entry in self.threads.items()})
+
+    async def open_thread(self, guild, message, name: str):
+        """Abre el hilo del día desde el encabezado (solo con `DAILY_THREADS`)"""
+        if not self.threads_enabled:
+            return None
+        await self._load()
+        try:
+            with tracing.span('discord.create_thread', root=False):
+                thread = await message.create_thread(name=name, auto_archive_duration=1440)
+        except Exception as e:
+            logger.warning(f"Cannot create daily thread in {guild.name}, posting to the channel: {e}")
+            return None
+        self.threads[guild.id] = {'date': clock.today_key(member_prefs.timezone_for(guild.id)), 'thread_id': thread.id}
+        await self._save()
+        logger.info(f"Opened daily thread in {guild.name}")
+        return thread
+
+    async def destination(self, guild, channel):
+        """Hilo de hoy del servidor, o el canal si no hay hilo"""
+        if not self.threads_enabled:
+            return channel
+        await self._load()
+        entry = self.threads.get(guild.id)
+        if entry is None or entry['date'] != clock.today_key(member_prefs.timezone_for(guild.id)):
+            return channel
+        thread = guild.get_thread(entry['thread_id'])
+        if thread is None:
+            try:
+                thread = await guild.fetch_channel(entry['thread_id'])
+            except Exception:
+                # Hilo borrado: el resto del día se publica en el canal
+                self.threads.pop(guild.id, None)
+                await self._save()
+                return channel
+        return thread
+
+    async def post(self, guild, channel, embed, author=None):
+        """Publica el embed de una daily en el hilo del día o en el canal"""
+        destination = await self.destination(guild, channel)
+        if self.batch_seconds <= 0:
+            return await self._send(destination, channel, [embed], author)
+
+        future = asyncio.get_running_loop().create_future()
+        _, _, pending = self._batches.setdefault(destination.id, (destination, channel, []))
+        pending.append((embed, author, future))
+        if len(pending) >= MAX_EMBEDS:
+            await self._flush(destination.id)
+        elif destination.id not in self._timers:
+            self._timers[destination.id] = asyncio.create_task(self._flush_later(destination.id))
+        return await future
+
+    async def _send(self, destination, channel, embeds, author=None):
+        if self.webhooks is not None and self.webhooks.available(channel.id):
+            thread = destination if destination.id != channel.id else None
+            try:
+                message = await self.webhooks.send(channel, embeds, author, thread)
+                if message is not None:
+                    return message
+            except Exception as e:
+                logger.warning(f"Webhook post failed in channel {channel.id}, posting as the bot: {e}")
+        with tracing.span('discord.channel_send', root=False, embeds=len(embeds)):
+            return await destination.send(embeds=embeds)
+
+    async def _flush_later(self, destination_id: int):
+        try:
+            await clock.sleep(self.batch_seconds)
+        except asyncio.CancelledError:
+            return
+        finally:
+            if self._timers.get(destination_id) is asyncio.current_task():
+                del self._timers[destination_id]
+        await self._flush(destination_id)
+
+    async def _flush(self, destination_id: int):
+        timer = self._timers.pop(destination_id, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        destination, channel, pending = self._batches.pop(destination_id, (None, None, []))
+        if not pending:
+            return
+        # Con un solo autor el mensaje sale con su nombre; si no, con el del webhook
+        authors = {getattr(author, 'id', None) for _, author, _ in pending}
+        author = pending[0][1] if len(authors) == 1 else None
+        try:
+            message = await self._send(destination, channel, [embed for embed, _, _ in pending], author)
+        except Exception as e:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for _, _, future in pending:
+            if not future.done():
+                future.set_result(message)
+
+    async def flush(self):
+        """Envía los lotes pendientes sin esperar el timer (apagado)"""
+        for destination_id in list(self._batches):
+            await self._flush(destination_id)
+
+
+daily_poster = DailyPoster(
+    config.DAILY_THREADS,
+    config.DAILY_BATCH_SECONDS,
+    WebhookPool(config.WEBHOOK_POOL_SIZE) if config.POSTING_BACKEND == 'webhook' else None
+)
@@ -0,0 +1,175 @@
+import os
+import sys
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+# Frames del thread del loop que indican que está esperando eventos (sin trabajo)
+_IDLE_FUNCTIONS = {'select', 'poll', '_poll', 'epoll'}
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Callback del loop que corre cada paso de una tarea: los stacks se cortan ahí
+_HANDLE_RUN = asyncio.events.Handle._run.__code__
+
+
+def _location(code) -> str:
+    name = getattr(code, 'co_qualname', code.co_name)
+    filename = code.co_filename
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{name} ({filename}:{code.co_firstlineno})"
+
+
+def _frame_stack(frame) -> Tuple[str, ...]:
+    """Stack de funciones desde el callback que corre el loop hasta `frame`"""
+    stack = []
+    while frame is not None and frame.f_code is not _HANDLE_RUN:
+        stack.append(_location(frame.f_code))
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+def _await_stack(coro) -> Tuple[Tuple[str, ...], Optional[str]]:
+    """Cadena de corrutinas que está esperando una tarea y el último punto en código del bot"""
+    stack = []
+    site = None
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        location = f"{_location(frame.f_code)} @{frame.f_lineno}"
+        stack.append(location)
+        if frame.f_code.co_filename.startswith(_ROOT):
+            site = location
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+    return tuple(stack), site or (stack[-1] if stack else None)
+
+
+class Profile:
+    """Resultado de una captura: muestras del thread del loop y de las tareas en espera"""
+
+    def __init__(self, seconds: float, interval: float):
+        self.seconds = seconds
+        self.interval = interval
+        self.started_at = datetime.now(timezone.utc)
+        self.samples = 0
+        self.idle = 0
+        self.stacks: Counter = Counter()
+        self.task_samples = 0
+        self.awaits: Counter = Counter()
+        self.await_sites: Counter = Counter()
+
+    @property
+    def busy(self) -> int:
+        return self.samples - self.idle
+
+    def top_self(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Funciones donde el loop estaba ejecutando (la hoja del stack)"""
+        counts = Counter()
+        for stack, count in self.stacks.items():
+            counts[stack[-1]] += count
+        return counts.most_common(limit)
+
+    def top_total(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Funciones presentes en el stack, incluyendo lo que llaman"""
+        counts = Counter()
+        for stack, count in self.stacks.items():
+            for location in set(stack):
+                counts[location] += count
+        return counts.most_common(limit)
+
+    def top_awaits(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Líneas del bot donde más tiempo pasan suspendidas las tareas"""
+        return self.await_sites.most_common(limit)
+
+    def folded(self) -> str:
+        """Stacks en formato colapsado (flamegraph.pl / speedscope)"""
+        lines = [';'.join(stack) + f' {count}' for stack, count in self.stacks.most_common()]
+        lines.extend(';'.join(('<await>',) + stack) + f' {count}' for stack, count in self.awaits.most_common())
+        return '\n'.join(lines) + '\n'
+
+    def report(self) -> str:
+        def table(title: str, rows: List[Tuple[str, int]], total: int) -> List[str]:
+            lines = [title]
+            for location, count in rows:
+                lines.append(f"  {count / max(total, 1) * 100:6.1f}%  {count:6d}  {location}")
+            return lines + ['']
+
+        lines = [
+            f"Perfil de {self.seconds:g} s desde {self.started_at:%Y-%m-%d %H:%M:%S} UTC",
+            f"Muestras: {self.samples} cada {self.interval * 1000:g} ms, loop ocupado en {self.busy} "
+            f"({self.busy / max(self.samples, 1) * 100:.1f}%)",
+            ''
+        ]
+        lines += table("Tiempo propio (ejecutando en el loop):", self.top_self(40), self.busy)
+        lines += table("Tiempo total (incluye llamadas):", self.top_total(40), self.busy)
+        lines += table("Corrutinas en espera:", self.top_awaits(40), self.task_samples)
+        return '\n'.join(lines)
+
+
+class SamplingProfiler:
+    """Profiler por muestreo para el bot en producción.
+
+    Mientras dura una captura, un thread aparte toma el stack del thread del event
+    loop cada `interval` segundos y una tarea del loop registra en qué corrutina
+    está suspendida cada tarea. Fuera de una captura no hay hooks ni threads
+    activos, así que no agrega overhead.
+    """
+
+    def __init__(self, interval: float = 0.005, task_interval: float = 0.05):
+        self.interval = interval
+        self.task_interval = task_interval
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def _sample_thread(self, profile: Profile, thread_id: int, stop: threading.Event):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            profile.samples += 1
+            if frame.f_code.co_name in _IDLE_FUNCTIONS:
+                profile.idle += 1
+                continue
+            profile.stacks[_frame_stack(frame)] += 1
+
+    async def _sample_tasks(self, profile: Profile, caller: Optional[asyncio.Task]):
+        skip = {asyncio.current_task(), caller}
+        while True:
+            await asyncio.sleep(self.task_interval)
+            for task in asyncio.all_tasks():
+                if task in skip:
+                    continue
+                stack, site = _await_stack(task.get_coro())
+                if stack:
+                    profile.task_samples += 1
+                    profile.awaits[stack] += 1
+                    profile.await_sites[site] += 1
+
+    async def capture(self, seconds: float) -> Optional[Profile]:
+        """Perfila el loop durante `seconds`; devuelve None si ya hay una captura en curso"""
+        if self.running:
+            return None
+        async with self._lock:
+            profile = Profile(seconds, self.interval)
+            stop = threading.Event()
+            sampler = threading.Thread(target=self._sample_thread, args=(profile, threading.get_ident(), stop),
+                                       name='dailies-profiler', daemon=True)
+            tasks = asyncio.create_task(self._sample_tasks(profile, asyncio.current_task()))
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                stop.set()
+                tasks.cancel()
+                await asyncio.to_thread(sampler.join)
+            return profile
+
+
+profiler = SamplingProfiler()
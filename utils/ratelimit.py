@@ -0,0 +1,288 @@
+import re
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.clock import clock
+from utils import metrics
+
+logger = logging.getLogger('DailiesBot.RateLimit')
+
+# Límite global de Discord para un bot: requests por segundo entre todas las rutas
+GLOBAL_LIMIT = 50
+
+# Parámetro mayor de una ruta: cada canal, servidor o webhook tiene sus propios buckets
+_MAJOR = re.compile(r'/(?:channels|guilds)/(\d+)|/webhooks/(\d+)(?:/([^/?]+))?')
+
+# Cada cuánto se descartan los buckets ya reseteados (hay uno por canal de DM)
+PRUNE_SECONDS = 60
+
+
+def _now() -> float:
+    return clock.now_utc().timestamp()
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def major_of(path: str) -> Optional[str]:
+    """ID del canal, servidor o webhook (con su token) de `path`; None si la ruta no tiene"""
+    match = _MAJOR.search(path)
+    if match is None:
+        return None
+    channel_or_guild, webhook, token = match.groups()
+    if channel_or_guild is not None:
+        return channel_or_guild
+    return f"{webhook}/{token}" if token else webhook
+
+
+class RouteState:
+    """Requests y 429 de una ruta (sin IDs), para el diagnóstico y las métricas"""
+
+    __slots__ = ('route', 'bucket', 'requests', 'ratelimited', 'retry_after', 'scope', 'last_429')
+
+    def __init__(self, route: str):
+        self.route = route
+        self.bucket: Optional[str] = None
+        self.requests = 0
+        self.ratelimited = 0
+        self.retry_after = 0.0
+        self.scope: Optional[str] = None
+        self.last_429 = 0.0
+
+
+class BucketState:
+    """Último estado conocido de un bucket: hash de `X-RateLimit-Bucket` más el parámetro mayor"""
+
+    __slots__ = ('route', 'limit', 'remaining', 'reset_at')
+
+    def __init__(self, route: str):
+        self.route = route
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+
+    def blocked_for(self, now: float) -> float:
+        """Segundos hasta que el bucket vuelva a tener cupo (0 si tiene)"""
+        if self.remaining == 0 and self.reset_at > now:
+            return self.reset_at - now
+        return 0.0
+
+
+class GlobalBudget:
+    """Límite global del bot (`limit` requests por segundo) y los 429 globales"""
+
+    __slots__ = ('limit', 'window_start', 'used', 'until')
+
+    def __init__(self, limit: int = GLOBAL_LIMIT):
+        self.limit = limit
+        self.window_start = 0.0
+        self.used = 0
+        self.until = 0.0
+
+    def record(self, now: float):
+        if now - self.window_start >= 1:
+            self.window_start, self.used = now, 0
+        self.used += 1
+
+    def blocked_for(self, now: float) -> float:
+        wait = max(0.0, self.until - now)
+        if self.used >= self.limit and now - self.window_start < 1:
+            wait = max(wait, self.window_start + 1 - now)
+        return wait
+
+
+class RateLimitTracker:
+    """Registro de los headers de rate limit y de los 429 de la API.
+
+    Se alimenta desde el cliente HTTP de discord.py (opción `http_trace`), así que
+    ve también los reintentos que discord.py hace por su cuenta. Como en Discord,
+    cada bucket se identifica por su hash y por el parámetro mayor de la ruta: el
+    DM de un miembro limitado no frena los del resto ni las ediciones del canal
+    de dailies. El límite global se lleva aparte.
+    """
+
+    def __init__(self, global_limit: int = GLOBAL_LIMIT):
+        self.routes: Dict[str, RouteState] = {}
+        # (hash del bucket o ruta si todavía no se conoce, parámetro mayor) -> estado
+        self.buckets: Dict[Tuple[str, Optional[str]], BucketState] = {}
+        self.budget = GlobalBudget(global_limit)
+        self.pacers: List['AdaptivePacer'] = []
+        self._pruned_at = 0.0
+
+    @property
+    def global_until(self) -> float:
+        return self.budget.until
+
+    def state(self, route: str) -> RouteState:
+        state = self.routes.get(route)
+        if state is None:
+            state = self.routes[route] = RouteState(route)
+        return state
+
+    def _key(self, route: str, major) -> Tuple[str, Optional[str]]:
+        state = self.routes.get(route)
+        bucket = state.bucket if state is not None and state.bucket else route
+        return bucket, str(major) if major is not None else None
+
+    def observe(self, method: str, path: str, status: int, headers):
+        route = metrics.route_of(method, path)
+        major = major_of(path)
+        state = self.state(route)
+        now = _now()
+        state.requests += 1
+        self.budget.record(now)
+        if headers.get('X-RateLimit-Bucket'):
+            state.bucket = headers.get('X-RateLimit-Bucket')
+        limit = _float(headers.get('X-RateLimit-Limit'))
+        remaining = _float(headers.get('X-RateLimit-Remaining'))
+        reset_after = _float(headers.get('X-RateLimit-Reset-After'))
+        if limit is not None or remaining is not None or reset_after is not None:
+            key = self._key(route, major)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = BucketState(route)
+            bucket.route = route
+            if limit is not None:
+                bucket.limit = int(limit)
+            if remaining is not None:
+                bucket.remaining = int(remaining)
+            if reset_after is not None:
+                bucket.reset_at = now + reset_after
+        if now - self._pruned_at >= PRUNE_SECONDS:
+            self._prune(now)
+
+        if status != 429:
+            return
+        retry_after = _float(headers.get('Retry-After')) or reset_after or 1.0
+        state.ratelimited += 1
+        state.retry_after = retry_after
+        state.last_429 = now
+        state.scope = headers.get('X-RateLimit-Scope') or ('global' if headers.get('X-RateLimit-Global') else 'user')
+        if state.scope == 'global':
+            self.budget.until = max(self.budget.until, now + retry_after)
+        metrics.ratelimited.inc(route)
+        logger.warning(f"Rate limited on {route} ({state.scope}), retry after {retry_after:.2f}s")
+        for pacer in self.pacers:
+            # Un bucket de un solo canal lo espera discord.py; el fan-out se frena ante
+            # el límite global o un bucket que comparten todos sus envíos
+            if state.scope == 'global' or (major is None and pacer.watches(route)):
+                pacer.backoff(retry_after)
+
+    def _prune(self, now: float):
+        self._pruned_at = now
+        for key in [key for key, bucket in self.buckets.items() if bucket.reset_at <= now]:
+            del self.buckets[key]
+
+    def global_blocked_for(self) -> float:
+        return self.budget.blocked_for(_now())
+
+    def blocked_for(self, route: str, major=None) -> float:
+        """Segundos hasta poder usar `route` sobre `major` (canal, servidor o webhook)"""
+        now = _now()
+        wait = self.budget.blocked_for(now)
+        bucket = self.buckets.get(self._key(route, major))
+        if bucket is not None:
+            wait = max(wait, bucket.blocked_for(now))
+        return wait
+
+    def remaining(self, route: str, major=None) -> Optional[int]:
+        """Cupo que le queda al bucket de `route` sobre `major`; None si no se conoce o ya se reseteó"""
+        bucket = self.buckets.get(self._key(route, major))
+        if bucket is None or bucket.remaining is None or bucket.reset_at <= _now():
+            return None
+        return bucket.remaining
+
+    def live_buckets(self, route: str) -> List[BucketState]:
+        """Buckets de `route` que todavía no se resetearon"""
+        now = _now()
+        return [bucket for bucket in self.buckets.values() if bucket.route == route and bucket.reset_at > now]
+
+    def lowest(self, attribute: str) -> Dict[str, int]:
+        """Por ruta, el menor `remaining` o `limit` entre sus buckets vigentes (métricas)"""
+        now = _now()
+        values: Dict[str, int] = {}
+        for bucket in self.buckets.values():
+            value = getattr(bucket, attribute)
+            if value is None or bucket.reset_at <= now:
+                continue
+            values[bucket.route] = min(value, values.get(bucket.route, value))
+        return values
+
+    def register(self, pacer: 'AdaptivePacer'):
+        self.pacers.append(pacer)
+
+    def trace_config(self):
+        """TraceConfig de aiohttp para el cliente HTTP de discord.py (opción `http_trace`)"""
+        import aiohttp
+
+        async def on_request_end(session, context, params):
+            response = params.response
+            self.observe(params.method, params.url.path, response.status, response.headers)
+
+        config = aiohttp.TraceConfig()
+        config.on_request_end.append(on_request_end)
+        return config
+
+
+class AdaptivePacer:
+    """Espaciado compartido entre envíos masivos (AIMD).
+
+    Cada `pace()` reserva el próximo turno, así que varias tareas en paralelo
+    comparten el mismo ritmo. El piso de la separación sale del límite global:
+    cada envío cuesta `requests` requests y el fan-out usa como mucho `share` del
+    presupuesto, así no llega al límite antes del primer 429. Mientras no haya
+    429 la separación baja de a poco hasta ese piso; ante un 429 global o de un
+    bucket que comparten todos los envíos se duplica (y se respeta el
+    `Retry-After`) hasta `max_delay`.
+    """
+
+    def __init__(self, name: str, tracker: RateLimitTracker, routes: Iterable[str], requests: int,
+                 share: float = 0.8, initial: float = 0.1, max_delay: float = 5.0, decrease: float = 0.95):
+        self.name = name
+        self.tracker = tracker
+        self.routes = tuple(routes)
+        self.min_delay = requests / (tracker.budget.limit * share)
+        self.delay = max(initial, self.min_delay)
+        self.max_delay = max_delay
+        self.decrease = decrease
+        self.backoffs = 0
+        self._next = 0.0
+        self._hold_until = 0.0
+        tracker.register(self)
+
+    def watches(self, route: str) -> bool:
+        return route in self.routes
+
+    def backoff(self, retry_after: float = 0.0):
+        self.backoffs += 1
+        self.delay = min(self.max_delay, self.delay * 2)
+        self._hold_until = max(self._hold_until, _now() + retry_after)
+
+    async def pace(self):
+        """Espera el próximo turno; llamar después de cada envío de un fan-out"""
+        now = _now()
+        if now >= self._hold_until:
+            self.delay = max(self.min_delay, self.delay * self.decrease)
+        start = max(now, self._next, self._hold_until, now + self.tracker.global_blocked_for())
+        self._next = start + self.delay
+        wait = self._next - now
+        if wait > 0:
+            await clock.sleep(wait)
+
+
+ratelimits = RateLimitTracker()
+
+# DMs: abrir el canal con el usuario y enviar la fecha y el botón (3 requests por miembro)
+dm_pacer = AdaptivePacer('dm', ratelimits, ('POST /users/@me/channels', 'POST /channels/{id}/messages'), requests=3)
+# Cierre del día: buscar y editar el mensaje con el botón de cada miembro (2 requests)
+edit_pacer = AdaptivePacer('edit', ratelimits, ('GET /channels/{id}/messages/{id}', 'PATCH /channels/{id}/messages/{id}'),
+                           requests=2)
+
+metrics.bucket_remaining.set_function(
+    lambda: {(route,): value for route, value in ratelimits.lowest('remaining').items()})
+metrics.bucket_limit.set_function(
+    lambda: {(route,): value for route, value in ratelimits.lowest('limit').items()})
+metrics.pacer_delay_seconds.set_function(lambda: {(pacer.name,): pacer.delay for pacer in ratelimits.pacers})
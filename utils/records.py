@@ -0,0 +1,123 @@
+import sys
+from typing import Dict, Optional
+
+# Campos de una daily en `dailies.json`, en el orden en que se guardan
+DAILY_FIELDS = ('feeling', 'yesterday', 'today', 'blockers', 'timestamp')
+
+# Valor que guarda el formulario cuando no se completan los bloqueos
+NO_BLOCKERS = "Sin bloqueos"
+
+
+def date_key(date_str: str) -> str:
+    """Fecha `YYYY-MM-DD` interneada: todas las claves del mismo día son el mismo objeto"""
+    return sys.intern(date_str)
+
+
+class DailyEntry:
+    """Daily enviada por un miembro.
+
+    Con `__slots__` cada entrada ocupa una fracción del dict que devuelve el JSON.
+    Las claves que no son campos conocidos se conservan en `extra` para que
+    `to_dict()` devuelva lo mismo que se leyó.
+    """
+
+    __slots__ = DAILY_FIELDS + ('extra',)
+
+    def __init__(self, feeling: str = '', yesterday: str = '', today: str = '', blockers: str = '',
+                 timestamp: str = '', extra: Optional[Dict] = None):
+        self.feeling = feeling
+        self.yesterday = yesterday
+        self.today = today
+        self.blockers = blockers
+        self.timestamp = timestamp
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DailyEntry':
+        extra = {key: value for key, value in data.items() if key not in DAILY_FIELDS}
+        entry = cls(*(data.get(field, '') for field in DAILY_FIELDS), extra=extra or None)
+        # Ánimo y bloqueos se repiten mucho ("Bien", "Sin bloqueos"): una copia por valor
+        if isinstance(entry.feeling, str):
+            entry.feeling = sys.intern(entry.feeling)
+        if isinstance(entry.blockers, str):
+            entry.blockers = sys.intern(entry.blockers)
+        return entry
+
+    def to_dict(self) -> Dict:
+        data = {field: getattr(self, field) for field in DAILY_FIELDS}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __eq__(self, other):
+        return isinstance(other, DailyEntry) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"DailyEntry(timestamp={self.timestamp!r}, feeling={self.feeling!r})"
+
+
+class MessageRef:
+    """DM con el botón de la daily enviado a un miembro"""
+
+    __slots__ = ('channel_id', 'message_id', 'disabled')
+
+    def __init__(self, channel_id: int, message_id: int, disabled: bool = False):
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.disabled = disabled
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MessageRef':
+        return cls(int(data.get('channel_id', 0)), int(data.get('message_id', 0)), bool(data.get('disabled', False)))
+
+    def to_dict(self) -> Dict:
+        return {'channel_id': self.channel_id, 'message_id': self.message_id, 'disabled': self.disabled}
+
+    def __eq__(self, other):
+        return isinstance(other, MessageRef) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"MessageRef(channel_id={self.channel_id}, message_id={self.message_id}, disabled={self.disabled})"
+
+
+# Ambos archivos tienen la forma fecha -> guild_id -> user_id -> entrada. En disco
+# los IDs son strings; en memoria, ints y fechas interneadas.
+
+def load_dailies(data: Dict) -> Dict[str, Dict[int, Dict[int, DailyEntry]]]:
+    return {
+        date_key(date_str): {
+            int(guild_id): {int(user_id): DailyEntry.from_dict(entry) for user_id, entry in users.items()}
+            for guild_id, users in guilds.items()
+        }
+        for date_str, guilds in data.items()
+    }
+
+
+def dump_dailies(dailies: Dict[str, Dict[int, Dict[int, DailyEntry]]]) -> Dict:
+    return {
+        date_str: {
+            str(guild_id): {str(user_id): entry.to_dict() for user_id, entry in users.items()}
+            for guild_id, users in guilds.items()
+        }
+        for date_str, guilds in dailies.items()
+    }
+
+
+def load_messages(data: Dict) -> Dict[str, Dict[int, Dict[int, MessageRef]]]:
+    return {
+        date_key(date_str): {
+            int(guild_id): {int(user_id): MessageRef.from_dict(entry) for user_id, entry in users.items()}
+            for guild_id, users in guilds.items()
+        }
+        for date_str, guilds in data.items()
+    }
+
+
+def dump_messages(messages: Dict[str, Dict[int, Dict[int, MessageRef]]]) -> Dict:
+    return {
+        date_str: {
+            str(guild_id): {str(user_id): ref.to_dict() for user_id, ref in users.items()}
+            for guild_id, users in guilds.items()
+        }
+        for date_str, guilds in messages.items()
+    }
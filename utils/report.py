@@ -0,0 +1,240 @@
+"""Reportes de participación sobre el archivo de dailies (`utils/archive.py`).
+
+El archivo de un servidor se carga en columnas de NumPy (índice de miembro,
+índice de fecha, segundos desde el pedido, hora local del envío y bloqueos) y
+todos los agregados se calculan con operaciones vectorizadas, sin recorrer las
+filas en Python. La imagen se dibuja con matplotlib.
+
+numpy y matplotlib son opcionales (`requirements-report.txt`): sin ellos
+`available()` devuelve False y el bot funciona igual, sin `/daily_report`.
+"""
+import io
+import re
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Franjas del histograma de hora de envío (media hora)
+HOUR_BINS = 48
+
+
+def available() -> bool:
+    if np is None:
+        return False
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class Participation:
+    """Archivo de un servidor en columnas, una fila por (fecha, miembro)"""
+
+    def __init__(self, user_ids, dates, user, day, after, local, blockers):
+        self.user_ids = user_ids    # IDs de los miembros, ordenados
+        self.dates = dates          # fechas (datetime64[D]), ordenadas
+        self.user = user            # índice en `user_ids` de cada fila
+        self.day = day              # índice en `dates` de cada fila
+        self.after = after          # segundos desde el pedido hasta el envío (nan: no la envió)
+        self.local = local          # hora local del envío en segundos desde la medianoche
+        self.blockers = blockers    # la daily reportó bloqueos
+
+    @property
+    def submitted(self):
+        return ~np.isnan(self.after)
+
+    def __len__(self) -> int:
+        return len(self.user)
+
+
+_ROW = None
+
+# Fila completa del archivo: fecha, ID, segundos desde el pedido, hora local y bloqueos
+_ROW_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2},\d+,(?:-?\d+|nan),(?:\d+|nan),[01]')
+
+
+def _row_dtype():
+    global _ROW
+    if _ROW is None:
+        _ROW = np.dtype([('date', 'M8[D]'), ('user_id', 'i8'), ('after', 'f8'), ('local', 'f8'), ('blockers', 'i1')])
+    return _ROW
+
+
+def _parse_rows(lines):
+    return np.loadtxt(lines, delimiter=',', dtype=_row_dtype(), ndmin=1) if lines else np.empty(0, dtype=_row_dtype())
+
+
+def load_participation(path: str, since: Optional[date] = None, until: Optional[date] = None) -> Participation:
+    """Carga el archivo de `path` (fechas en [since, until]) en columnas"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()[1:]
+    except FileNotFoundError:
+        lines = []
+    return _participation(lines, since, until)
+
+
+def _participation(lines, since: Optional[date] = None, until: Optional[date] = None) -> Participation:
+    # Una fila cortada por un apagado en medio de la escritura no tiene las 5 columnas
+    lines = [line for line in lines if line.count(',') == 4]
+    try:
+        rows = _parse_rows(lines)
+    except ValueError:
+        # Alguna fila tiene las 5 columnas pero no se puede leer (un campo vacío o editado a mano):
+        # se descartan solo esas en lugar de fallar el reporte entero
+        rows = _parse_rows([line for line in lines if _ROW_PATTERN.fullmatch(line)])
+    if since is not None:
+        rows = rows[rows['date'] >= np.datetime64(since, 'D')]
+    if until is not None:
+        rows = rows[rows['date'] <= np.datetime64(until, 'D')]
+
+    user_ids, user = np.unique(rows['user_id'], return_inverse=True)
+    dates, day = np.unique(rows['date'], return_inverse=True)
+    # Si un cierre se repitió, vale la última fila de cada (fecha, miembro)
+    key = day.astype(np.int64) * max(len(user_ids), 1) + user
+    _, last = np.unique(key[::-1], return_index=True)
+    keep = np.sort(len(key) - 1 - last)
+    rows, user, day = rows[keep], user[keep], day[keep]
+    return Participation(user_ids, dates, user, day, rows['after'], rows['local'], rows['blockers'].astype(bool))
+
+
+class Report:
+    """Agregados de participación de un período"""
+
+    def __init__(self, participation: Participation):
+        p = participation
+        self.participation = p
+        users, days = len(p.user_ids), len(p.dates)
+        submitted = p.submitted
+
+        # Mapa de calor miembro x día: 1 enviada, 0 faltó, nan no se le pidió
+        self.heatmap = np.full((users, days), np.nan)
+        self.heatmap[p.user, p.day] = submitted
+
+        prompted = np.bincount(p.user, minlength=users)
+        completed = np.bincount(p.user, weights=submitted, minlength=users)
+        self.member_rate = np.divide(completed, prompted, out=np.zeros(users), where=prompted > 0)
+
+        self.prompts = len(p)
+        self.completed = int(submitted.sum())
+        self.completion_rate = self.completed / self.prompts if self.prompts else 0.0
+
+        after = p.after[submitted]
+        self.after_median = float(np.median(after)) if len(after) else None
+        self.after_p90 = float(np.percentile(after, 90)) if len(after) else None
+        self.blockers_rate = float(p.blockers[submitted].mean()) if len(after) else 0.0
+
+        self.hour_counts, self.hour_edges = np.histogram(p.local[submitted] / 3600, bins=HOUR_BINS, range=(0, 24))
+
+        # Tendencia semanal (semanas de lunes a domingo; 1970-01-01 fue jueves)
+        if days:
+            week_of_date = (p.dates.astype(np.int64) + 3) // 7
+            self.weeks = np.unique(week_of_date)
+            week = np.searchsorted(self.weeks, week_of_date)[p.day]
+            week_prompts = np.bincount(week, minlength=len(self.weeks))
+            week_completed = np.bincount(week, weights=submitted, minlength=len(self.weeks))
+            self.week_rate = week_completed / np.maximum(week_prompts, 1)
+            self.week_blockers = np.bincount(week, weights=submitted & p.blockers, minlength=len(self.weeks)) / np.maximum(week_completed, 1)
+            self.week_start = (self.weeks * 7 - 3).astype('M8[D]')
+        else:
+            self.weeks = self.week_rate = self.week_blockers = np.zeros(0)
+            self.week_start = np.zeros(0, dtype='M8[D]')
+
+    @property
+    def busiest_slot(self) -> Optional[Tuple[float, float]]:
+        """Franja (desde, hasta) en horas con más envíos"""
+        if not self.completed:
+            return None
+        slot = int(np.argmax(self.hour_counts))
+        return float(self.hour_edges[slot]), float(self.hour_edges[slot + 1])
+
+
+def format_hour(hours: float) -> str:
+    """Horas decimales como HH:MM"""
+    return f"{int(hours):02d}:{int(round(hours % 1 * 60)):02d}"
+
+
+def render_png(report: Report, names: Dict[int, str], title: str = '') -> bytes:
+    """Imagen del reporte: mapa de calor por miembro, hora de envío y tendencia semanal"""
+    from matplotlib import rc_context
+    from matplotlib.figure import Figure
+    from matplotlib.colors import ListedColormap
+
+    p = report.participation
+    # Filas ordenadas de menor a mayor participación: quien más falta queda arriba
+    order = np.argsort(report.member_rate, kind='stable')
+    users = len(order)
+    # Márgenes fijos en pulgadas: `bbox_inches='tight'` obliga a dibujar la figura dos veces
+    heatmap_height = max(2.0, 0.11 * users)
+    height = heatmap_height + 6
+    fig = Figure(figsize=(12, height), dpi=100)
+    fig.subplots_adjust(left=2.2 / 12, right=0.98, top=1 - 0.8 / height, bottom=0.9 / height)
+    grid = fig.add_gridspec(2, 2, height_ratios=[heatmap_height, 3.2], hspace=1.6 / height * 2, wspace=0.2)
+    if title:
+        fig.suptitle(title, fontsize=14)
+
+    ax = fig.add_subplot(grid[0, :])
+    cmap = ListedColormap(['#e74c3c', '#2ecc71'])
+    cmap.set_bad('#ecf0f1')
+    ax.imshow(np.ma.masked_invalid(report.heatmap[order]), aspect='auto', interpolation='nearest', cmap=cmap, vmin=0, vmax=1)
+    # Nombres como textos sueltos junto a cada fila: un tick de matplotlib por miembro
+    # cuesta bastante más de crear y dibujar
+    ax.set_yticks([])
+    labels = ax.get_yaxis_transform()
+    for row, i in enumerate(order):
+        ax.text(-0.005, row, f"{names.get(int(p.user_ids[i]), p.user_ids[i])} ({report.member_rate[i]:.0%})",
+                transform=labels, ha='right', va='center', fontsize=7 if users <= 60 else 6)
+    if len(p.dates):
+        step = max(1, len(p.dates) // 12)
+        ax.set_xticks(range(0, len(p.dates), step))
+        ax.set_xticklabels([str(d)[5:] for d in p.dates[::step]], fontsize=8)
+    ax.set_title("Dailies por miembro (verde: enviada, rojo: faltó, gris: no se pidió)", fontsize=10)
+
+    ax = fig.add_subplot(grid[1, 0])
+    width = 24 / HOUR_BINS
+    ax.bar(report.hour_edges[:-1], report.hour_counts, width=width, align='edge', color='#3498db')
+    ax.set_xlim(0, 24)
+    ax.set_xticks(range(0, 25, 3))
+    ax.set_xlabel("Hora local de envío")
+    ax.set_title("Distribución de la hora de envío", fontsize=10)
+
+    ax = fig.add_subplot(grid[1, 1])
+    if len(report.weeks):
+        weeks = report.week_start.astype('datetime64[D]').astype(object)
+        ax.plot(weeks, report.week_rate * 100, marker='o', color='#2ecc71', label="Completación")
+        ax.plot(weeks, report.week_blockers * 100, marker='o', color='#e67e22', label="Con bloqueos")
+        ax.legend(fontsize=8)
+        ax.tick_params(axis='x', labelrotation=30, labelsize=8)
+    ax.set_ylim(0, 105)
+    ax.set_ylabel("%")
+    ax.set_title("Tendencia semanal", fontsize=10)
+
+    buffer = io.BytesIO()
+    # Sin hinting de fuentes (los nombres son la mayor parte del dibujo) y con compresión
+    # rápida: el texto queda apenas más suave y la imagen pesa un poco más
+    with rc_context({'text.hinting': 'no_hinting'}):
+        fig.savefig(buffer, format='png', pil_kwargs={'compress_level': 1})
+    return buffer.getvalue()
+
+
+def preload():
+    """Importa numpy y matplotlib y dibuja un reporte mínimo (bloqueante: correr en un thread).
+
+    El primer `/daily_report` no paga los imports, las fuentes ni los conversores de fechas.
+    """
+    if not available():
+        return
+    lines = ['2026-01-05,1,60,36000,1', '2026-01-12,1,nan,nan,0']
+    render_png(Report(_participation(lines)), {1: 'preload'}, 'preload')
+
+
+def build_report(path: str, since: date, until: date, names: Dict[int, str], title: str = '') -> Tuple[Report, Optional[bytes]]:
+    """Carga, agrega y dibuja (bloqueante: correr en un thread)"""
+    report = Report(load_participation(path, since, until))
+    png = render_png(report, names, title) if report.prompts else None
+    return report, png
@@ -0,0 +1,58 @@
+"""Miembros del equipo por servidor para LOW_MEMORY_MODE.
+
+Con la caché de miembros de discord.py reducida, `role.members` y
+`guild.get_member` no sirven para saber quién es del equipo. `cogs/roster_cache.py`
+carga en este mapa a los miembros con roles del equipo o de algún horario y lo
+mantiene al día con los eventos. Sin LOW_MEMORY_MODE las consultas van directo
+a la caché de discord.py.
+"""
+from typing import Dict, List, Set
+from utils.config import config
+
+
+class TeamRoster:
+    """guild_id -> {user_id: miembro} con los miembros del equipo (LOW_MEMORY_MODE)"""
+
+    def __init__(self):
+        self._guilds: Dict[int, Dict[int, object]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return config.LOW_MEMORY_MODE
+
+    def members(self, guild_id: int) -> Dict[int, object]:
+        return self._guilds.get(guild_id, {})
+
+    def ids(self, guild_id: int) -> Set[int]:
+        return set(self._guilds.get(guild_id, ()))
+
+    def replace(self, guild_id: int, members: Dict[int, object]):
+        self._guilds[guild_id] = members
+
+    def add(self, guild_id: int, member) -> bool:
+        """Agrega (o actualiza) un miembro; devuelve True si no estaba"""
+        members = self._guilds.setdefault(guild_id, {})
+        added = member.id not in members
+        members[member.id] = member
+        return added
+
+    def discard(self, guild_id: int, user_id: int) -> bool:
+        """Saca a un miembro; devuelve True si estaba"""
+        return self._guilds.get(guild_id, {}).pop(user_id, None) is not None
+
+    def get_member(self, guild, user_id: int):
+        """Miembro del roster o, si no está (o sin LOW_MEMORY_MODE), de la caché de discord.py"""
+        if self.enabled:
+            member = self._guilds.get(guild.id, {}).get(user_id)
+            if member is not None:
+                return member
+        return guild.get_member(user_id)
+
+    def role_members(self, guild, role) -> List:
+        """Miembros con `role`: del roster con LOW_MEMORY_MODE, si no `role.members`"""
+        if not self.enabled:
+            return role.members
+        return [member for member in self._guilds.get(guild.id, {}).values() if member.get_role(role.id) is not None]
+
+
+team_roster = TeamRoster()
@@ -0,0 +1,61 @@
+import time
+import logging
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger('DailiesBot')
+
+
+class StartupProfiler:
+    """Mide la duración de cada fase del arranque (imports, cogs, sync, views, reconciliación).
+
+    `started` se toma lo antes posible en main.py, de modo que la primera fase
+    incluye el tiempo de importar discord.py y los módulos del bot. Con
+    `profile=True` además corre cProfile hasta que el bot queda listo.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self._mark = self.started
+        self._profiler = None
+        self.ready_seconds: Optional[float] = None
+
+    def enable_profiler(self):
+        import cProfile
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def phase(self, name: str):
+        """Cierra la fase actual con el nombre dado y empieza a medir la siguiente"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._mark))
+        self._mark = now
+
+    def skip(self):
+        """Descarta el tiempo transcurrido desde la última fase (p. ej. esperando a Discord)"""
+        self._mark = time.perf_counter()
+
+    def total(self) -> float:
+        return sum(seconds for _, seconds in self.phases)
+
+    def report(self, stats_file: Optional[str] = None) -> str:
+        self.ready_seconds = self.total()
+        lines = [f"Startup report ({self.ready_seconds:.3f}s sin contar la conexión a Discord):"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<28} {seconds * 1000:9.1f} ms")
+        text = "\n".join(lines)
+        logger.info(text)
+
+        if self._profiler is not None:
+            import io
+            import pstats
+            self._profiler.disable()
+            out = io.StringIO()
+            stats = pstats.Stats(self._profiler, stream=out).sort_stats('cumulative')
+            stats.print_stats(25)
+            logger.info(f"Startup profile (top 25 por tiempo acumulado):\n{out.getvalue()}")
+            if stats_file:
+                stats.dump_stats(stats_file)
+                logger.info(f"Startup profile saved to {stats_file}")
+            self._profiler = None
+        return text
@@ -0,0 +1,172 @@
+import math
+import asyncio
+from typing import Callable, Dict, List, Set, Tuple
+from utils.config import guild_settings, member_prefs, dailies_storage
+from utils.clock import clock
+from utils.roster import team_roster
+
+# Menciones por lista (completadas / pendientes) en cada página del estado
+PAGE_SIZE = 10
+
+
+class StatusSnapshot:
+    """Estado de las dailies de "hoy" de un servidor.
+
+    `completed` y `pending` se mantienen al día en O(1) con cada daily enviada y
+    cada cambio de roles; `version` aumenta con cada cambio para invalidar lo que
+    se haya renderizado a partir del snapshot.
+    """
+
+    def __init__(self, guild_id: int, team_roles: Tuple[int, ...], roster: Set[int], submitted: Set[int]):
+        self.guild_id = guild_id
+        self.team_roles = team_roles
+        self.roster = roster
+        self.submitted = submitted
+        self.completed = roster & submitted
+        self.pending = roster - submitted
+        self.version = 0
+        # Día local de cada zona horaria del equipo al armar el snapshot
+        self.days = self._days()
+
+    def _zones(self) -> Set[str]:
+        zones = {member_prefs.timezone_for(self.guild_id)}
+        zones.update(member_prefs.timezone_for(self.guild_id, user_id) for user_id in self.roster)
+        return zones
+
+    def _days(self) -> Dict[str, str]:
+        return {tz_name: clock.today_key(tz_name) for tz_name in self._zones()}
+
+    def is_current(self) -> bool:
+        """False si cambió el día de alguna zona del equipo o los roles del equipo"""
+        if tuple(guild_settings.get(self.guild_id).team_roles) != self.team_roles:
+            return False
+        return all(clock.today_key(tz_name) == day for tz_name, day in self.days.items())
+
+    @property
+    def completion_rate(self) -> float:
+        return len(self.completed) / len(self.roster) * 100 if self.roster else 0.0
+
+    def mark_submitted(self, user_id: int):
+        if user_id in self.submitted:
+            return
+        self.submitted.add(user_id)
+        if user_id in self.pending:
+            self.pending.discard(user_id)
+            self.completed.add(user_id)
+        self.version += 1
+
+    def add_member(self, user_id: int):
+        if user_id in self.roster:
+            return
+        self.roster.add(user_id)
+        (self.completed if user_id in self.submitted else self.pending).add(user_id)
+        tz_name = member_prefs.timezone_for(self.guild_id, user_id)
+        self.days.setdefault(tz_name, clock.today_key(tz_name))
+        self.version += 1
+
+    def remove_member(self, user_id: int):
+        if user_id not in self.roster:
+            return
+        self.roster.discard(user_id)
+        self.completed.discard(user_id)
+        self.pending.discard(user_id)
+        self.version += 1
+
+
+def _roster(guild, team_roles) -> Set[int]:
+    roster = set()
+    for role_id in team_roles:
+        role = guild.get_role(role_id)
+        if role:
+            roster.update(member.id for member in team_roster.role_members(guild, role) if not member.bot)
+    return roster
+
+
+class StatusSnapshots:
+    """Snapshots por servidor y páginas del embed de `/daily_status` cacheadas por versión"""
+
+    def __init__(self):
+        self._snapshots: Dict[int, StatusSnapshot] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # guild_id -> (snapshot, versión, embeds por página)
+        self._rendered: Dict[int, Tuple[StatusSnapshot, int, List]] = {}
+        self._listeners: List[Callable[[int], None]] = []
+
+    def subscribe(self, listener: Callable[[int], None]):
+        """Registra `listener(guild_id)`, llamado cada vez que cambia el estado de un servidor"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[int], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, guild_id: int):
+        for listener in list(self._listeners):
+            listener(guild_id)
+
+    async def get(self, guild) -> StatusSnapshot:
+        snapshot = self._snapshots.get(guild.id)
+        if snapshot is not None and snapshot.is_current():
+            return snapshot
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            snapshot = self._snapshots.get(guild.id)
+            if snapshot is None or not snapshot.is_current():
+                snapshot = await self._build(guild)
+                self._snapshots[guild.id] = snapshot
+        return snapshot
+
+    async def _build(self, guild) -> StatusSnapshot:
+        team_roles = tuple(guild_settings.get(guild.id).team_roles)
+        today_dailies = await dailies_storage.get_today_dailies(guild.id)
+        return StatusSnapshot(guild.id, team_roles, _roster(guild, team_roles), set(today_dailies))
+
+    def mark_submitted(self, guild_id: int, user_id: int):
+        snapshot = self._snapshots.get(guild_id)
+        if snapshot is not None:
+            snapshot.mark_submitted(user_id)
+        # Sin snapshot también se avisa: el próximo `get()` lo arma con la daily nueva
+        self._notify(guild_id)
+
+    def member_changed(self, member):
+        """Actualiza la pertenencia al equipo de un miembro (cambio de roles, alta)"""
+        snapshot = self._snapshots.get(member.guild.id)
+        if snapshot is None:
+            return
+        version = snapshot.version
+        if not member.bot and any(role.id in snapshot.team_roles for role in member.roles):
+            snapshot.add_member(member.id)
+        else:
+            snapshot.remove_member(member.id)
+        if snapshot.version != version:
+            self._notify(member.guild.id)
+
+    def member_removed(self, guild_id: int, user_id: int):
+        snapshot = self._snapshots.get(guild_id)
+        if snapshot is not None and user_id in snapshot.roster:
+            snapshot.remove_member(user_id)
+            self._notify(guild_id)
+
+    def pages(self, guild, snapshot: StatusSnapshot, render) -> List:
+        """Embeds de todas las páginas, re-renderizados solo si cambió el snapshot"""
+        cached = self._rendered.get(guild.id)
+        if cached is not None and cached[0] is snapshot and cached[1] == snapshot.version:
+            return cached[2]
+        embeds = render(guild, snapshot)
+        self._rendered[guild.id] = (snapshot, snapshot.version, embeds)
+        return embeds
+
+
+def mentions(guild, user_ids) -> List[str]:
+    """Menciones ordenadas por nombre visible"""
+    def name(user_id):
+        member = team_roster.get_member(guild, user_id)
+        return (member.display_name.lower() if member else '', user_id)
+    return [f"<@{user_id}>" for user_id in sorted(user_ids, key=name)]
+
+
+def page_count(snapshot: StatusSnapshot) -> int:
+    return max(1, math.ceil(max(len(snapshot.completed), len(snapshot.pending)) / PAGE_SIZE))
+
+
+status_snapshots = StatusSnapshots()
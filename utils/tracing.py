@@ -0,0 +1,180 @@
+import json
+import time
+import logging
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger('DailiesBot.Tracing')
+
+_current: ContextVar[Optional['Span']] = ContextVar('dailies_span', default=None)
+
+# Configuración (ver `configure`); por defecto solo se loguean los traces lentos
+_settings = {'slow_ms': 1000.0, 'log_path': None}
+_traces: Deque['Span'] = deque(maxlen=50)
+_slow_log: Optional[logging.Logger] = None
+
+
+class Span:
+    """Tramo medido de una operación. Los spans sin padre son traces completos"""
+
+    __slots__ = ('name', 'attrs', 'parent', 'children', 'started_at', 'start', 'duration', '_token')
+
+    def __init__(self, name: str, parent: Optional['Span'], attrs: Dict):
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.children: List[Span] = []
+        self.started_at: Optional[datetime] = None
+        self.start = 0.0
+        self.duration = 0.0
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        if self.parent is None:
+            self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        if self.parent is None:
+            _finish(self)
+        else:
+            self.parent.children.append(self)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def flatten(self, depth: int = 0, origin: Optional[float] = None) -> List[Dict]:
+        origin = self.start if origin is None else origin
+        rows = [{
+            'name': self.name,
+            'depth': depth,
+            'offset_ms': round((self.start - origin) * 1000, 2),
+            'duration_ms': round(self.duration_ms, 2),
+            **({'attrs': self.attrs} if self.attrs else {})
+        }]
+        for child in sorted(self.children, key=lambda span: span.start):
+            rows.extend(child.flatten(depth + 1, origin))
+        return rows
+
+
+class _NoopSpan:
+    """Span vacío: se usa cuando no hay un trace activo y el span no inicia uno"""
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, root: bool = True, **attrs):
+    """Abre un span hijo del actual. Con `root=False` no inicia un trace nuevo"""
+    parent = _current.get()
+    if parent is None and not root:
+        return _NOOP
+    return Span(name, parent, attrs)
+
+
+def current():
+    """Span activo (o uno vacío) para agregarle atributos"""
+    return _current.get() or _NOOP
+
+
+def traced(name: str, root: bool = True):
+    """Decorador para corrutinas: envuelve cada llamada en un span"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name, root=root):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure(slow_ms: float = 1000, buffer_size: int = 50, log_path: Optional[str] = None):
+    global _traces, _slow_log
+    _settings['slow_ms'] = slow_ms
+    _settings['log_path'] = log_path
+    _traces = deque(_traces, maxlen=max(1, buffer_size))
+    _slow_log = None
+
+
+def _slow_logger() -> Optional[logging.Logger]:
+    global _slow_log
+    if _slow_log is None and _settings['log_path']:
+        _slow_log = logging.getLogger('DailiesBot.SlowOps')
+        _slow_log.propagate = False
+        _slow_log.setLevel(logging.INFO)
+        handler = RotatingFileHandler(_settings['log_path'], maxBytes=5 * 1024 * 1024, backupCount=3, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        _slow_log.addHandler(handler)
+    return _slow_log
+
+
+def _finish(trace: Span):
+    _traces.append(trace)
+    if trace.duration_ms < _settings['slow_ms']:
+        return
+    slowest = max(trace.flatten()[1:], key=lambda row: row['duration_ms'], default=None)
+    detail = f" (slowest: {slowest['name']} {slowest['duration_ms']:.0f} ms)" if slowest else ""
+    logger.warning(f"Slow operation {trace.name}: {trace.duration_ms:.0f} ms{detail}")
+    slow_log = _slow_logger()
+    if slow_log is not None:
+        slow_log.info(json.dumps({
+            'ts': trace.started_at.isoformat(),
+            'name': trace.name,
+            'duration_ms': round(trace.duration_ms, 2),
+            'attrs': trace.attrs,
+            'spans': trace.flatten()[1:]
+        }, ensure_ascii=False, default=str))
+
+
+def recent_traces(limit: int = 10, slow_only: bool = False) -> List[Span]:
+    traces = [trace for trace in _traces if not slow_only or trace.duration_ms >= _settings['slow_ms']]
+    return traces[-limit:][::-1]
+
+
+def format_trace(trace: Span, max_rows: int = 12) -> str:
+    """Trace como texto: una línea por span con su inicio relativo y duración"""
+    attrs = ' '.join(f'{key}={value}' for key, value in trace.attrs.items())
+    lines = [f"{trace.started_at:%H:%M:%S} {trace.name} {trace.duration_ms:.1f} ms {attrs}".rstrip()]
+    rows = trace.flatten()[1:]
+    for row in rows[:max_rows]:
+        extra = ' '.join(f'{key}={value}' for key, value in row.get('attrs', {}).items())
+        lines.append(f"{'  ' * row['depth']}+{row['offset_ms']:.0f} {row['name']} {row['duration_ms']:.1f} ms {extra}".rstrip())
+    if len(rows) > max_rows:
+        lines.append(f"  ... {len(rows) - max_rows} span(s) más")
+    return '\n'.join(lines)